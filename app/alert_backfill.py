@@ -0,0 +1,44 @@
+"""
+Immediate alerts for new, edited or newly activated subscriptions.
+
+Routes schedule backfill_subscription() as a FastAPI background task, so it runs
+after the response is sent. It matches the subscription against the open jobs
+first seen within the workers' catch-up window through the SQL matcher, queues the
+deliveries, and emails them right away instead of waiting for the next worker cycle.
+"""
+from __future__ import annotations
+
+from app.email_utils import format_alert_body, send_text_email
+from core.database import (
+    backfill_subscription_deliveries,
+    mark_alert_deliveries_failed,
+    mark_alert_deliveries_sent,
+)
+
+
+def backfill_subscription(subscription_id: int | None) -> int:
+    """Queue and email matching open jobs for one subscription. Returns jobs emailed."""
+    if not subscription_id:
+        return 0
+    try:
+        rows = backfill_subscription_deliveries(int(subscription_id))
+    except Exception as e:
+        print(f"[backfill] Matching failed for subscription_id={subscription_id}: {e}")
+        return 0
+    if not rows:
+        return 0
+
+    email = rows[0]["email"]
+    job_ids = [row["id"] for row in rows]
+    try:
+        send_text_email(to_email=email, subject="Amazon Job Alert!", body=format_alert_body(rows))
+    except Exception as e:
+        print(f"[backfill] Failed to send alert for subscription_id={subscription_id} email={email}: {e}")
+        mark_alert_deliveries_failed(subscription_id=int(subscription_id), job_ids=job_ids, error=str(e))
+        return 0
+    mark_alert_deliveries_sent(subscription_id=int(subscription_id), job_ids=job_ids)
+    print(f"[backfill] Sent {len(rows)} job(s) for subscription_id={subscription_id}")
+    return len(rows)
+
+
+__all__ = ["backfill_subscription"]
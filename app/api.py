@@ -1,3 +1,4 @@
+import os
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
@@ -5,18 +6,34 @@ from dotenv import load_dotenv
 
 from app.routes import admin, auth, dashboard, public
 from app.routes import my_alerts, account
-from core.database import init_db
+from core.database import (
+    close_async_pool,
+    init_db,
+    open_async_pool,
+    purge_expired_sessions,
+    reads_on_primary,
+    reads_use_replica,
+)
 
 # Ensure .env values are loaded even if uvicorn is launched without `dotenv run`.
 # Use override=True so editing `.env` (and restarting uvicorn) reliably takes effect even if
 # older values exist in the environment from a previous shell/session.
 load_dotenv(override=True)
 
+# With a read replica (DATABASE_READ_URL), a browser that has just written reads from the
+# primary for this many seconds, so the page it is redirected to shows its change.
+READ_PRIMARY_SECONDS = int(os.getenv("READ_PRIMARY_SECONDS", "5"))
+READ_PRIMARY_COOKIE = "read_primary"
+_SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     init_db()
+    purge_expired_sessions()
+    await open_async_pool()
     yield
+    await close_async_pool()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -41,3 +58,20 @@ async def add_security_headers(request: Request, call_next):
         "font-src 'self' data:; connect-src 'self';",
     )
     return response
+
+
+@app.middleware("http")
+async def route_reads(request: Request, call_next):
+    """Keep requests that write, or follow a recent write, off the read replica."""
+    if not reads_use_replica():
+        return await call_next(request)
+    writes = request.method not in _SAFE_METHODS
+    if not writes and not request.cookies.get(READ_PRIMARY_COOKIE):
+        return await call_next(request)
+    with reads_on_primary():
+        response = await call_next(request)
+    if writes:
+        response.set_cookie(
+            READ_PRIMARY_COOKIE, "1", max_age=READ_PRIMARY_SECONDS, httponly=True, samesite="lax"
+        )
+    return response
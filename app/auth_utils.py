@@ -8,7 +8,16 @@ import os
 from fastapi import Request
 from fastapi.responses import Response
 
-from core.database import delete_session, get_session, get_user_by_id, touch_session
+from core.database import (
+    delete_session,
+    delete_session_async,
+    get_session,
+    get_session_async,
+    get_user_by_id,
+    get_user_by_id_async,
+    touch_session,
+    touch_session_async,
+)
 
 SESSION_COOKIE_NAME = "session_id"
 SESSION_COOKIE_MAX_AGE = 1800  # 30 minutes
@@ -45,6 +54,25 @@ def get_current_user(request: Request):
     return user, token
 
 
+async def get_current_user_async(request: Request):
+    """get_current_user() for async routes; the lookups do not block a threadpool thread."""
+    token = request.cookies.get(SESSION_COOKIE_NAME)
+    if not token:
+        return None, None
+
+    session = await get_session_async(token)
+    if not session:
+        return None, token
+
+    user = await get_user_by_id_async(session["user_id"])
+    if not user or user.get("email_verified_at") in (None, ""):
+        await delete_session_async(token)
+        return None, token
+
+    await touch_session_async(token)
+    return user, token
+
+
 def set_session_cookie(response: Response, token: str) -> None:
     response.set_cookie(
         key=SESSION_COOKIE_NAME,
@@ -6,6 +6,7 @@ from __future__ import annotations
 import os
 import smtplib
 from email.mime.text import MIMEText
+from typing import Dict, List
 
 
 def _effective_from(email_from: str | None, email_user: str | None, smtp_server: str) -> str:
@@ -14,6 +15,27 @@ def _effective_from(email_from: str | None, email_user: str | None, smtp_server:
     return email_from or email_user or "noreply@zone-alerts.com"
 
 
+
+def format_alert_body(jobs: List[Dict]) -> str:
+    """Plain-text job alert body, used by the workers' alerts and the app's backfill alike."""
+    lines: List[str] = [f"{len(jobs)} job(s) found for your preferences.\n"]
+
+    for idx, job in enumerate(jobs, start=1):
+        lines.append(f"Job {idx}")
+        lines.append(f"Title: {job.get('title')}")
+        for label, key in (("Type", "type"), ("Duration", "duration"), ("Pay", "pay"), ("Location", "location")):
+            if job.get(key):
+                lines.append(f"{label}: {job[key]}")
+
+        summary = ", ".join(job.get(key) for key in ("type", "duration", "pay", "location") if job.get(key))
+        if summary:
+            lines.append(f"Profile: {job.get('title')} - {summary}")
+
+        lines.append(f"URL: {job.get('url')}")
+        lines.append("")
+
+    return "\n".join(lines)
+
 def send_text_email(to_email: str, subject: str, body: str) -> None:
     email_user = os.getenv("EMAIL_USER")
     email_password = os.getenv("EMAIL_PASSWORD")
@@ -1,9 +1,24 @@
 """
 Shared HTML layout and styling helpers.
 """
+from datetime import datetime, timezone
+
 from fastapi.responses import HTMLResponse
 
 
+def format_dt(value: datetime | str | None) -> str:
+    """Render a stored timestamp (naive values are UTC) as a local human-readable string."""
+    if not value:
+        return ""
+    try:
+        dt = value if isinstance(value, datetime) else datetime.fromisoformat(value)
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.astimezone().strftime("%Y-%m-%d %H:%M:%S")
+    except Exception:
+        return str(value)
+
+
 def render_page(title: str, body: str, user: dict | None = None) -> HTMLResponse:
     """
     Shared layout: dark background, nav bar, and optional 'signed in as' line.
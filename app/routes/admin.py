@@ -1,41 +1,56 @@
 from fastapi import APIRouter, Request
 from fastapi.responses import HTMLResponse, RedirectResponse
-from datetime import datetime, timezone
 
 from app.auth_utils import get_current_user
-from app.layout import render_page
+from app.layout import format_dt, render_page
 from core.database import (
     deactivate_subscription,
     get_active_subscriptions,
     get_deleted_subscriptions,
     get_deleted_users,
     get_all_jobs,
+    get_area_groups,
+    get_job_location_stats,
+    get_locations,
+    pool_stats,
+    statement_stats,
 )
 
 router = APIRouter()
 
 
-def _format_dt(dt_str: str | None) -> str:
-    """Render ISO timestamp as local human-readable string."""
-    if not dt_str:
-        return ""
+def _int_or_none(value: str | None) -> int | None:
+    """Parse an optional integer query param (empty select option -> None)."""
     try:
-        dt = datetime.fromisoformat(dt_str)
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        return dt.astimezone().strftime("%Y-%m-%d %H:%M:%S")
-    except Exception:
-        return dt_str or ""
+        return int(value) if value not in (None, "") else None
+    except ValueError:
+        return None
 
 
 @router.get("/jobs", response_class=HTMLResponse)
-def list_jobs(request: Request):
+def list_jobs(request: Request, location_id: str = "", area_group_id: str = ""):
     user, _ = get_current_user(request)
     if not user:
         return RedirectResponse(url="/login", status_code=303)
     if user.get("role") != "admin":
         return HTMLResponse("Forbidden", status_code=403)
-    jobs = get_all_jobs(limit=100)
+    location_id = _int_or_none(location_id)
+    area_group_id = _int_or_none(area_group_id)
+    jobs = get_all_jobs(limit=100, location_id=location_id, area_group_id=area_group_id)
+    location_stats = get_job_location_stats()
+
+    group_options = "".join(
+        f"<option value='{g['id']}'{' selected' if g['id'] == area_group_id else ''}>{g['label']}</option>"
+        for g in get_area_groups()
+    )
+    location_options = "".join(
+        f"<option value='{l['id']}'{' selected' if l['id'] == location_id else ''}>{l['name']}</option>"
+        for l in get_locations()
+    )
+    counts_html = "".join(
+        f"<tr><td><a href='/jobs?area_group_id={g['id']}'>{g['label']}</a></td><td>{g['jobs']}</td></tr>"
+        for g in location_stats["area_groups"]
+    ) or '<tr><td colspan="2">No resolved jobs yet.</td></tr>'
 
     rows_html = ""
     for j in jobs:
@@ -48,7 +63,7 @@ def list_jobs(request: Request):
           <td>{j.get('type') or ''}</td>
           <td>{j.get('duration') or ''}</td>
           <td>{j.get('pay') or ''}</td>
-          <td>{_format_dt(j.get('first_seen_at'))}</td>
+          <td>{format_dt(j.get('first_seen_at'))}</td>
           <td><a href="{url}" target="_blank">View</a></td>
         </tr>
         """
@@ -59,6 +74,17 @@ def list_jobs(request: Request):
     body = f"""
     <div class="card">
       <h2>Stored jobs</h2>
+      <form method="get" action="/jobs" style="display:flex; gap:0.5rem; flex-wrap:wrap; margin-bottom:0.75rem;">
+        <select name="area_group_id">
+          <option value="">All area groups</option>
+          {group_options}
+        </select>
+        <select name="location_id">
+          <option value="">All locations</option>
+          {location_options}
+        </select>
+        <button type="submit">Filter</button>
+      </form>
       <p class="muted">
         Showing the most recent {len(jobs)} jobs currently in the database.
       </p>
@@ -80,6 +106,21 @@ def list_jobs(request: Request):
         </tbody>
       </table>
     </div>
+
+    <div class="card" style="margin-top:1rem;">
+      <h2>Jobs by area group</h2>
+      <table>
+        <thead>
+          <tr>
+            <th>Area group</th>
+            <th>Jobs</th>
+          </tr>
+        </thead>
+        <tbody>
+          {counts_html}
+        </tbody>
+      </table>
+    </div>
     """
 
     return render_page("Stored Jobs – Amazon Job Alerts", body, user=user)
@@ -117,7 +158,7 @@ def list_subscriptions(request: Request):
     body = f"""
     <div class="card">
       <h2>Active Subscriptions</h2>
-      <p class="muted"><a href="/archives">View deleted records</a></p>
+      <p class="muted"><a href="/archives">View deleted records</a> · <a href="/db-stats">Query stats</a></p>
       <table>
         <thead>
           <tr>
@@ -168,8 +209,8 @@ def list_archives(request: Request):
           <td>{u.get('user_id')}</td>
           <td>{u.get('email')}</td>
           <td>{u.get('role')}</td>
-          <td>{_format_dt(u.get('created_at'))}</td>
-          <td>{_format_dt(u.get('deleted_at'))}</td>
+          <td>{format_dt(u.get('created_at'))}</td>
+          <td>{format_dt(u.get('deleted_at'))}</td>
         </tr>
         """
     if not deleted_users:
@@ -184,8 +225,8 @@ def list_archives(request: Request):
           <td>{s.get('email')}</td>
           <td>{s.get('preferred_location') or ''}</td>
           <td>{s.get('job_type') or ''}</td>
-          <td>{_format_dt(s.get('created_at'))}</td>
-          <td>{_format_dt(s.get('deleted_at'))}</td>
+          <td>{format_dt(s.get('created_at'))}</td>
+          <td>{format_dt(s.get('deleted_at'))}</td>
         </tr>
         """
     if not deleted_subs:
@@ -232,3 +273,49 @@ def list_archives(request: Request):
     """
 
     return render_page("Archives – Amazon Job Alerts", body, user=user)
+
+
+@router.get("/db-stats", response_class=HTMLResponse)
+def db_stats(request: Request):
+    user, _ = get_current_user(request)
+    if not user:
+        return RedirectResponse(url="/login", status_code=303)
+    if user.get("role") != "admin":
+        return HTMLResponse("Forbidden", status_code=403)
+
+    rows_html = ""
+    for st in statement_stats():
+        rows_html += f"""
+        <tr>
+          <td>{st['name']}</td>
+          <td>{st['calls']}</td>
+          <td>{st['total_ms']:.1f}</td>
+          <td>{st['avg_ms']:.2f}</td>
+          <td>{st['max_ms']:.2f}</td>
+        </tr>
+        """
+
+    pool_html = ", ".join(f"{k}: {v}" for k, v in sorted(pool_stats().items())) or "Pool not opened yet."
+
+    body = f"""
+    <div class="card">
+      <h2>Prepared statements (this process)</h2>
+      <p class="muted">{pool_html}</p>
+      <table>
+        <thead>
+          <tr>
+            <th>Statement</th>
+            <th>Calls</th>
+            <th>Total ms</th>
+            <th>Avg ms</th>
+            <th>Max ms</th>
+          </tr>
+        </thead>
+        <tbody>
+          {rows_html}
+        </tbody>
+      </table>
+    </div>
+    """
+
+    return render_page("Query stats – Amazon Job Alerts", body, user=user)
@@ -4,10 +4,12 @@ from email.mime.text import MIMEText
 import secrets
 import html
 
-from fastapi import APIRouter, Form, Request
+from fastapi import APIRouter, BackgroundTasks, Form, Request
 from fastapi.responses import HTMLResponse, RedirectResponse
+from starlette.concurrency import run_in_threadpool
 
-from app.auth_utils import clear_session_cookie, get_current_user, set_session_cookie
+from app.alert_backfill import backfill_subscription
+from app.auth_utils import clear_session_cookie, get_current_user, get_current_user_async, set_session_cookie
 from app.layout import render_page
 from app.security import (
     attach_csrf_cookie,
@@ -20,12 +22,14 @@ from app.email_utils import send_text_email
 from core.database import (
     create_password_reset_token,
     create_session,
+    create_session_async,
     delete_session,
     create_email_verification_token,
     get_email_verification_token,
     get_password_reset_token,
     get_user_by_id,
     get_user_by_email,
+    get_user_by_email_async,
     create_user,
     mark_email_verification_token_used,
     mark_reset_token_used,
@@ -51,9 +55,16 @@ def _send_verification_email(to_email: str, verify_link: str) -> None:
     )
 
 
+def _resend_verification(request: Request, user: dict) -> None:
+    """Issue a fresh verification token and email it (blocking; run off the event loop)."""
+    token = create_email_verification_token(user["id"])
+    link = _build_public_url(request, f"/verify-email?token={token}")
+    _send_verification_email(user["email"], link)
+
+
 @router.get("/login", response_class=HTMLResponse)
-def login_form(request: Request):
-    user, _ = get_current_user(request)
+async def login_form(request: Request):
+    user, _ = await get_current_user_async(request)
     csrf_token = issue_csrf_token(request.cookies.get("csrf_token"))
     body = f"""
     <div class="card">
@@ -77,7 +88,7 @@ def login_form(request: Request):
 
 
 @router.post("/login", response_class=HTMLResponse)
-def login(
+async def login(
     request: Request,
     email: str = Form(..., max_length=50),
     password: str = Form(..., max_length=25),
@@ -91,7 +102,7 @@ def login(
     if not validate_csrf(request, csrf_token):
         return HTMLResponse("Invalid or missing CSRF token.", status_code=403)
 
-    user = get_user_by_email(email)
+    user = await get_user_by_email_async(email)
     csrf_cookie = request.cookies.get("csrf_token", "")
     safe_email = html.escape(email or "", quote=True)
     attempts_left_html = f"<p class='muted'>Attempts left: {remaining}</p>"
@@ -116,7 +127,8 @@ def login(
         """
         return render_page("Login - Amazon Job Alerts", body, user=None)
 
-    if not verify_password(password, user["password_hash"]):
+    # bcrypt is CPU-bound: keep it off the event loop.
+    if not await run_in_threadpool(verify_password, password, user["password_hash"]):
         body = f"""
         <div class="card form-card">
           <p class="muted">Log in to view or manage your alerts.</p>
@@ -138,9 +150,7 @@ def login(
     if user.get("email_verified_at") in (None, ""):
         # Send verification email (rate limit by IP already handled above)
         try:
-            token = create_email_verification_token(user["id"])
-            link = _build_public_url(request, f"/verify-email?token={token}")
-            _send_verification_email(user["email"], link)
+            await run_in_threadpool(_resend_verification, request, user)
         except Exception:
             # Do not leak details; still block login
             pass
@@ -158,7 +168,7 @@ def login(
         attach_csrf_cookie(resp, issue_csrf_token(request.cookies.get("csrf_token")))
         return resp
 
-    token = create_session(user["id"])
+    token = await create_session_async(user["id"])
     response = RedirectResponse(url="/dashboard", status_code=303)
     set_session_cookie(response, token)
     return response
@@ -388,7 +398,7 @@ def password_reset_confirm(
 
 
 @router.get("/verify-email", response_class=HTMLResponse)
-def verify_email(request: Request, token: str = ""):
+def verify_email(request: Request, background_tasks: BackgroundTasks, token: str = ""):
     token_data = get_email_verification_token(token)
     if not token_data:
         body = """
@@ -415,7 +425,8 @@ def verify_email(request: Request, token: str = ""):
     mark_user_email_verified(user["id"])
     mark_email_verification_token_used(token)
     # Activate the most recent inactive subscription created during signup
-    activate_latest_inactive_subscription(user["email"])
+    sub_id = activate_latest_inactive_subscription(user["email"])
+    background_tasks.add_task(backfill_subscription, sub_id)
 
     # Log the user in
     session_token = create_session(user["id"])
@@ -455,9 +466,7 @@ def verify_email_resend(request: Request, email: str = Form(..., max_length=50),
     user = get_user_by_email(email)
     if user and user.get("email_verified_at") in (None, ""):
         try:
-            token = create_email_verification_token(user["id"])
-            link = _build_public_url(request, f"/verify-email?token={token}")
-            _send_verification_email(user["email"], link)
+            _resend_verification(request, user)
         except Exception:
             pass
 
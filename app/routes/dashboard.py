@@ -1,37 +1,47 @@
-from fastapi import APIRouter, Request, Form
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, BackgroundTasks, Request, Form
 from fastapi.responses import HTMLResponse, RedirectResponse
 
-from app.auth_utils import get_current_user
-from app.layout import render_page
+from app.alert_backfill import backfill_subscription
+from app.auth_utils import get_current_user, get_current_user_async
+from app.layout import format_dt, render_page
 from app.area_groups import AREA_GROUPS
 from core.database import (
+    amount_to_minor,
+    format_minor,
     get_all_jobs,
-    get_stats,
-    get_subscriptions_for_email,
-    get_locations,
+    get_cached_stats_async,
+    get_stats_async,
+    get_subscriptions_for_email_async,
+    get_locations_async,
     update_subscription_for_user,
 )
 
 router = APIRouter()
 
+# Sort key for subscriptions without a created_at.
+_NEVER = datetime.min.replace(tzinfo=timezone.utc)
+
+# (form value, label) for the optional "within N miles" radius.
+RADIUS_OPTIONS = [("", "Named locations only"), ("10", "10 miles"), ("25", "25 miles"), ("50", "50 miles")]
+
 
 @router.get("/dashboard", response_class=HTMLResponse)
-def dashboard(request: Request):
-    user, _ = get_current_user(request)
+async def dashboard(request: Request, exact: int = 0):
+    user, _ = await get_current_user_async(request)
     if not user:
         return RedirectResponse(url="/login", status_code=303)
 
-    subs = get_subscriptions_for_email(user["email"])
+    subs = await get_subscriptions_for_email_async(user["email"])
     # Ensure newest first even if DB ordering changes
     subs = sorted(
         subs,
-        key=lambda s: s.get("created_at") or "",
+        key=lambda s: s.get("created_at") or _NEVER,
         reverse=True,
     )
     has_active_subs = any(bool(s.get("active")) for s in subs)
     has_inactive_subs = any(not s.get("active") for s in subs)
-    stats = get_stats()
-
     rows_html = ""
     for s in subs:
         status = "Active" if s.get("active") else "Inactive"
@@ -40,16 +50,25 @@ def dashboard(request: Request):
           <td>{s.get('id')}</td>
           <td>{s.get('preferred_location') or ''}</td>
           <td>{s.get('job_type') or ''}</td>
+          <td>{f"{s['radius_miles']} mi" if s.get('radius_miles') else ''}</td>
+          <td>{format_minor(s.get('min_pay_minor'))}</td>
           <td>{status}</td>
-          <td>{s.get('created_at') or ''}</td>
+          <td>{format_dt(s.get('created_at'))}</td>
         </tr>
         """
 
     if not rows_html:
-        rows_html = '<tr><td colspan="4">No alerts yet. Create one on the home page.</td></tr>'
+        rows_html = '<tr><td colspan="7">No alerts yet. Create one on the home page.</td></tr>'
 
     admin_stats = ""
     if user.get("role") == "admin":
+        # Only admins see counts: estimates by default, exact counts on request.
+        if exact:
+            stats = await get_stats_async()
+            stats_note = "Exact counts."
+        else:
+            stats = await get_cached_stats_async()
+            stats_note = 'Estimated counts. <a href="/dashboard?exact=1">Count exactly</a>'
         admin_stats = f"""
         <div class="stat">
           <div class="label">All active subscriptions</div>
@@ -59,6 +78,7 @@ def dashboard(request: Request):
           <div class="label">Jobs stored</div>
           <div class="value">{stats.get("jobs", 0)}</div>
         </div>
+        <div class="muted" style="align-self:flex-end;">{stats_note}</div>
         """
 
     deactivate_html = ""
@@ -89,14 +109,20 @@ def dashboard(request: Request):
             """
 
     update_options_html = "".join(
-        f"<option value='{s.get('id')}' data-loc=\"{s.get('preferred_location') or ''}\" data-job=\"{s.get('job_type') or ''}\">"
+        f"<option value='{s.get('id')}' data-loc=\"{s.get('preferred_location') or ''}\" data-job=\"{s.get('job_type') or ''}\" data-radius=\"{s.get('radius_miles') or ''}\" "
+        f"data-min-pay=\"{format_minor(s.get('min_pay_minor'))}\">"
         f"{s.get('id')} - {s.get('preferred_location') or ''} ({s.get('job_type') or ''})"
         f"</option>"
         for s in subs
     )
+    locations = await get_locations_async()
     datalist_options = "".join(
         f"<option value='{label}'></option>"
-        for label in list(AREA_GROUPS.keys()) + [loc.get("name") for loc in get_locations()]
+        for label in list(AREA_GROUPS.keys()) + [loc.get("name") for loc in locations]
+    )
+
+    radius_options_html = "".join(
+        f"<option value='{value}'>{label}</option>" for value, label in RADIUS_OPTIONS
     )
 
     update_form_html = f"""
@@ -125,6 +151,14 @@ def dashboard(request: Request):
           <option value="Flex Time">Flex Time</option>
         </select>
 
+        <label>Also include sites within</label>
+        <select name="radius_miles">
+          {radius_options_html}
+        </select>
+
+        <label>Minimum hourly pay (optional)</label>
+        <input name="min_pay" inputmode="decimal" placeholder="e.g. 14.50" maxlength="8" />
+
         <button type="submit" id="save-update" style="margin-top:0.75rem;">Save update</button>
       </form>
     </div>
@@ -133,6 +167,8 @@ def dashboard(request: Request):
           var sel = document.querySelector('select[name=\"sub_id\"]');
           var locInput = document.querySelector('input[name=\"preferred_location\"]');
           var jobSelect = document.querySelector('select[name=\"job_type\"]');
+          var radiusSelect = document.querySelector('select[name=\"radius_miles\"]');
+          var minPayInput = document.querySelector('input[name=\"min_pay\"]');
           var form = document.getElementById('edit-form');
           var startBtn = document.getElementById('start-edit');
           if (!sel || !locInput || !jobSelect || !form || !startBtn) return;
@@ -142,6 +178,8 @@ def dashboard(request: Request):
             var loc = opt.getAttribute('data-loc') || '';
             var job = (opt.getAttribute('data-job') || 'Any');
             locInput.value = loc;
+            if (radiusSelect) radiusSelect.value = opt.getAttribute('data-radius') || '';
+            if (minPayInput) minPayInput.value = opt.getAttribute('data-min-pay') || '';
             for (var i=0;i<jobSelect.options.length;i++) {{
               if ((jobSelect.options[i].value || '').toLowerCase() === job.toLowerCase()) {{
                 jobSelect.selectedIndex = i;
@@ -162,7 +200,7 @@ def dashboard(request: Request):
 
     body = f"""
     <div class="card" style="margin-bottom:1rem;">
-      <div class="muted"><strong>Account created:</strong> {user.get("created_at", "n/a")}</div>
+      <div class="muted"><strong>Account created:</strong> {format_dt(user.get("created_at")) or "n/a"}</div>
       {deactivate_html}
     </div>
 
@@ -182,6 +220,8 @@ def dashboard(request: Request):
             <th>ID</th>
             <th>Preferred locations</th>
             <th>Job type</th>
+            <th>Radius</th>
+            <th>Min pay/hr</th>
             <th>Status</th>
             <th>Created</th>
           </tr>
@@ -199,12 +239,28 @@ def dashboard(request: Request):
 
 
 @router.post("/subscription/update")
-def update_subscription(request: Request, sub_id: int = Form(...), preferred_location: str = Form(..., max_length=50), job_type: str = Form(..., max_length=30)):
+def update_subscription(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    sub_id: int = Form(...),
+    preferred_location: str = Form(..., max_length=50),
+    job_type: str = Form(..., max_length=30),
+    radius_miles: str = Form("", max_length=4),
+    min_pay: str = Form("", max_length=8),
+):
     user, _ = get_current_user(request)
     if not user:
         return RedirectResponse(url="/login", status_code=303)
 
-    success = update_subscription_for_user(sub_id, user["email"], preferred_location.strip(), job_type.strip())
+    radius = int(radius_miles) if radius_miles.strip().isdigit() else None
+    success = update_subscription_for_user(
+        sub_id,
+        user["email"],
+        preferred_location.strip(),
+        job_type.strip(),
+        radius_miles=radius,
+        min_pay_minor=amount_to_minor(min_pay),
+    )
     if not success:
         body = """
         <div class="card">
@@ -214,4 +270,5 @@ def update_subscription(request: Request, sub_id: int = Form(...), preferred_loc
         """
         return render_page("Update alert", body, user=user)
 
+    background_tasks.add_task(backfill_subscription, sub_id)
     return RedirectResponse(url="/dashboard", status_code=303)
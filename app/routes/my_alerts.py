@@ -4,9 +4,9 @@ from fastapi import APIRouter, Request
 from fastapi.responses import HTMLResponse, RedirectResponse
 
 from app.area_groups import AREA_GROUPS
-from app.auth_utils import get_current_user
-from app.layout import render_page
-from core.database import get_alert_deliveries_for_user
+from app.auth_utils import get_current_user_async
+from app.layout import format_dt, render_page
+from core.database import get_alert_deliveries_for_user_async
 
 router = APIRouter()
 
@@ -96,12 +96,12 @@ def job_matches_subscription(
 
 
 @router.get("/my-alerts", response_class=HTMLResponse)
-def my_alerts(request: Request):
-    user, _ = get_current_user(request)
+async def my_alerts(request: Request):
+    user, _ = await get_current_user_async(request)
     if not user:
         return RedirectResponse(url="/login", status_code=303)
 
-    deliveries = get_alert_deliveries_for_user(user_id=int(user["id"]), limit=200)
+    deliveries = await get_alert_deliveries_for_user_async(user_id=int(user["id"]), limit=200)
 
     jobs_rows = ""
     for d in deliveries:
@@ -114,7 +114,7 @@ def my_alerts(request: Request):
           <td>{d.get('type') or ''}</td>
           <td>{d.get('duration') or ''}</td>
           <td>{d.get('pay') or ''}</td>
-          <td>{d.get('first_seen_at') or ''}</td>
+          <td>{format_dt(d.get('first_seen_at'))}</td>
           <td><a href="{url}" target="_blank">View</a></td>
         </tr>
         """
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Form, Request
+from fastapi import APIRouter, BackgroundTasks, Form, Request
 from fastapi.responses import HTMLResponse, RedirectResponse, Response
 import re
 import os
@@ -21,8 +21,9 @@ try:
 except ImportError:
     password_policy = None
 
+from app.alert_backfill import backfill_subscription
 from app.area_groups import AREA_GROUPS
-from app.auth_utils import get_current_user, set_session_cookie
+from app.auth_utils import get_current_user, get_current_user_async, set_session_cookie
 from app.layout import render_page
 from app.security import (
     attach_csrf_cookie,
@@ -33,11 +34,15 @@ from app.security import (
 from app.email_utils import send_text_email
 from core.database import (
     add_subscription,
+    amount_to_minor,
     create_session,
     create_user,
     create_email_verification_token,
-    get_locations,
-    get_stats,
+    get_locations_async,
+    get_cached_stats,
+    async_pool_stats,
+    pool_stats,
+    read_pool_stats,
     get_user_by_email,
     verify_password,
     reactivate_user,
@@ -82,10 +87,10 @@ def _is_valid_password(pw: str) -> bool:
 
 
 @router.get("/", response_class=HTMLResponse)
-def index(request: Request):
-    user, _ = get_current_user(request)
+async def index(request: Request):
+    user, _ = await get_current_user_async(request)
 
-    locations = get_locations()
+    locations = await get_locations_async()
     options = []
 
     for label, towns in AREA_GROUPS.items():
@@ -137,7 +142,7 @@ def index(request: Request):
           if (!form) return;
           form.setAttribute("novalidate", "novalidate");
 
-          var fieldNames = ["email", "preferred_location1", "preferred_location2", "preferred_location3", "job_type"];
+          var fieldNames = ["email", "preferred_location1", "preferred_location2", "preferred_location3", "radius_miles", "min_pay", "job_type"];
           var emailRe = /^[^\\s@]+@[^\\s@]+\\.[^\\s@]+$/;
           var pwRe = /^(?=.*[A-Za-z])(?=.*\\d)[^\\s]{8,25}$/;
 
@@ -328,6 +333,21 @@ def index(request: Request):
             {options_html}
           </datalist>
 
+          <label>
+            Also include sites within (optional)
+            <select name="radius_miles">
+              <option value="">Named locations only</option>
+              <option value="10">10 miles</option>
+              <option value="25">25 miles</option>
+              <option value="50">50 miles</option>
+            </select>
+          </label>
+
+          <label>
+            Minimum hourly pay (optional)
+            <input name="min_pay" inputmode="decimal" placeholder="e.g. 14.50" maxlength="8" />
+          </label>
+
           <label>
             Job type / duration
             <select name="job_type">
@@ -425,6 +445,7 @@ def _is_valid_password(pw: str) -> bool:
 
 @router.post("/subscribe")
 def subscribe(
+    background_tasks: BackgroundTasks,
     email: str = Form(..., max_length=50),
     password: str = Form(..., max_length=25),
     password2: str = Form(..., max_length=25),
@@ -432,6 +453,8 @@ def subscribe(
     preferred_location2: str = Form("", max_length=50),
     preferred_location3: str = Form("", max_length=50),
     job_type: str = Form("Any", max_length=30),
+    radius_miles: str = Form("", max_length=4),
+    min_pay: str = Form("", max_length=8),
     csrf_token: str = Form("", max_length=128),
     request: Request = None,
 ):
@@ -550,10 +573,20 @@ def subscribe(
             )
     locs = [l for l in locs if l]
     combined_locations = "; ".join(locs)
+    radius = int(radius_miles) if radius_miles.strip().isdigit() else None
+    min_pay_minor = amount_to_minor(min_pay)
 
     if not verified:
         # Create an inactive subscription until email is verified
-        add_subscription(email, combined_locations, job_type, active=0, user_id=user_id)
+        add_subscription(
+            email,
+            combined_locations,
+            job_type,
+            active=0,
+            user_id=user_id,
+            radius_miles=radius,
+            min_pay_minor=min_pay_minor,
+        )
 
         token = create_email_verification_token(user_id)
         link = _build_public_url(request, f"/verify-email?token={token}")
@@ -581,7 +614,16 @@ def subscribe(
         return resp
 
     # Verified users can create active alerts and log in immediately
-    add_subscription(email, combined_locations, job_type, active=1, user_id=user_id)
+    sub_id = add_subscription(
+        email,
+        combined_locations,
+        job_type,
+        active=1,
+        user_id=user_id,
+        radius_miles=radius,
+        min_pay_minor=min_pay_minor,
+    )
+    background_tasks.add_task(backfill_subscription, sub_id)
 
     session_token = create_session(user_id)
 
@@ -596,10 +638,13 @@ def health():
     Basic health check for the app.
     """
     try:
-        stats = get_stats()
+        stats = get_cached_stats()
         return {
             "status": "ok",
             "stats": stats,
+            "db_pool": pool_stats(),
+            "db_async_pool": async_pool_stats(),
+            "db_read_pool": read_pool_stats(),
         }
     except Exception as e:
         return {
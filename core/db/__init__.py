@@ -1,11 +1,28 @@
 """
 Convenience re-exports for database helpers.
 """
-from core.db.base import get_conn
+from core.db.base import (
+    async_connection,
+    async_pool_stats,
+    async_read_connection,
+    close_async_pool,
+    close_pool,
+    connection,
+    get_conn,
+    get_read_conn,
+    open_async_pool,
+    pool_stats,
+    read_pool_stats,
+    reads_on_primary,
+    reads_use_replica,
+)
+from core.db.migrations import applied_versions, check_hot_query_plans, run_migrations
+from core.db.statements import reset_statement_stats, statement_stats
 from core.db.schema import (
     DEFAULT_LOCATIONS,
     init_db,
     seed_default_locations,
+    seed_area_groups,
     ensure_admin_from_env,
     backfill_users_from_subscriptions,
 )
@@ -14,7 +31,9 @@ from core.db.users import (
     verify_password,
     create_user,
     get_user_by_email,
+    get_user_by_email_async,
     get_user_by_id,
+    get_user_by_id_async,
     update_user_password,
     deactivate_user,
     reactivate_user,
@@ -23,9 +42,14 @@ from core.db.users import (
     get_password_reset_token,
     mark_reset_token_used,
     create_session,
+    create_session_async,
     delete_session,
+    delete_session_async,
     get_session,
+    get_session_async,
     touch_session,
+    touch_session_async,
+    purge_expired_sessions,
     create_email_verification_token,
     get_email_verification_token,
     mark_email_verification_token_used,
@@ -33,40 +57,120 @@ from core.db.users import (
     get_deleted_users,
 )
 from core.db.subscriptions import (
+    MAX_RADIUS_MILES,
     add_subscription,
     activate_latest_inactive_subscription,
     get_active_subscriptions,
     get_subscriptions_for_email,
+    get_subscriptions_for_email_async,
     deactivate_subscription,
     update_subscription_for_user,
+    backfill_subscription_kinds,
+    backfill_subscription_regions,
     get_deleted_subscriptions,
+    subscription_token_rows,
+    store_subscription_tokens,
+    backfill_subscription_tokens,
 )
 from core.db.alerts import (
     create_alert_deliveries,
+    create_alert_deliveries_bulk,
     mark_alert_deliveries_sent,
+    mark_alert_deliveries_sent_bulk,
     mark_alert_deliveries_failed,
+    mark_alert_deliveries_failed_bulk,
     get_alert_deliveries_for_user,
+    get_alert_deliveries_for_user_async,
+    get_delivery_pairs_since,
     delete_alert_deliveries_for_user,
+    match_jobs_to_deliveries,
+    backfill_subscription_deliveries,
 )
 from core.db.jobs import (
     get_locations,
+    get_locations_async,
     get_all_jobs,
     get_new_jobs,
+    upsert_jobs,
+    close_stale_jobs,
+    backfill_job_kinds,
+    backfill_job_pay,
+    backfill_job_regions,
     get_stats,
+    get_stats_async,
+    STATS_CACHE_SECONDS,
+    estimate_stats,
+    get_cached_stats,
+    get_cached_stats_async,
+    clear_stats_cache,
+    normalize_field,
+    job_content_hash,
+    job_detail_hash,
+    backfill_job_identity,
+    ANY_KIND,
+    UNKNOWN_KIND,
+    job_kind_mask,
+    preference_kind_mask,
+    kind_of_job,
+    kind_of_subscription,
+    kind_matches,
+    kind_labels,
+    amount_to_minor,
+    parse_pay,
+    pay_of_job,
+    pay_matches,
+    min_pay_floor,
+    format_minor,
+    clear_location_cache,
+    REGION_UK,
+    REGION_US,
+    REGION_ALL,
+    US_AREA_GROUPS,
+    location_region,
+    preference_region,
+    resolve_location,
+    locations_within,
+    radius_tokens,
+    resolve_preference,
+    preference_is_empty,
+    preference_matches_location,
+    backfill_job_locations,
+    get_area_groups,
+    get_job_location_stats,
 )
 
 __all__ = [
     "get_conn",
+    "connection",
+    "pool_stats",
+    "close_pool",
+    "get_read_conn",
+    "read_pool_stats",
+    "reads_on_primary",
+    "reads_use_replica",
+    "async_connection",
+    "async_read_connection",
+    "async_pool_stats",
+    "open_async_pool",
+    "close_async_pool",
+    "statement_stats",
+    "reset_statement_stats",
+    "run_migrations",
+    "applied_versions",
+    "check_hot_query_plans",
     "DEFAULT_LOCATIONS",
     "init_db",
     "seed_default_locations",
+    "seed_area_groups",
     "ensure_admin_from_env",
     "backfill_users_from_subscriptions",
     "hash_password",
     "verify_password",
     "create_user",
     "get_user_by_email",
+    "get_user_by_email_async",
     "get_user_by_id",
+    "get_user_by_id_async",
     "update_user_password",
     "deactivate_user",
     "reactivate_user",
@@ -75,28 +179,93 @@ __all__ = [
     "get_password_reset_token",
     "mark_reset_token_used",
     "create_session",
+    "create_session_async",
     "delete_session",
+    "delete_session_async",
     "get_session",
+    "get_session_async",
     "touch_session",
+    "touch_session_async",
+    "purge_expired_sessions",
     "create_email_verification_token",
     "get_email_verification_token",
     "mark_email_verification_token_used",
     "mark_user_email_verified",
     "get_deleted_users",
+    "MAX_RADIUS_MILES",
     "add_subscription",
     "activate_latest_inactive_subscription",
     "get_active_subscriptions",
     "get_subscriptions_for_email",
+    "get_subscriptions_for_email_async",
     "deactivate_subscription",
     "update_subscription_for_user",
+    "backfill_subscription_kinds",
+    "backfill_subscription_regions",
     "get_deleted_subscriptions",
+    "subscription_token_rows",
+    "store_subscription_tokens",
+    "backfill_subscription_tokens",
     "create_alert_deliveries",
+    "create_alert_deliveries_bulk",
     "mark_alert_deliveries_sent",
+    "mark_alert_deliveries_sent_bulk",
     "mark_alert_deliveries_failed",
+    "mark_alert_deliveries_failed_bulk",
     "get_alert_deliveries_for_user",
+    "get_alert_deliveries_for_user_async",
+    "get_delivery_pairs_since",
     "delete_alert_deliveries_for_user",
+    "match_jobs_to_deliveries",
+    "backfill_subscription_deliveries",
     "get_locations",
+    "get_locations_async",
     "get_all_jobs",
     "get_new_jobs",
+    "upsert_jobs",
+    "close_stale_jobs",
+    "backfill_job_kinds",
+    "backfill_job_pay",
+    "backfill_job_regions",
     "get_stats",
+    "get_stats_async",
+    "STATS_CACHE_SECONDS",
+    "estimate_stats",
+    "get_cached_stats",
+    "get_cached_stats_async",
+    "clear_stats_cache",
+    "normalize_field",
+    "job_content_hash",
+    "job_detail_hash",
+    "backfill_job_identity",
+    "ANY_KIND",
+    "UNKNOWN_KIND",
+    "job_kind_mask",
+    "preference_kind_mask",
+    "kind_of_job",
+    "kind_of_subscription",
+    "kind_matches",
+    "kind_labels",
+    "amount_to_minor",
+    "parse_pay",
+    "pay_of_job",
+    "pay_matches",
+    "min_pay_floor",
+    "format_minor",
+    "clear_location_cache",
+    "REGION_UK",
+    "REGION_US",
+    "REGION_ALL",
+    "US_AREA_GROUPS",
+    "location_region",
+    "preference_region",
+    "resolve_location",
+    "locations_within",
+    "radius_tokens",
+    "resolve_preference",
+    "preference_is_empty",
+    "preference_matches_location",
+    "backfill_job_locations",
+    "get_area_groups",
+    "get_job_location_stats",
 ]
@@ -8,17 +8,33 @@ so that:
 """
 from core.db.alerts.deliveries_store import (
     create_alert_deliveries,
+    create_alert_deliveries_bulk,
     mark_alert_deliveries_sent,
+    mark_alert_deliveries_sent_bulk,
     mark_alert_deliveries_failed,
+    mark_alert_deliveries_failed_bulk,
     get_alert_deliveries_for_user,
+    get_alert_deliveries_for_user_async,
+    get_delivery_pairs_since,
     delete_alert_deliveries_for_user,
 )
+from core.db.alerts.matching_store import (
+    match_jobs_to_deliveries,
+    backfill_subscription_deliveries,
+)
 
 __all__ = [
     "create_alert_deliveries",
+    "create_alert_deliveries_bulk",
     "mark_alert_deliveries_sent",
+    "mark_alert_deliveries_sent_bulk",
     "mark_alert_deliveries_failed",
+    "mark_alert_deliveries_failed_bulk",
     "get_alert_deliveries_for_user",
+    "get_alert_deliveries_for_user_async",
+    "get_delivery_pairs_since",
     "delete_alert_deliveries_for_user",
+    "match_jobs_to_deliveries",
+    "backfill_subscription_deliveries",
 ]
 
@@ -5,10 +5,58 @@ This records which jobs were matched for a specific subscription/user, and wheth
 """
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Dict, Iterable, List
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Tuple
 
-from core.db.base import get_conn
+from core.db.base import _ConnWrapper, async_read_connection, connection, get_conn, get_read_conn
+from core.db.statements import register
+
+
+SubJobIds = Dict[int, List[int]]
+
+
+def _pairs(sub_to_job_ids: SubJobIds) -> Tuple[List[int], List[int]]:
+    """Parallel (subscription_ids, job_ids) arrays for unnest()."""
+    sub_ids: List[int] = []
+    job_ids: List[int] = []
+    for sub_id, ids in sub_to_job_ids.items():
+        for job_id in ids:
+            if job_id is not None:
+                sub_ids.append(int(sub_id))
+                job_ids.append(int(job_id))
+    return sub_ids, job_ids
+
+
+def create_alert_deliveries_bulk(
+    rows: Iterable[Tuple[int, int, int]], conn: _ConnWrapper | None = None
+) -> List[Tuple[int, int]]:
+    """
+    Queue deliveries for (user_id, subscription_id, job_id) rows in one statement.
+    Rows that already exist are skipped. Returns the (subscription_id, job_id) pairs
+    that were newly inserted, in input order. With conn, the insert runs on it and the
+    caller commits.
+    """
+    rows = [(int(u), int(s), int(j)) for u, s, j in rows if j is not None]
+    if not rows:
+        return []
+    user_ids, sub_ids, job_ids = (list(col) for col in zip(*rows))
+
+    now = datetime.now(timezone.utc)
+    with connection(conn) as conn:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            INSERT INTO alert_deliveries
+              (user_id, subscription_id, job_id, status, created_at, sent_at, error)
+            SELECT u, s, j, 'queued', ?, NULL, NULL
+            FROM unnest(?::int[], ?::int[], ?::int[]) AS t(u, s, j)
+            ON CONFLICT (subscription_id, job_id) DO NOTHING
+            RETURNING subscription_id, job_id
+            """,
+            (now, user_ids, sub_ids, job_ids),
+        )
+        inserted = {(int(r["subscription_id"]), int(r["job_id"])) for r in cur.fetchall()}
+    return [(s, j) for _u, s, j in rows if (s, j) in inserted]
 
 
 def create_alert_deliveries(
@@ -20,117 +68,98 @@ def create_alert_deliveries(
     """
     Insert delivery rows for (subscription_id, job_id) if missing.
 
-    Returns the list of job_ids that were newly inserted (best-effort).
+    Returns the list of job_ids that were newly inserted.
     """
-    job_ids_list = [int(j) for j in job_ids if j is not None]
-    if not job_ids_list:
-        return []
-
-    now = datetime.utcnow().isoformat(timespec="seconds")
-    inserted: List[int] = []
-
-    conn = get_conn()
-    cur = conn.cursor()
-    for job_id in job_ids_list:
-        try:
-            cur.execute(
-                """
-                INSERT INTO alert_deliveries
-                  (user_id, subscription_id, job_id, status, created_at, sent_at, error)
-                VALUES (?, ?, ?, 'queued', ?, NULL, NULL)
-                ON CONFLICT (subscription_id, job_id) DO NOTHING
-                """,
-                (user_id, subscription_id, job_id, now),
-            )
-            if cur.rowcount:
-                inserted.append(job_id)
-        except Exception:
-            continue
-
-    conn.commit()
-    conn.close()
-    return inserted
+    rows = [(user_id, subscription_id, j) for j in job_ids]
+    return [job_id for _sub_id, job_id in create_alert_deliveries_bulk(rows)]
 
 
-def mark_alert_deliveries_sent(*, subscription_id: int, job_ids: Iterable[int]) -> None:
-    job_ids_list = [int(j) for j in job_ids if j is not None]
-    if not job_ids_list:
+def mark_alert_deliveries_sent_bulk(sub_to_job_ids: SubJobIds, conn: _ConnWrapper | None = None) -> None:
+    """
+    Mark every (subscription_id, job_id) delivery in the mapping as sent, in one UPDATE.
+    With conn, the update runs on it and the caller commits.
+    """
+    sub_ids, job_ids = _pairs(sub_to_job_ids)
+    if not job_ids:
         return
 
-    now = datetime.utcnow().isoformat(timespec="seconds")
-    conn = get_conn()
-    cur = conn.cursor()
-
-    for job_id in job_ids_list:
-        cur.execute(
+    now = datetime.now(timezone.utc)
+    with connection(conn) as conn:
+        conn.cursor().execute(
             """
-            UPDATE alert_deliveries
+            UPDATE alert_deliveries ad
             SET status='sent', sent_at=?, error=NULL
-            WHERE subscription_id=? AND job_id=?
+            FROM unnest(?::int[], ?::int[]) AS t(subscription_id, job_id)
+            WHERE ad.subscription_id = t.subscription_id AND ad.job_id = t.job_id
             """,
-            (now, subscription_id, job_id),
+            (now, sub_ids, job_ids),
         )
 
-    conn.commit()
-    conn.close()
-
 
-def mark_alert_deliveries_failed(*, subscription_id: int, job_ids: Iterable[int], error: str) -> None:
-    job_ids_list = [int(j) for j in job_ids if j is not None]
-    if not job_ids_list:
+def mark_alert_deliveries_failed_bulk(
+    sub_to_job_ids: SubJobIds, error: str, conn: _ConnWrapper | None = None
+) -> None:
+    """
+    Mark every (subscription_id, job_id) delivery in the mapping as failed, in one UPDATE.
+    With conn, the update runs on it and the caller commits.
+    """
+    sub_ids, job_ids = _pairs(sub_to_job_ids)
+    if not job_ids:
         return
 
-    now = datetime.utcnow().isoformat(timespec="seconds")
-    conn = get_conn()
-    cur = conn.cursor()
-
-    for job_id in job_ids_list:
-        cur.execute(
+    with connection(conn) as conn:
+        conn.cursor().execute(
             """
-            UPDATE alert_deliveries
-            SET status='failed', sent_at=NULL, error=?, created_at=created_at
-            WHERE subscription_id=? AND job_id=?
+            UPDATE alert_deliveries ad
+            SET status='failed', sent_at=NULL, error=?
+            FROM unnest(?::int[], ?::int[]) AS t(subscription_id, job_id)
+            WHERE ad.subscription_id = t.subscription_id AND ad.job_id = t.job_id
             """,
-            (f"{error}".strip()[:500], subscription_id, job_id),
+            (f"{error}".strip()[:500], sub_ids, job_ids),
         )
 
-    conn.commit()
-    conn.close()
+
+def mark_alert_deliveries_sent(*, subscription_id: int, job_ids: Iterable[int]) -> None:
+    mark_alert_deliveries_sent_bulk({subscription_id: list(job_ids)})
+
+
+def mark_alert_deliveries_failed(*, subscription_id: int, job_ids: Iterable[int], error: str) -> None:
+    mark_alert_deliveries_failed_bulk({subscription_id: list(job_ids)}, error)
+
+
+_DELIVERIES_FOR_USER = register("deliveries.for_user", """
+    SELECT
+      ad.id AS delivery_id,
+      ad.subscription_id,
+      ad.status,
+      ad.created_at AS delivery_created_at,
+      ad.sent_at,
+      ad.error,
+      j.id AS job_id,
+      j.title,
+      j.location,
+      j.type,
+      j.duration,
+      j.pay,
+      j.url,
+      j.first_seen_at
+    FROM alert_deliveries ad
+    JOIN jobs j ON j.id = ad.job_id
+    WHERE ad.user_id = ?
+    ORDER BY ad.created_at DESC, ad.id DESC
+    LIMIT ?
+""")
 
 
 def get_alert_deliveries_for_user(*, user_id: int, limit: int = 200) -> List[Dict]:
     """
     Return delivery history joined with job fields, newest first.
     """
-    conn = get_conn()
+    conn = get_read_conn()
     cur = conn.cursor()
 
     try:
-        cur.execute(
-            """
-            SELECT
-              ad.id AS delivery_id,
-              ad.subscription_id,
-              ad.status,
-              ad.created_at AS delivery_created_at,
-              ad.sent_at,
-              ad.error,
-              j.id AS job_id,
-              j.title,
-              j.location,
-              j.type,
-              j.duration,
-              j.pay,
-              j.url,
-              j.first_seen_at
-            FROM alert_deliveries ad
-            JOIN jobs j ON j.id = ad.job_id
-            WHERE ad.user_id = ?
-            ORDER BY ad.created_at DESC, ad.id DESC
-            LIMIT ?
-            """,
-            (user_id, int(limit)),
-        )
+        cur.execute(_DELIVERIES_FOR_USER, (user_id, int(limit)))
     except Exception:
         conn.close()
         return []
@@ -140,6 +169,46 @@ def get_alert_deliveries_for_user(*, user_id: int, limit: int = 200) -> List[Dic
     return [dict(r) for r in rows]
 
 
+async def get_alert_deliveries_for_user_async(*, user_id: int, limit: int = 200) -> List[Dict]:
+    try:
+        async with async_read_connection() as conn:
+            cur = await conn.cursor().execute(_DELIVERIES_FOR_USER, (user_id, int(limit)))
+            rows = await cur.fetchall()
+    except Exception:
+        return []
+    return [dict(r) for r in rows]
+
+
+def get_delivery_pairs_since(
+    after_id: int = 0, since: datetime | None = None
+) -> Tuple[List[Tuple[int, int, datetime]], int]:
+    """
+    Return ((subscription_id, job_id, job first_seen_at) for deliveries with id > after_id,
+    current max id). since keeps only jobs first seen at or after it (the worker's window).
+    A max id below after_id means the table was emptied or its ids restarted.
+    """
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT coalesce(max(id), 0) AS max_id FROM alert_deliveries")
+    max_id = int(cur.fetchone()["max_id"])
+    rows: List[Tuple[int, int, datetime]] = []
+    if max_id > after_id:
+        sql = """
+            SELECT ad.subscription_id, ad.job_id, j.first_seen_at
+            FROM alert_deliveries ad
+            JOIN jobs j ON j.id = ad.job_id
+            WHERE ad.id > ? AND ad.id <= ?
+        """
+        params: List = [int(after_id), max_id]
+        if since is not None:
+            sql += " AND j.first_seen_at >= ?"
+            params.append(since)
+        cur.execute(sql, params)
+        rows = [(int(r["subscription_id"]), int(r["job_id"]), r["first_seen_at"]) for r in cur]
+    conn.close()
+    return rows, max_id
+
+
 def delete_alert_deliveries_for_user(user_id: int) -> None:
     conn = get_conn()
     cur = conn.cursor()
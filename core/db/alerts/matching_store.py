@@ -0,0 +1,194 @@
+"""
+Set-based job x subscription matching inside Postgres.
+
+match_jobs_to_deliveries() takes the candidate job ids for a cycle and, in one
+statement:
+  1. finds matching active subscriptions through subscription_tokens joined with
+     job_locations (integer ids), free-text tokens and "Any" rows,
+  2. applies the job kind bitmask and minimum pay,
+  3. keeps the worker's region, one subscription per (email, job) and requires an
+     active user row for the email,
+  4. inserts the pairs into alert_deliveries (ON CONFLICT DO NOTHING),
+and returns only the newly queued rows joined with the job fields to email.
+
+Semantics follow the workers' job_matches_subscription; the only difference between
+regions is whether a subscription that names no location matches every job (UK) or
+none (US).
+
+backfill_subscription_deliveries() runs the same statement for a single subscription
+over the open jobs first seen within the workers' catch-up window, so new and edited
+alerts get recent matching jobs without waiting for a worker cycle.
+"""
+from __future__ import annotations
+
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+from core.db.base import get_conn
+from core.db.jobs.location_index import REGION_ALL, REGION_UK, REGION_US
+
+# Whether a subscription naming no location matches every job, per region's worker.
+EMPTY_PREF_MATCHES_ALL = {REGION_UK: True, REGION_US: False}
+
+# Same window the workers re-match each cycle (CATCH_UP_WINDOW_HOURS); older jobs are not backfilled.
+BACKFILL_WINDOW_HOURS = float(os.getenv("CATCH_UP_WINDOW_HOURS", "24"))
+
+_MATCH_SQL = """
+WITH cand AS (
+    SELECT id, location, kind_mask, pay_minor
+    FROM jobs
+    WHERE id = ANY(?) AND closed_at IS NULL
+),
+token_hits AS (
+    SELECT st.subscription_id, jl.job_id
+    FROM job_locations jl
+    JOIN subscription_tokens st ON st.location_id = jl.location_id
+    WHERE jl.job_id = ANY(?)
+    UNION
+    SELECT st.subscription_id, jl.job_id
+    FROM job_locations jl
+    JOIN subscription_tokens st ON st.area_group_id = jl.area_group_id
+    WHERE jl.job_id = ANY(?)
+    UNION
+    SELECT st.subscription_id, c.id
+    FROM cand c
+    JOIN subscription_tokens st
+      ON st.match_all = 1
+      OR (st.token IS NOT NULL AND strpos(lower(coalesce(c.location, '')), st.token) > 0)
+    UNION
+    SELECT s.id, c.id
+    FROM cand c
+    CROSS JOIN subscriptions s
+    WHERE ? AND s.active = 1
+      AND NOT EXISTS (SELECT 1 FROM subscription_tokens st WHERE st.subscription_id = s.id)
+),
+matched AS (
+    SELECT DISTINCT ON (lower(s.email), c.id)
+        u.id AS user_id, s.id AS subscription_id, c.id AS job_id
+    FROM token_hits h
+    JOIN subscriptions s ON s.id = h.subscription_id AND s.active = 1
+    JOIN cand c ON c.id = h.job_id
+    -- the email's account must exist and be active, like the workers' account_active check
+    JOIN users u ON u.email = lower(s.email) AND u.active = 1
+    WHERE (?::text IS NULL OR coalesce(s.region, 'all') IN ('all', ?::text))
+      AND (?::int[] IS NULL OR s.id = ANY(?::int[]))
+      -- a job already sent to this email through another of its subscriptions
+      AND NOT EXISTS (
+          SELECT 1
+          FROM alert_deliveries d
+          JOIN subscriptions ds ON ds.id = d.subscription_id
+          WHERE d.job_id = c.id AND lower(ds.email) = lower(s.email)
+      )
+      AND (coalesce(s.job_kind_mask, 0) = 0 OR (coalesce(c.kind_mask, 0) & s.job_kind_mask) <> 0)
+      AND (s.min_pay_minor IS NULL OR c.pay_minor IS NULL OR c.pay_minor >= s.min_pay_minor)
+    ORDER BY lower(s.email), c.id, s.id
+),
+ins AS (
+    INSERT INTO alert_deliveries (user_id, subscription_id, job_id, status, created_at, sent_at, error)
+    SELECT user_id, subscription_id, job_id, 'queued', ?, NULL, NULL
+    FROM matched
+    ON CONFLICT (subscription_id, job_id) DO NOTHING
+    RETURNING user_id, subscription_id, job_id
+)
+SELECT
+    ins.user_id,
+    ins.subscription_id,
+    lower(s.email) AS email,
+    j.id,
+    j.title,
+    j.type,
+    j.duration,
+    j.pay,
+    j.location,
+    j.url,
+    j.first_seen_at
+FROM ins
+JOIN subscriptions s ON s.id = ins.subscription_id
+JOIN jobs j ON j.id = ins.job_id
+ORDER BY lower(s.email), j.id
+"""
+
+
+def match_jobs_to_deliveries(
+    job_ids: Iterable[int],
+    *,
+    empty_pref_matches_all: bool,
+    region: Optional[str] = None,
+    subscription_ids: Optional[Iterable[int]] = None,
+) -> List[Dict]:
+    """
+    Match jobs against all active subscriptions in SQL and queue alert_deliveries.
+    With region, only subscriptions in that region (or REGION_ALL) are considered;
+    with subscription_ids, only those subscriptions.
+
+    Returns one dict per newly queued delivery: user_id, subscription_id, email and
+    the job fields (id, title, type, duration, pay, location, url, first_seen_at).
+    Pairs already delivered (or queued) before are not returned.
+    """
+    ids = sorted({int(j) for j in job_ids if j is not None})
+    if not ids:
+        return []
+
+    sub_ids = None if subscription_ids is None else [int(s) for s in subscription_ids]
+    now = datetime.now(timezone.utc)
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute(
+        _MATCH_SQL,
+        (ids, ids, ids, bool(empty_pref_matches_all), region, region, sub_ids, sub_ids, now),
+    )
+    rows = [dict(r) for r in cur.fetchall()]
+    conn.commit()
+    conn.close()
+    return rows
+
+
+def backfill_subscription_deliveries(
+    subscription_id: int, window_hours: float = BACKFILL_WINDOW_HOURS
+) -> List[Dict]:
+    """
+    Match the open jobs first seen within window_hours against one (new, edited or just
+    activated) subscription and queue the deliveries, in the subscription's region(s)
+    with that region's worker semantics for empty preferences. Returns rows like
+    match_jobs_to_deliveries.
+    """
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT region FROM subscriptions WHERE id = ? AND active = 1", (int(subscription_id),))
+    sub = cur.fetchone()
+    if not sub:
+        conn.close()
+        return []
+    region = sub["region"] or REGION_ALL
+    regions = [r for r in (REGION_UK, REGION_US) if region in (REGION_ALL, r)]
+    since = datetime.now(timezone.utc) - timedelta(hours=window_hours)
+    job_ids: Dict[str, List[int]] = {}
+    for r in regions:
+        # Served by idx_jobs_open_region_first_seen.
+        cur.execute(
+            "SELECT id FROM jobs WHERE region = ? AND closed_at IS NULL AND first_seen_at >= ?",
+            (r, since),
+        )
+        job_ids[r] = [row["id"] for row in cur.fetchall()]
+    conn.close()
+
+    rows: List[Dict] = []
+    for r in regions:
+        rows.extend(
+            match_jobs_to_deliveries(
+                job_ids[r],
+                empty_pref_matches_all=EMPTY_PREF_MATCHES_ALL[r],
+                region=r,
+                subscription_ids=[subscription_id],
+            )
+        )
+    return rows
+
+
+__all__ = [
+    "BACKFILL_WINDOW_HOURS",
+    "EMPTY_PREF_MATCHES_ALL",
+    "match_jobs_to_deliveries",
+    "backfill_subscription_deliveries",
+]
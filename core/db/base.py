@@ -1,30 +1,177 @@
 """
 Low-level database helpers (Postgres-only).
+
+Connections come from a process-wide psycopg_pool.ConnectionPool that is opened on
+first use. get_conn() keeps its old contract (the caller commits and closes), but
+close() now hands the connection back to the pool, which rolls back anything left
+uncommitted. A pool inherited through fork() is never reused: the child opens its own.
+
+Pool sizing (env):
+- DB_POOL_MIN_SIZE (default 1) connections kept open.
+- DB_POOL_MAX_SIZE (default 10) upper bound; get_conn() waits for a free one beyond that.
+- DB_POOL_TIMEOUT (default 30) seconds to wait before raising psycopg_pool.PoolTimeout.
+- DB_POOL_MAX_IDLE (default 300) seconds before surplus idle connections are closed.
+Connections are health-checked when handed out, so ones dropped by the server are replaced.
+Every connection's session time zone is UTC, so timestamptz columns come back as UTC
+datetimes and timestamp literals are read as UTC whatever the server default is.
+
+Async routes use async_connection() instead, backed by an AsyncConnectionPool with the
+same settings. That pool belongs to an event loop, so the app opens it in its lifespan
+(open_async_pool / close_async_pool); when it is not open on the running loop (scripts,
+TestClient without a context), async_connection() uses a short-lived connection instead.
+
+Read replica (optional): with DATABASE_READ_URL set, read-only helpers borrow their
+connection from get_read_conn() / async_read_connection(), which use a second pool on
+the replica. Everything else, and any read inside reads_on_primary(), stays on
+DATABASE_URL; without DATABASE_READ_URL both are the primary. Replicas lag, so code that
+reads what it has just written wraps those reads in reads_on_primary().
 """
 from __future__ import annotations
 
+import asyncio
+import atexit
 import os
-from typing import Iterable
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import AsyncIterator, Dict, Iterable, Iterator
 
 try:
     import psycopg
     from psycopg.rows import dict_row
+    from psycopg_pool import AsyncConnectionPool, ConnectionPool
 except Exception as exc:  # pragma: no cover - required dependency
-    raise RuntimeError("psycopg is required for Postgres") from exc
+    raise RuntimeError("psycopg and psycopg_pool are required for Postgres") from exc
+
+from core.db.statements import PREPARE_STATEMENTS, Statement
 
 
-def _resolve_database_url() -> str:
-    url = os.getenv("DATABASE_URL")
+def _resolve_database_url(name: str = "DATABASE_URL", required: bool = True) -> str | None:
+    url = os.getenv(name)
     if not url:
-        raise RuntimeError("DATABASE_URL must be set for Postgres usage")
+        if not required:
+            return None
+        raise RuntimeError(f"{name} must be set for Postgres usage")
     if url.startswith("postgres://") or url.startswith("postgresql://"):
         return url
-    raise RuntimeError("DATABASE_URL must start with postgres:// or postgresql://")
+    raise RuntimeError(f"{name} must start with postgres:// or postgresql://")
 
 
 database_url = _resolve_database_url()
+read_database_url = _resolve_database_url("DATABASE_READ_URL", required=False)
+
+POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+POOL_MAX_SIZE = max(POOL_MIN_SIZE, int(os.getenv("DB_POOL_MAX_SIZE", "10")))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+POOL_MAX_IDLE = float(os.getenv("DB_POOL_MAX_IDLE", "300"))
+
+_pool: ConnectionPool | None = None
+_pool_pid: int | None = None
+_read_pool: ConnectionPool | None = None
+_read_pool_pid: int | None = None
+_pool_lock = threading.Lock()
+
+# Set by reads_on_primary(); copied into threads and tasks started from that context.
+_reads_on_primary: ContextVar[bool] = ContextVar("reads_on_primary", default=False)
+
+
+def _configure(conn) -> None:
+    conn.execute("SET TIME ZONE 'UTC'")
+    if not conn.autocommit:
+        conn.commit()
+
+
+async def _configure_async(conn) -> None:
+    await conn.execute("SET TIME ZONE 'UTC'")
+    if not conn.autocommit:
+        await conn.commit()
+
+
+def _connect(autocommit: bool = False):
+    """A new, unpooled psycopg connection configured like the pooled ones (caller closes it)."""
+    conn = psycopg.connect(database_url, autocommit=autocommit, row_factory=dict_row)
+    _configure(conn)
+    return conn
+
+
+def _open_pool(url: str, name: str) -> ConnectionPool:
+    return ConnectionPool(
+        url,
+        min_size=POOL_MIN_SIZE,
+        max_size=POOL_MAX_SIZE,
+        timeout=POOL_TIMEOUT,
+        max_idle=POOL_MAX_IDLE,
+        kwargs={"row_factory": dict_row},
+        configure=_configure,
+        check=ConnectionPool.check_connection,
+        name=name,
+        open=True,
+    )
+
+
+def get_pool() -> ConnectionPool:
+    """Return the process-wide pool, opening it on first use (and again after fork)."""
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is not None and _pool_pid == pid:
+        return _pool
+    with _pool_lock:
+        if _pool is None or _pool_pid != pid:
+            _pool = _open_pool(database_url, "swift_hire")
+            _pool_pid = pid
+    return _pool
+
+
+def get_read_pool() -> ConnectionPool:
+    """The replica pool (DATABASE_READ_URL), opened like get_pool(); the primary pool when unset."""
+    global _read_pool, _read_pool_pid
+    if read_database_url is None:
+        return get_pool()
+    pid = os.getpid()
+    if _read_pool is not None and _read_pool_pid == pid:
+        return _read_pool
+    with _pool_lock:
+        if _read_pool is None or _read_pool_pid != pid:
+            _read_pool = _open_pool(read_database_url, "swift_hire_read")
+            _read_pool_pid = pid
+    return _read_pool
 
 
+def close_pool() -> None:
+    """Close the pools (all idle connections); the next get_conn() opens a new one."""
+    global _pool, _pool_pid, _read_pool, _read_pool_pid
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.close()
+        if _read_pool is not None and _read_pool_pid == os.getpid():
+            _read_pool.close()
+        _pool = _read_pool = None
+        _pool_pid = _read_pool_pid = None
+
+
+atexit.register(close_pool)
+
+
+def pool_stats() -> Dict[str, int]:
+    """
+    Pool counters (psycopg_pool names): pool_min, pool_max, pool_size, pool_available,
+    requests_waiting, requests_num, connections_num, ... Empty until the pool is opened.
+    """
+    if _pool is None or _pool_pid != os.getpid():
+        return {}
+    return dict(_pool.get_stats())
+
+
+def read_pool_stats() -> Dict[str, int]:
+    """pool_stats() of the replica pool; empty without DATABASE_READ_URL or before first use."""
+    if _read_pool is None or _read_pool_pid != os.getpid():
+        return {}
+    return dict(_read_pool.get_stats())
+
+
+@lru_cache(maxsize=1024)
 def _convert_qmarks(sql: str) -> str:
     if "?" not in sql:
         return sql
@@ -36,7 +183,12 @@ class _CursorWrapper:
         self._cursor = cursor
         self._dialect = dialect
 
-    def execute(self, sql: str, params: Iterable | None = None):
+    def execute(self, sql: str | Statement, params: Iterable | None = None):
+        if isinstance(sql, Statement):
+            started = time.perf_counter()
+            result = self._cursor.execute(sql.sql, params, prepare=PREPARE_STATEMENTS or None)
+            sql.record(started)
+            return result
         if self._dialect == "postgres":
             sql = _convert_qmarks(sql)
         if params is None:
@@ -67,8 +219,9 @@ class _CursorWrapper:
 
 
 class _ConnWrapper:
-    def __init__(self, conn, dialect: str):
+    def __init__(self, conn, dialect: str, pool: ConnectionPool | None = None):
         self._conn = conn
+        self._pool = pool
         self.dialect = dialect
 
     def cursor(self):
@@ -77,13 +230,214 @@ class _ConnWrapper:
     def commit(self):
         return self._conn.commit()
 
+    def rollback(self):
+        return self._conn.rollback()
+
     def close(self):
-        return self._conn.close()
+        """Return the connection to the pool (or close it when unpooled). Safe to call twice."""
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return None
+        if self._pool is not None:
+            if conn.info.transaction_status == psycopg.pq.TransactionStatus.INTRANS:
+                # Read-only helpers close without committing; end that transaction quietly.
+                conn.rollback()
+            return self._pool.putconn(conn)
+        return conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __del__(self):
+        # Helpers that raise before close() would otherwise leak a pool slot.
+        if getattr(self, "_conn", None) is not None:
+            try:
+                self.close()
+            except Exception:
+                pass
 
 
 def get_conn():
     """
-    Return a Postgres DB connection (DATABASE_URL required).
+    Return a pooled Postgres DB connection (DATABASE_URL required).
+    The caller commits and must close() it, which returns it to the pool.
+    """
+    pool = get_pool()
+    return _ConnWrapper(pool.getconn(), "postgres", pool)
+
+
+@contextmanager
+def connection(existing: _ConnWrapper | None = None) -> Iterator[_ConnWrapper]:
+    """
+    Borrow a pooled connection for a block: commits on success, rolls back on error,
+    and always returns it to the pool.
+    With existing, the block runs on that connection and leaves commit/close to its owner.
+    """
+    if existing is not None:
+        yield existing
+        return
+    conn = get_conn()
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+@contextmanager
+def reads_on_primary() -> Iterator[None]:
+    """Send get_read_conn() / async_read_connection() to the primary for this block."""
+    token = _reads_on_primary.set(True)
+    try:
+        yield
+    finally:
+        _reads_on_primary.reset(token)
+
+
+def reads_use_replica() -> bool:
+    """True when a read helper called here would use the replica."""
+    return read_database_url is not None and not _reads_on_primary.get()
+
+
+def get_read_conn():
+    """
+    get_conn() for read-only helpers: a replica connection when reads_use_replica(),
+    otherwise the primary. Never write through it.
+    """
+    if not reads_use_replica():
+        return get_conn()
+    pool = get_read_pool()
+    return _ConnWrapper(pool.getconn(), "postgres", pool)
+
+
+# --- Async connections ---
+
+_async_pool: AsyncConnectionPool | None = None
+_async_read_pool: AsyncConnectionPool | None = None
+_async_pool_loop: asyncio.AbstractEventLoop | None = None
+
+
+async def _open_async_pool(url: str, name: str) -> AsyncConnectionPool:
+    pool = AsyncConnectionPool(
+        url,
+        min_size=POOL_MIN_SIZE,
+        max_size=POOL_MAX_SIZE,
+        timeout=POOL_TIMEOUT,
+        max_idle=POOL_MAX_IDLE,
+        kwargs={"row_factory": dict_row},
+        configure=_configure_async,
+        check=AsyncConnectionPool.check_connection,
+        name=name,
+        open=False,
+    )
+    await pool.open()
+    return pool
+
+
+async def open_async_pool() -> AsyncConnectionPool:
+    """Open the async pool (and the replica one, if configured) on the running event loop (idempotent)."""
+    global _async_pool, _async_read_pool, _async_pool_loop
+    loop = asyncio.get_running_loop()
+    if _async_pool is not None and _async_pool_loop is loop:
+        return _async_pool
+    pool = await _open_async_pool(database_url, "swift_hire_async")
+    read_pool = None
+    if read_database_url is not None:
+        read_pool = await _open_async_pool(read_database_url, "swift_hire_async_read")
+    _async_pool, _async_read_pool, _async_pool_loop = pool, read_pool, loop
+    return pool
+
+
+async def close_async_pool() -> None:
+    global _async_pool, _async_read_pool, _async_pool_loop
+    pools = (_async_pool, _async_read_pool)
+    _async_pool, _async_read_pool, _async_pool_loop = None, None, None
+    for pool in pools:
+        if pool is not None:
+            await pool.close()
+
+
+def async_pool_stats() -> Dict[str, int]:
+    """Same counters as pool_stats() for the async pool; empty when it is not open."""
+    if _async_pool is None:
+        return {}
+    return dict(_async_pool.get_stats())
+
+
+class _AsyncCursorWrapper:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    async def execute(self, sql: str | Statement, params: Iterable | None = None):
+        if isinstance(sql, Statement):
+            started = time.perf_counter()
+            await self._cursor.execute(sql.sql, params, prepare=PREPARE_STATEMENTS or None)
+            sql.record(started)
+            return self
+        await self._cursor.execute(_convert_qmarks(sql), params)
+        return self
+
+    async def fetchone(self):
+        return await self._cursor.fetchone()
+
+    async def fetchall(self):
+        return await self._cursor.fetchall()
+
+    @property
+    def rowcount(self):
+        return getattr(self._cursor, "rowcount", 0)
+
+
+class _AsyncConnWrapper:
+    def __init__(self, conn):
+        self._conn = conn
+        self.dialect = "postgres"
+
+    def cursor(self):
+        return _AsyncCursorWrapper(self._conn.cursor())
+
+    async def commit(self):
+        return await self._conn.commit()
+
+    async def rollback(self):
+        return await self._conn.rollback()
+
+
+@asynccontextmanager
+async def async_connection(*, read: bool = False) -> AsyncIterator[_AsyncConnWrapper]:
+    """
+    Borrow an async connection for a block: commits on success, rolls back on error.
+    Uses the async pool when it is open on this event loop.
+    read=True is async_read_connection().
     """
-    conn = psycopg.connect(database_url, row_factory=dict_row)
-    return _ConnWrapper(conn, "postgres")
+    replica = read and reads_use_replica()
+    on_loop = _async_pool_loop is asyncio.get_running_loop()
+    pool = (_async_read_pool if replica else _async_pool) if on_loop else None
+    if pool is not None:
+        conn = await pool.getconn()
+    else:
+        url = read_database_url if replica else database_url
+        conn = await psycopg.AsyncConnection.connect(url, row_factory=dict_row)
+        await _configure_async(conn)
+    try:
+        yield _AsyncConnWrapper(conn)
+        await conn.commit()
+    except BaseException:
+        await conn.rollback()
+        raise
+    finally:
+        if pool is not None:
+            await pool.putconn(conn)
+        else:
+            await conn.close()
+
+
+def async_read_connection():
+    """async_connection() for read-only helpers: the replica when reads_use_replica()."""
+    return async_connection(read=True)
@@ -3,14 +3,116 @@ Jobs and locations storage re-exports.
 """
 from core.db.jobs.jobs_store import (
     get_locations,
+    get_locations_async,
     get_all_jobs,
     get_new_jobs,
+    upsert_jobs,
+    close_stale_jobs,
+    backfill_job_kinds,
+    backfill_job_pay,
+    backfill_job_regions,
     get_stats,
+    get_stats_async,
+)
+from core.db.jobs.stats import (
+    STATS_CACHE_SECONDS,
+    estimate_stats,
+    get_cached_stats,
+    get_cached_stats_async,
+    clear_stats_cache,
+)
+from core.db.jobs.job_identity import (
+    normalize_field,
+    job_content_hash,
+    job_detail_hash,
+    backfill_job_identity,
+)
+from core.db.jobs.job_kinds import (
+    ANY_KIND,
+    UNKNOWN_KIND,
+    job_kind_mask,
+    preference_kind_mask,
+    kind_of_job,
+    kind_of_subscription,
+    kind_matches,
+    kind_labels,
+)
+from core.db.jobs.pay import (
+    amount_to_minor,
+    parse_pay,
+    pay_of_job,
+    pay_matches,
+    min_pay_floor,
+    format_minor,
+)
+from core.db.jobs.location_index import (
+    clear_location_cache,
+    REGION_UK,
+    REGION_US,
+    REGION_ALL,
+    US_AREA_GROUPS,
+    location_region,
+    preference_region,
+    resolve_location,
+    locations_within,
+    radius_tokens,
+    resolve_preference,
+    preference_is_empty,
+    preference_matches_location,
+    backfill_job_locations,
+    get_area_groups,
+    get_job_location_stats,
 )
 
 __all__ = [
     "get_locations",
+    "get_locations_async",
     "get_all_jobs",
     "get_new_jobs",
+    "upsert_jobs",
+    "close_stale_jobs",
+    "backfill_job_kinds",
+    "backfill_job_pay",
+    "backfill_job_regions",
     "get_stats",
+    "get_stats_async",
+    "STATS_CACHE_SECONDS",
+    "estimate_stats",
+    "get_cached_stats",
+    "get_cached_stats_async",
+    "clear_stats_cache",
+    "normalize_field",
+    "job_content_hash",
+    "job_detail_hash",
+    "backfill_job_identity",
+    "ANY_KIND",
+    "UNKNOWN_KIND",
+    "job_kind_mask",
+    "preference_kind_mask",
+    "kind_of_job",
+    "kind_of_subscription",
+    "kind_matches",
+    "kind_labels",
+    "amount_to_minor",
+    "parse_pay",
+    "pay_of_job",
+    "pay_matches",
+    "min_pay_floor",
+    "format_minor",
+    "clear_location_cache",
+    "REGION_UK",
+    "REGION_US",
+    "REGION_ALL",
+    "US_AREA_GROUPS",
+    "location_region",
+    "preference_region",
+    "resolve_location",
+    "locations_within",
+    "radius_tokens",
+    "resolve_preference",
+    "preference_is_empty",
+    "preference_matches_location",
+    "backfill_job_locations",
+    "get_area_groups",
+    "get_job_location_stats",
 ]
@@ -0,0 +1,137 @@
+"""
+Canonical job identity (`jobs.content_hash`).
+
+A posting is identified by a hash of its normalized title and location, which is the
+same key the scrapers dedupe on. The URL is deliberately left out: it falls back to
+the search page when no link is found, and one posting can appear under several
+URLs, which used to produce duplicate rows (and duplicate alerts) under the old
+UNIQUE(title, location, url) key.
+
+`jobs.detail_hash` covers the fields that can change on a live posting (type,
+duration, pay), so ingest can tell a re-seen job from a changed one.
+
+backfill_job_identity() hashes rows stored before the columns existed, merges rows
+that share a hash into the oldest one (moving their alert history), and then creates
+the unique index that get_new_jobs() uses as its conflict target.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+import unicodedata
+from typing import Dict
+
+from core.db.base import get_conn
+
+_SPACES = re.compile(r"\s+")
+_COMMA = re.compile(r"\s*,\s*")
+
+
+def normalize_field(value: str | None) -> str:
+    """Casefold, NFKC-normalize and collapse whitespace (also around commas)."""
+    text = unicodedata.normalize("NFKC", value or "").casefold()
+    text = _COMMA.sub(", ", _SPACES.sub(" ", text))
+    return text.strip(" ,")
+
+
+def job_content_hash(job: Dict) -> str:
+    """Stable hex key for a job dict (title + location)."""
+    key = normalize_field(job.get("title")) + "\x1f" + normalize_field(job.get("location"))
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+def job_detail_hash(job: Dict) -> str:
+    """Hex key of a posting's mutable details (type, duration, pay); changes mean the job changed."""
+    key = "\x1f".join(normalize_field(job.get(f)) for f in ("type", "duration", "pay"))
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+def _hash_and_merge(cur) -> int:
+    """The migration path: hash unhashed rows and merge duplicates. Returns rows removed."""
+    # Hashes for unhashed rows are staged first so rows colliding with an already
+    # hashed one are merged before the unique index ever sees them.
+    cur.execute("CREATE TEMP TABLE job_hashes (id INTEGER PRIMARY KEY, content_hash TEXT) ON COMMIT DROP")
+    cur.execute("SELECT id, title, location FROM jobs WHERE content_hash IS NULL")
+    rows = [(r["id"], job_content_hash(r)) for r in cur.fetchall()]
+    if rows:
+        cur.executemany("INSERT INTO job_hashes (id, content_hash) VALUES (?, ?)", rows)
+
+    cur.execute(
+        """
+        CREATE TEMP TABLE job_merge ON COMMIT DROP AS
+        SELECT id AS dup_id, keep_id
+        FROM (
+            SELECT id, min(id) OVER (PARTITION BY content_hash) AS keep_id
+            FROM (
+                SELECT id, content_hash FROM jobs WHERE content_hash IS NOT NULL
+                UNION ALL
+                SELECT id, content_hash FROM job_hashes
+            ) h
+        ) d
+        WHERE id <> keep_id
+        """
+    )
+    cur.execute("SELECT COUNT(*) AS count FROM job_merge")
+    merged = cur.fetchone()["count"]
+    if merged:
+        # One delivery per (subscription, canonical job): prefer the canonical row's own,
+        # then the oldest; the rest would collide once re-pointed.
+        cur.execute(
+            """
+            DELETE FROM alert_deliveries ad
+            USING (
+                SELECT a.id,
+                       row_number() OVER (
+                           PARTITION BY a.subscription_id, coalesce(m.keep_id, a.job_id)
+                           ORDER BY (m.dup_id IS NOT NULL), a.id
+                       ) AS rn
+                FROM alert_deliveries a
+                LEFT JOIN job_merge m ON m.dup_id = a.job_id
+                WHERE a.job_id IN (SELECT dup_id FROM job_merge UNION SELECT keep_id FROM job_merge)
+            ) r
+            WHERE ad.id = r.id AND r.rn > 1
+            """
+        )
+        cur.execute(
+            "UPDATE alert_deliveries ad SET job_id = m.keep_id FROM job_merge m WHERE ad.job_id = m.dup_id"
+        )
+        cur.execute("DELETE FROM jobs j USING job_merge m WHERE j.id = m.dup_id")
+    if rows:
+        cur.execute("UPDATE jobs j SET content_hash = h.content_hash FROM job_hashes h WHERE j.id = h.id")
+    return merged
+
+
+def backfill_job_identity() -> int:
+    """
+    Hash unhashed jobs, merge duplicates into the oldest row and ensure the unique index.
+    Returns the number of duplicate job rows removed.
+    """
+    conn = get_conn()
+    cur = conn.cursor()
+
+    cur.execute("SELECT id, type, duration, pay FROM jobs WHERE detail_hash IS NULL")
+    details = [(job_detail_hash(r), r["id"]) for r in cur.fetchall()]
+    if details:
+        cur.executemany("UPDATE jobs SET detail_hash = ? WHERE id = ?", details)
+
+    # Once every row is hashed and the unique index exists, ingest keeps it that way
+    # and there is nothing to merge: skip the whole-table window over content_hash.
+    cur.execute(
+        """
+        SELECT EXISTS (SELECT 1 FROM jobs WHERE content_hash IS NULL) AS unhashed,
+               to_regclass('idx_jobs_content_hash') IS NOT NULL AS indexed
+        """
+    )
+    state = cur.fetchone()
+    merged = 0
+    if state["unhashed"] or not state["indexed"]:
+        merged = _hash_and_merge(cur)
+        cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_content_hash ON jobs(content_hash)")
+    conn.commit()
+    conn.close()
+    if merged:
+        print(f"[db] backfill_job_identity: merged {merged} duplicate job(s)")
+    return merged
+
+
+__all__ = ["normalize_field", "job_content_hash", "job_detail_hash", "backfill_job_identity"]
@@ -0,0 +1,125 @@
+"""
+Job type / duration normalized into integer bitmask flags.
+
+Both scrapers return free text for `type` ("Full Time", "Flex Time", ...) and
+`duration` ("Regular", "Fixed-term", "Seasonal", ...). At ingest these are folded
+into one `jobs.kind_mask`, and a subscription's `job_type` preference maps to the
+same flags (`subscriptions.job_kind_mask`). Matching a job type is then a single
+integer AND, in Python or in SQL (`kind_mask & ? <> 0`).
+
+A preference mask of 0 means "any type". Preferences that name no known kind map to
+UNKNOWN_KIND, which no job carries, so they never match.
+"""
+from __future__ import annotations
+
+import re
+from typing import Dict, List
+
+FULL_TIME = 1 << 0
+PART_TIME = 1 << 1
+FLEX_TIME = 1 << 2
+REDUCED_TIME = 1 << 3
+REGULAR = 1 << 4
+FIXED_TERM = 1 << 5
+SEASONAL = 1 << 6
+UNKNOWN_KIND = 1 << 30
+
+ANY_KIND = 0
+
+# Normalized keyword (lowercase, letters/digits only) -> flag.
+# "Permanent" (UK wording) and "Regular" (US wording) are the same duration.
+KIND_KEYWORDS: Dict[str, int] = {
+    "fulltime": FULL_TIME,
+    "parttime": PART_TIME,
+    "flextime": FLEX_TIME,
+    "reducedtime": REDUCED_TIME,
+    "regular": REGULAR,
+    "permanent": REGULAR,
+    "fixedterm": FIXED_TERM,
+    "seasonal": SEASONAL,
+}
+
+KIND_LABELS: Dict[int, str] = {
+    FULL_TIME: "Full Time",
+    PART_TIME: "Part Time",
+    FLEX_TIME: "Flex Time",
+    REDUCED_TIME: "Reduced Time",
+    REGULAR: "Regular",
+    FIXED_TERM: "Fixed-term",
+    SEASONAL: "Seasonal",
+}
+
+
+def _normalize(text: str | None) -> str:
+    """'Fixed-term' / 'fixed term' / 'FIXED_TERM' -> 'fixedterm'."""
+    return re.sub(r"[^a-z0-9]+", "", (text or "").lower())
+
+
+def _flags_in(text: str | None) -> int:
+    normalized = _normalize(text)
+    mask = 0
+    for keyword, flag in KIND_KEYWORDS.items():
+        if keyword in normalized:
+            mask |= flag
+    return mask
+
+
+def job_kind_mask(job_type: str | None, duration: str | None) -> int:
+    """Flags for a scraped job's raw type and duration strings (0 if nothing is recognised)."""
+    return _flags_in(job_type) | _flags_in(duration)
+
+
+def preference_kind_mask(job_type_pref: str | None) -> int:
+    """
+    Flags for a subscription's job_type preference.
+    Empty / "Any" -> ANY_KIND (0); unrecognised text -> UNKNOWN_KIND.
+    """
+    normalized = _normalize(job_type_pref)
+    if not normalized or normalized == "any":
+        return ANY_KIND
+    return _flags_in(job_type_pref) or UNKNOWN_KIND
+
+
+def kind_of_job(job: Dict) -> int:
+    """A job dict's kind_mask, computed from type/duration if it was not loaded from the DB."""
+    mask = job.get("kind_mask")
+    if mask is None:
+        return job_kind_mask(job.get("type"), job.get("duration"))
+    return int(mask)
+
+
+def kind_of_subscription(sub: Dict) -> int:
+    """A subscription's job_kind_mask, computed from job_type if it was not loaded from the DB."""
+    mask = sub.get("job_kind_mask")
+    if mask is None:
+        return preference_kind_mask(sub.get("job_type"))
+    return int(mask)
+
+
+def kind_matches(job_mask: int, pref_mask: int) -> bool:
+    """True if a job with `job_mask` satisfies a preference with `pref_mask`."""
+    return pref_mask == ANY_KIND or bool(job_mask & pref_mask)
+
+
+def kind_labels(mask: int) -> List[str]:
+    """Human-readable labels for a mask (for admin views / debugging)."""
+    return [label for flag, label in KIND_LABELS.items() if mask & flag]
+
+
+__all__ = [
+    "FULL_TIME",
+    "PART_TIME",
+    "FLEX_TIME",
+    "REDUCED_TIME",
+    "REGULAR",
+    "FIXED_TERM",
+    "SEASONAL",
+    "UNKNOWN_KIND",
+    "ANY_KIND",
+    "job_kind_mask",
+    "preference_kind_mask",
+    "kind_of_job",
+    "kind_of_subscription",
+    "kind_matches",
+    "kind_labels",
+]
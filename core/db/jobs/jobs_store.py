@@ -3,142 +3,340 @@ Jobs and locations storage helpers.
 """
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional
 
-from core.db.base import get_conn
+from core.db.base import async_connection, async_read_connection, get_conn, get_read_conn
+from core.db.statements import register
+from core.db.jobs.job_identity import job_content_hash, job_detail_hash
+from core.db.jobs.job_kinds import job_kind_mask
+from core.db.jobs.location_index import REGION_UK, location_region, store_job_locations
+from core.db.jobs.pay import parse_pay
+
+
+_ACTIVE_LOCATIONS = register("locations.active", """
+    SELECT id, code, name, region, country, active
+    FROM locations
+    WHERE active = 1
+    ORDER BY name
+""")
 
 
 def get_locations() -> List[Dict]:
     """Return all active locations."""
-    conn = get_conn()
+    conn = get_read_conn()
     cur = conn.cursor()
 
-    cur.execute(
-        """
-        SELECT id, code, name, region, country, active
-        FROM locations
-        WHERE active = 1
-        ORDER BY name
-        """
-    )
+    cur.execute(_ACTIVE_LOCATIONS)
     rows = cur.fetchall()
     conn.close()
     return [dict(r) for r in rows]
 
 
-def get_all_jobs(limit: Optional[int] = None) -> List[Dict]:
-    """Return all stored jobs as a list of dicts, newest first."""
-    conn = get_conn()
+async def get_locations_async() -> List[Dict]:
+    async with async_read_connection() as conn:
+        cur = await conn.cursor().execute(_ACTIVE_LOCATIONS)
+        rows = await cur.fetchall()
+    return [dict(r) for r in rows]
+
+
+def get_all_jobs(
+    limit: Optional[int] = None,
+    *,
+    location_id: Optional[int] = None,
+    area_group_id: Optional[int] = None,
+    kind_mask: Optional[int] = None,
+    min_pay_minor: Optional[int] = None,
+    include_closed: bool = False,
+    region: Optional[str] = None,
+    since: Optional[datetime] = None,
+) -> List[Dict]:
+    """
+    Return all stored jobs as a list of dicts, newest first.
+    Optionally filter by canonical location id / area group id (via job_locations)
+    and by job kind flags (any overlap with `kind_mask`; 0 means any kind).
+    min_pay_minor drops jobs whose parsed hourly pay is below it (unknown pay is kept).
+    Closed jobs (no longer listed, see close_stale_jobs) are left out unless include_closed.
+    region restricts to jobs scraped for that region (REGION_UK / REGION_US).
+    since keeps jobs first seen at or after that datetime (an index range scan on
+    (region, first_seen_at) of open jobs, so its cost follows the window, not the table).
+    """
+    conn = get_read_conn()
     cur = conn.cursor()
 
+    where: List[str] = []
+    params: List = []
+    if location_id is not None:
+        where.append("id IN (SELECT job_id FROM job_locations WHERE location_id = ?)")
+        params.append(int(location_id))
+    if area_group_id is not None:
+        where.append("id IN (SELECT job_id FROM job_locations WHERE area_group_id = ?)")
+        params.append(int(area_group_id))
+    if kind_mask:
+        where.append("(kind_mask & ?) <> 0")
+        params.append(int(kind_mask))
+    if min_pay_minor:
+        where.append("(pay_minor IS NULL OR pay_minor >= ?)")
+        params.append(int(min_pay_minor))
+    if region is not None:
+        where.append("region = ?")
+        params.append(region)
+    if since is not None:
+        where.append("first_seen_at >= ?")
+        params.append(since)
+
     sql = """
-        SELECT id, title, type, duration, pay, location, url, first_seen_at
+        SELECT id, title, type, duration, pay, location, url, first_seen_at, kind_mask,
+               pay_minor, pay_currency, content_hash, last_seen_at, closed_at, region
         FROM jobs
-        ORDER BY first_seen_at DESC, id DESC
     """
+    if not include_closed:
+        where.append("closed_at IS NULL")
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY first_seen_at DESC, id DESC"
     if limit is not None:
         sql += " LIMIT ?"
-        cur.execute(sql, (limit,))
-    else:
-        cur.execute(sql)
+        params.append(limit)
+    cur.execute(sql, params)
 
     rows = cur.fetchall()
     conn.close()
     return [dict(row) for row in rows]
 
 
-def get_new_jobs(jobs: List[Dict]) -> List[Dict]:
+_UPSERT_SQL = """
+WITH incoming AS (
+    SELECT *
+    FROM unnest(
+        ?::text[], ?::text[], ?::text[], ?::text[], ?::text[], ?::text[],
+        ?::int[], ?::int[], ?::text[], ?::text[], ?::text[], ?::text[]
+    ) AS t(title, type, duration, pay, location, url,
+           kind_mask, pay_minor, pay_currency, content_hash, detail_hash, region)
+),
+previous AS (
+    SELECT j.content_hash, j.detail_hash, j.pay_minor
+    FROM jobs j
+    JOIN incoming i ON i.content_hash = j.content_hash
+),
+upserted AS (
+    INSERT INTO jobs
+        (title, type, duration, pay, location, url, first_seen_at, last_seen_at, closed_at,
+         locations_resolved_at, pay_parsed_at, kind_mask, pay_minor, pay_currency, content_hash, detail_hash,
+         region)
+    SELECT title, type, duration, pay, location, url, ?, ?, NULL,
+           ?, ?, kind_mask, pay_minor, pay_currency, content_hash, detail_hash, region
+    FROM incoming
+    ON CONFLICT (content_hash) DO UPDATE SET
+        last_seen_at = EXCLUDED.last_seen_at,
+        closed_at = NULL,
+        type = EXCLUDED.type,
+        duration = EXCLUDED.duration,
+        pay = EXCLUDED.pay,
+        kind_mask = EXCLUDED.kind_mask,
+        pay_minor = EXCLUDED.pay_minor,
+        pay_currency = EXCLUDED.pay_currency,
+        pay_parsed_at = EXCLUDED.pay_parsed_at,
+        detail_hash = EXCLUDED.detail_hash,
+        region = coalesce(jobs.region, EXCLUDED.region),
+        url = CASE WHEN coalesce(jobs.url, '') = '' THEN EXCLUDED.url ELSE jobs.url END
+    RETURNING id, content_hash, first_seen_at, (xmax = 0) AS inserted
+)
+SELECT u.id, u.content_hash, u.first_seen_at, u.inserted,
+       p.detail_hash AS previous_detail_hash, p.pay_minor AS previous_pay_minor
+FROM upserted u
+LEFT JOIN previous p ON p.content_hash = u.content_hash
+"""
+
+
+def upsert_jobs(jobs: List[Dict]) -> Dict[str, List[Dict]]:
     """
-    Insert jobs into DB if they don't already exist.
-    Returns a list of jobs that were newly inserted.
+    Insert or refresh a batch of scraped jobs in one statement (two round trips in
+    total, with the job_locations insert, whatever the batch size).
+
+    Every job seen gets last_seen_at = now and is reopened if it was closed. A job's
+    region is taken from job["region"] (the scraping worker's) or its location. Returns
+    {"new": jobs inserted for the first time, "changed": known jobs whose type,
+    duration or pay changed (with previous_pay_minor)}; both carry id, first_seen_at,
+    kind_mask, pay_minor, pay_currency and content_hash.
     """
     if not jobs:
-        return []
+        return {"new": [], "changed": []}
+
+    # One row per content_hash: ON CONFLICT cannot touch the same row twice.
+    batch: Dict[str, Dict] = {}
+    for job in jobs:
+        prepared = dict(job)
+        prepared["title"] = job.get("title") or ""
+        prepared["location"] = job.get("location") or ""
+        prepared["url"] = job.get("url") or ""
+        prepared["kind_mask"] = job_kind_mask(job.get("type"), job.get("duration"))
+        prepared["pay_minor"], prepared["pay_currency"] = parse_pay(job.get("pay"))
+        prepared["content_hash"] = job_content_hash(job)
+        prepared["detail_hash"] = job_detail_hash(job)
+        prepared["region"] = job.get("region") or location_region(prepared["location"])
+        batch.setdefault(prepared["content_hash"], prepared)
+    rows = list(batch.values())
 
     conn = get_conn()
     cur = conn.cursor()
 
-    cur.execute("SELECT COUNT(*) AS count FROM jobs")
-    before_row = cur.fetchone()
-    before_count = before_row["count"] if before_row else 0
+    now = datetime.now(timezone.utc)
+    columns = ("title", "type", "duration", "pay", "location", "url",
+               "kind_mask", "pay_minor", "pay_currency", "content_hash", "detail_hash", "region")
+    # New rows are stamped locations_resolved_at (store_job_locations() below, same
+    # transaction) and pay_parsed_at (pay_minor was parsed above).
+    cur.execute(_UPSERT_SQL, [[r.get(c) for r in rows] for c in columns] + [now, now, now, now])
+    results = {r["content_hash"]: r for r in cur.fetchall()}
 
     new_jobs: List[Dict] = []
-    now = datetime.utcnow().isoformat(timespec="seconds")
+    changed_jobs: List[Dict] = []
+    for job in rows:
+        result = results.get(job["content_hash"])
+        if result is None:
+            continue
+        detail_hash = job.pop("detail_hash")
+        job["id"] = result["id"]
+        job["first_seen_at"] = result["first_seen_at"]
+        job["last_seen_at"] = now
+        if result["inserted"]:
+            new_jobs.append(job)
+        elif result["previous_detail_hash"] not in (None, detail_hash):
+            job["previous_pay_minor"] = result["previous_pay_minor"]
+            changed_jobs.append(job)
+    store_job_locations(cur, new_jobs)
+    conn.commit()
+    conn.close()
 
-    for job in jobs:
-        title = job.get("title") or ""
-        location = job.get("location") or ""
-        url = job.get("url") or ""
+    print(f"[db] upsert_jobs: seen={len(rows)}, inserted={len(new_jobs)}, changed={len(changed_jobs)}")
 
-        cur.execute(
-            """
-            INSERT INTO jobs (title, type, duration, pay, location, url, first_seen_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT (title, location, url) DO NOTHING
-            RETURNING id
-            """,
-            (
-                title,
-                job.get("type"),
-                job.get("duration"),
-                job.get("pay"),
-                location,
-                url,
-                now,
-            ),
-        )
-        row = cur.fetchone()
-        if row:
-            job_with_id = dict(job)
-            job_with_id["id"] = row["id"]
-            job_with_id["first_seen_at"] = now
-            new_jobs.append(job_with_id)
+    return {"new": new_jobs, "changed": changed_jobs}
+
+
+def get_new_jobs(jobs: List[Dict]) -> List[Dict]:
+    """
+    Insert jobs into DB if they don't already exist (same content_hash, see
+    core.db.jobs.job_identity) and refresh last_seen_at on the rest.
+    Returns a list of jobs that were newly inserted.
+    """
+    return upsert_jobs(jobs)["new"]
 
+
+def close_stale_jobs(max_age_hours: float, region: Optional[str] = None) -> int:
+    """
+    Mark open jobs not seen for max_age_hours as closed. Returns the number closed.
+    A grace period (rather than "not seen this cycle") keeps one worker's partial
+    scrape from closing jobs that are still listed; region limits it to the jobs that
+    worker scrapes, so a region whose scraper is down keeps its jobs open.
+    """
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(hours=max_age_hours)
+    sql = "UPDATE jobs SET closed_at = ? WHERE closed_at IS NULL AND coalesce(last_seen_at, first_seen_at) < ?"
+    params: List = [now, cutoff]
+    if region:
+        sql += " AND region = ?"
+        params.append(region)
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute(sql, params)
+    closed = cur.rowcount
     conn.commit()
+    conn.close()
+    return closed
 
-    cur.execute("SELECT COUNT(*) AS count FROM jobs")
-    after_row = cur.fetchone()
-    after_count = after_row["count"] if after_row else 0
+
+def backfill_job_kinds() -> int:
+    """Compute kind_mask for jobs stored before the column existed. Returns rows updated."""
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT id, type, duration FROM jobs WHERE kind_mask IS NULL")
+    rows = [(job_kind_mask(r["type"], r["duration"]), r["id"]) for r in cur.fetchall()]
+    if rows:
+        cur.executemany("UPDATE jobs SET kind_mask = ? WHERE id = ?", rows)
+    conn.commit()
     conn.close()
+    return len(rows)
 
-    print(
-        f"[db] get_new_jobs: before={before_count}, inserted={len(new_jobs)}, "
-        f"after={after_count}, db=postgres"
-    )
 
-    return new_jobs
+def backfill_job_pay() -> int:
+    """
+    Parse pay_minor/pay_currency for jobs stored unparsed. Every row read is stamped
+    pay_parsed_at, so pay text that never parses is not re-read on every start.
+    Returns rows whose pay parsed.
+    """
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT id, pay FROM jobs WHERE pay_parsed_at IS NULL")
+    scanned = cur.fetchall()
+    rows = []
+    for r in scanned:
+        pay_minor, pay_currency = parse_pay(r["pay"])
+        if pay_minor is not None:
+            rows.append((pay_minor, pay_currency, r["id"]))
+    if rows:
+        cur.executemany("UPDATE jobs SET pay_minor = ?, pay_currency = ? WHERE id = ?", rows)
+    if scanned:
+        cur.execute(
+            "UPDATE jobs SET pay_parsed_at = now() WHERE id = ANY(?::int[])",
+            ([r["id"] for r in scanned],),
+        )
+    conn.commit()
+    conn.close()
+    return len(rows)
 
 
-def get_stats() -> Dict:
-    """Return simple stats about the database."""
+def backfill_job_regions() -> int:
+    """
+    Derive region from the location text for jobs stored before the column existed.
+    Locations that name no region get REGION_UK (the original worker's, as for
+    catalog locations), so they are not re-read on every start.
+    """
     conn = get_conn()
     cur = conn.cursor()
+    cur.execute("SELECT id, location FROM jobs WHERE region IS NULL")
+    rows = [(location_region(r["location"]) or REGION_UK, r["id"]) for r in cur.fetchall()]
+    if rows:
+        cur.executemany("UPDATE jobs SET region = ? WHERE id = ?", rows)
+    conn.commit()
+    conn.close()
+    return len(rows)
 
-    cur.execute("SELECT COUNT(*) AS count FROM jobs")
-    jobs_row = cur.fetchone()
-    jobs_count = jobs_row["count"] if jobs_row else 0
 
-    cur.execute("SELECT COUNT(*) AS count FROM subscriptions WHERE active = 1")
-    subs_row = cur.fetchone()
-    subs_count = subs_row["count"] if subs_row else 0
+_STATS = register("stats.counts", """
+    SELECT
+      (SELECT COUNT(*) FROM jobs WHERE closed_at IS NULL) AS jobs,
+      (SELECT COUNT(*) FROM subscriptions WHERE active = 1) AS active_subscriptions,
+      (SELECT COUNT(*) FROM locations WHERE active = 1) AS locations
+""")
 
-    cur.execute("SELECT COUNT(*) AS count FROM locations WHERE active = 1")
-    locs_row = cur.fetchone()
-    locs_count = locs_row["count"] if locs_row else 0
 
+def get_stats() -> Dict:
+    """Return simple stats about the database."""
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute(_STATS)
+    row = cur.fetchone()
     conn.close()
+    return dict(row)
+
 
-    return {
-        "jobs": jobs_count,
-        "active_subscriptions": subs_count,
-        "locations": locs_count,
-    }
+async def get_stats_async() -> Dict:
+    async with async_connection() as conn:
+        cur = await conn.cursor().execute(_STATS)
+        row = await cur.fetchone()
+    return dict(row)
 
 
 __all__ = [
     "get_locations",
+    "get_locations_async",
+    "get_stats_async",
     "get_all_jobs",
     "get_new_jobs",
+    "upsert_jobs",
+    "close_stale_jobs",
+    "backfill_job_kinds",
+    "backfill_job_pay",
+    "backfill_job_regions",
     "get_stats",
 ]
@@ -0,0 +1,380 @@
+"""
+Canonical location ids for jobs and subscription preferences.
+
+Job locations are free text ("Coventry, United Kingdom"). At ingest each job is
+resolved once against the `locations` table and AREA_GROUPS, and the resulting
+canonical location ids / area-group ids are stored in `job_locations`. Matching,
+admin filters and analytics can then work with integer ids instead of re-deriving
+tokens from strings.
+
+Resolution uses the same substring rules as the worker matchers, so
+preference_matches_location() agrees exactly with token matching:
+  - a job is in area group G if any town of G appears in its location
+  - a job has canonical location L if L's base name (without "(CODE)") appears in it
+Preference tokens that are neither an area group nor a canonical location name fall
+back to a substring check.
+
+Radius subscriptions ("within N miles of Coventry") add every canonical location
+within N miles of each named town, found through a SpatialGrid over locations.lat/lon.
+
+Regions partition the shared tables between the UK and US workers: jobs take the
+region of the worker that scraped them, and a subscription takes the region every
+location it names belongs to (REGION_ALL for "Any", empty or mixed/unknown places).
+"""
+from __future__ import annotations
+
+import re
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from app.area_groups import AREA_GROUPS
+from core.db.base import get_conn, get_read_conn
+from core.db.jobs.spatial_index import SpatialGrid
+
+REGION_UK = "uk"
+REGION_US = "us"
+REGION_ALL = "all"
+# Area groups whose towns are US sites; every other group is UK.
+US_AREA_GROUPS = frozenset({"US Test"})
+_US_STATE = re.compile(r",\s*[a-z]{2}$")
+
+# Bounded in-memory caches (location text / (preference, radius) -> resolution).
+_CACHE_MAX = 10_000
+_catalog: Optional[Dict] = None
+_location_cache: Dict[str, Tuple[FrozenSet[int], FrozenSet[int]]] = {}
+_preference_cache: Dict[Tuple[str, int], Dict] = {}
+
+
+def _base_name(name: str) -> str:
+    """'Doncaster (LBA2)' -> 'doncaster'."""
+    return re.sub(r"\s*\(.*?\)", "", name or "").strip().lower()
+
+
+def _load_catalog() -> Dict:
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT id, name, lat, lon, country FROM locations WHERE active = 1 ORDER BY id")
+    location_rows = cur.fetchall()
+    cur.execute("SELECT id, label FROM area_groups")
+    group_rows = cur.fetchall()
+    conn.close()
+
+    # Several rows can share a town ("Doncaster", "Doncaster (LBA2)"); the lowest id is canonical.
+    locations: Dict[str, int] = {}
+    coords: Dict[int, Tuple[float, float]] = {}
+    regions: Dict[int, str] = {}
+    for row in location_rows:
+        base = _base_name(row["name"])
+        if not base:
+            continue
+        canonical_id = locations.setdefault(base, int(row["id"]))
+        regions.setdefault(canonical_id, location_region(row["country"]) or REGION_UK)
+        if canonical_id not in coords and row["lat"] is not None and row["lon"] is not None:
+            coords[canonical_id] = (float(row["lat"]), float(row["lon"]))
+
+    group_ids = {row["label"]: int(row["id"]) for row in group_rows}
+    groups = [
+        (group_ids[label], [t.lower() for t in towns])
+        for label, towns in AREA_GROUPS.items()
+        if label in group_ids
+    ]
+    return {
+        "locations": locations,
+        "names": {lid: base for base, lid in locations.items()},
+        "coords": coords,
+        "regions": regions,
+        "grid": SpatialGrid((lid, lat, lon) for lid, (lat, lon) in coords.items()),
+        "group_ids": group_ids,
+        "group_regions": {
+            gid: REGION_US if label in US_AREA_GROUPS else REGION_UK for label, gid in group_ids.items()
+        },
+        "groups": groups,
+    }
+
+
+def _get_catalog() -> Dict:
+    global _catalog
+    if _catalog is None:
+        _catalog = _load_catalog()
+    return _catalog
+
+
+def clear_location_cache() -> None:
+    """Drop the cached catalog and resolutions (e.g. after editing locations)."""
+    global _catalog
+    _catalog = None
+    _location_cache.clear()
+    _preference_cache.clear()
+
+
+def resolve_location(location: str | None) -> Tuple[FrozenSet[int], FrozenSet[int]]:
+    """Return (canonical location ids, area group ids) for a job location string."""
+    key = (location or "").lower()
+    cached = _location_cache.get(key)
+    if cached is not None:
+        return cached
+
+    catalog = _get_catalog()
+    location_ids = frozenset(lid for base, lid in catalog["locations"].items() if base in key)
+    group_ids = frozenset(
+        gid for gid, towns in catalog["groups"] if any(town in key for town in towns)
+    )
+
+    if len(_location_cache) >= _CACHE_MAX:
+        _location_cache.clear()
+    _location_cache[key] = (location_ids, group_ids)
+    return location_ids, group_ids
+
+
+def locations_within(location_id: int, miles: float) -> List[int]:
+    """Canonical location ids within `miles` of a canonical location (nearest first)."""
+    catalog = _get_catalog()
+    center = catalog["coords"].get(location_id)
+    if center is None or not miles:
+        return []
+    return catalog["grid"].within(center[0], center[1], float(miles))
+
+
+def _radius_location_ids(raw_pref: str, radius_miles: int | None) -> set[int]:
+    """Ids near each named town in a preference (group labels like "Midlands" are not centers)."""
+    if not radius_miles or radius_miles <= 0:
+        return set()
+    catalog = _get_catalog()
+    nearby: set[int] = set()
+    for part in [p.strip() for p in raw_pref.split(";") if p.strip()]:
+        lower = part.lower()
+        if lower == "any":
+            return set()
+        center_id = catalog["locations"].get(_base_name(lower))
+        if center_id is not None:
+            nearby.update(locations_within(center_id, radius_miles))
+    return nearby
+
+
+def radius_tokens(raw_pref: str | None, radius_miles: int | None) -> List[str]:
+    """
+    Location names within radius of the preference's towns, usable as extra substring
+    tokens (a job has canonical id L exactly when L's name appears in its location).
+    """
+    if not radius_miles:
+        return []
+    catalog = _get_catalog()
+    return sorted(catalog["names"][lid] for lid in _radius_location_ids(raw_pref or "", radius_miles))
+
+
+def resolve_preference(raw_pref: str | None, radius_miles: int | None = None) -> Dict:
+    """
+    Resolve a preferred_location string ("London; Birmingham / Midlands") into ids.
+
+    Returns {"any", "location_ids", "area_group_ids", "tokens"} where tokens are the
+    leftover free-text tokens that have no canonical id. Follows the same rules as
+    expand_preferred_locations ("any" wins, exact or partial group label match).
+    With radius_miles, locations within that distance of each named town are added.
+    """
+    key = raw_pref or ""
+    radius = int(radius_miles or 0)
+    cached = _preference_cache.get((key, radius))
+    if cached is not None:
+        return cached
+
+    catalog = _get_catalog()
+    any_mode = False
+    location_ids: set[int] = set()
+    group_ids: set[int] = set()
+    tokens: List[str] = []
+
+    def _add_token(tok: str) -> None:
+        lid = catalog["locations"].get(tok)
+        if lid is not None:
+            location_ids.add(lid)
+        elif tok not in tokens:
+            tokens.append(tok)
+
+    def _add_group(label: str) -> None:
+        gid = catalog["group_ids"].get(label)
+        if gid is not None:
+            group_ids.add(gid)
+        else:
+            for town in AREA_GROUPS[label]:
+                _add_token(town.lower())
+
+    for part in [p.strip() for p in key.split(";") if p.strip()]:
+        lower = part.lower()
+        if lower == "any":
+            any_mode = True
+            location_ids.clear()
+            group_ids.clear()
+            tokens.clear()
+            break
+        if part in AREA_GROUPS:
+            _add_group(part)
+            continue
+        matched = next((label for label in AREA_GROUPS if lower in label.lower()), None)
+        if matched:
+            _add_group(matched)
+        else:
+            _add_token(lower)
+
+    if not any_mode:
+        location_ids.update(_radius_location_ids(key, radius))
+
+    resolved = {
+        "any": any_mode,
+        "location_ids": frozenset(location_ids),
+        "area_group_ids": frozenset(group_ids),
+        "tokens": tuple(tokens),
+    }
+    if len(_preference_cache) >= _CACHE_MAX:
+        _preference_cache.clear()
+    _preference_cache[(key, radius)] = resolved
+    return resolved
+
+
+def location_region(location: str | None) -> Optional[str]:
+    """REGION_UK / REGION_US from a job location or country string; None if it can't tell."""
+    lower = (location or "").strip().lower()
+    if not lower:
+        return None
+    if "united kingdom" in lower or lower.endswith(", uk"):
+        return REGION_UK
+    if "united states" in lower or lower.endswith("usa") or _US_STATE.search(lower):
+        return REGION_US
+    return None
+
+
+def preference_region(raw_pref: str | None, radius_miles: int | None = None) -> str:
+    """
+    Region a subscription belongs to: REGION_UK / REGION_US when every location it
+    names is in that region, otherwise REGION_ALL (also for "Any" and empty prefs).
+    """
+    pref = resolve_preference(raw_pref, radius_miles)
+    if pref["any"] or preference_is_empty(pref):
+        return REGION_ALL
+    catalog = _get_catalog()
+    regions = {catalog["regions"].get(lid) for lid in pref["location_ids"]}
+    regions.update(catalog["group_regions"].get(gid) for gid in pref["area_group_ids"])
+    regions.update(location_region(tok) for tok in pref["tokens"])
+    if len(regions) == 1 and None not in regions:
+        return regions.pop()
+    return REGION_ALL
+
+
+def preference_is_empty(pref: Dict) -> bool:
+    """True if a resolved preference names no locations at all."""
+    return not (pref["location_ids"] or pref["area_group_ids"] or pref["tokens"])
+
+
+def preference_matches_location(pref: Dict, location: str | None) -> bool:
+    """Check a resolved (non-"any") preference against a job location using ids first."""
+    location_ids, group_ids = resolve_location(location)
+    if pref["area_group_ids"] & group_ids or pref["location_ids"] & location_ids:
+        return True
+    if pref["tokens"]:
+        lower = (location or "").lower()
+        return any(tok in lower for tok in pref["tokens"])
+    return False
+
+
+def store_job_locations(cur, jobs: Iterable[Dict]) -> int:
+    """
+    Insert job_locations rows for jobs that have an "id" (same transaction as the caller).
+    Returns the number of rows written.
+    """
+    rows: List[tuple] = []
+    for job in jobs:
+        job_id = job.get("id")
+        if not job_id:
+            continue
+        location_ids, group_ids = resolve_location(job.get("location"))
+        rows.extend((int(job_id), lid, None) for lid in sorted(location_ids))
+        rows.extend((int(job_id), None, gid) for gid in sorted(group_ids))
+
+    if rows:
+        job_ids, location_ids, group_ids = (list(col) for col in zip(*rows))
+        cur.execute(
+            "INSERT INTO job_locations (job_id, location_id, area_group_id) "
+            "SELECT * FROM unnest(?::int[], ?::int[], ?::int[])",
+            (job_ids, location_ids, group_ids),
+        )
+    return len(rows)
+
+
+def backfill_job_locations() -> int:
+    """
+    Resolve jobs never resolved yet (e.g. inserted before job_locations existed) and
+    stamp their locations_resolved_at, so jobs whose location matches nothing are not
+    re-scanned on every start.
+    """
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT id, location FROM jobs WHERE locations_resolved_at IS NULL")
+    jobs = [dict(r) for r in cur.fetchall()]
+    written = store_job_locations(cur, jobs)
+    if jobs:
+        cur.execute(
+            "UPDATE jobs SET locations_resolved_at = now() WHERE id = ANY(?::int[])",
+            ([job["id"] for job in jobs],),
+        )
+    conn.commit()
+    conn.close()
+    return written
+
+
+def get_area_groups() -> List[Dict]:
+    """Return all area groups (id, label)."""
+    conn = get_read_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT id, label FROM area_groups ORDER BY label")
+    rows = cur.fetchall()
+    conn.close()
+    return [dict(r) for r in rows]
+
+
+def get_job_location_stats() -> Dict[str, List[Dict]]:
+    """Open-job counts per area group and per canonical location (integer joins only)."""
+    conn = get_read_conn()
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT g.id, g.label, COUNT(jl.job_id) AS jobs
+        FROM area_groups g
+        JOIN job_locations jl ON jl.area_group_id = g.id
+        JOIN jobs j ON j.id = jl.job_id AND j.closed_at IS NULL
+        GROUP BY g.id, g.label
+        ORDER BY jobs DESC, g.label
+        """
+    )
+    groups = [dict(r) for r in cur.fetchall()]
+    cur.execute(
+        """
+        SELECT l.id, l.name, COUNT(jl.job_id) AS jobs
+        FROM locations l
+        JOIN job_locations jl ON jl.location_id = l.id
+        JOIN jobs j ON j.id = jl.job_id AND j.closed_at IS NULL
+        GROUP BY l.id, l.name
+        ORDER BY jobs DESC, l.name
+        """
+    )
+    locations = [dict(r) for r in cur.fetchall()]
+    conn.close()
+    return {"area_groups": groups, "locations": locations}
+
+
+__all__ = [
+    "REGION_UK",
+    "REGION_US",
+    "REGION_ALL",
+    "US_AREA_GROUPS",
+    "location_region",
+    "preference_region",
+    "clear_location_cache",
+    "resolve_location",
+    "locations_within",
+    "radius_tokens",
+    "resolve_preference",
+    "preference_is_empty",
+    "preference_matches_location",
+    "store_job_locations",
+    "backfill_job_locations",
+    "get_area_groups",
+    "get_job_location_stats",
+]
@@ -0,0 +1,108 @@
+"""
+Numeric pay parsed from the scraped free-text `pay` field.
+
+"From GBP14.30" / "From $19.75" / "£24,960 per year" are normalized at ingest into an
+hourly rate in minor units (pence / cents) plus an ISO currency code, stored as
+jobs.pay_minor / jobs.pay_currency. Subscriptions may set min_pay_minor (in the local
+currency of the jobs their worker scrapes); jobs below it are dropped in SQL where
+possible and otherwise by one integer comparison in the matcher.
+
+Jobs whose pay could not be parsed are kept (pay unknown is not "low pay").
+"""
+from __future__ import annotations
+
+import re
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Iterable, Optional, Tuple
+
+HOURS_PER_WEEK = 40
+# Unit keyword -> hours it covers; the first unit found in the text wins.
+_PERIOD_HOURS = [
+    (re.compile(r"\b(year|yr|annum|annual|annually)\b"), HOURS_PER_WEEK * 52),
+    (re.compile(r"\b(month|monthly)\b"), HOURS_PER_WEEK * 52 / 12),
+    (re.compile(r"\b(week|wk|weekly)\b"), HOURS_PER_WEEK),
+    (re.compile(r"\b(day|daily)\b"), 8),
+]
+_CURRENCIES = [
+    ("GBP", ("gbp", "£")),
+    ("USD", ("usd", "$")),
+    ("EUR", ("eur", "€")),
+]
+_AMOUNT = re.compile(r"(\d[\d,]*(?:\.\d+)?)")
+
+
+def amount_to_minor(amount: str | None) -> Optional[int]:
+    """'14.30' / '14' / '1,250.5' -> 1430 / 1400 / 125050; None if not a positive number."""
+    cleaned = (amount or "").strip().replace(",", "").lstrip("£$€")
+    try:
+        value = Decimal(cleaned)
+    except InvalidOperation:
+        return None
+    if not value.is_finite() or value <= 0:
+        return None
+    return int((value * 100).to_integral_value())
+
+
+def parse_pay(pay: str | None) -> Tuple[Optional[int], Optional[str]]:
+    """
+    Return (hourly pay in minor units, currency) for a raw pay string.
+    Ranges use their lower bound; (None, None) if no amount is found.
+    """
+    text = (pay or "").lower()
+    match = _AMOUNT.search(text)
+    if not match:
+        return None, None
+    minor = amount_to_minor(match.group(1))
+    if minor is None:
+        return None, None
+
+    for pattern, hours in _PERIOD_HOURS:
+        if pattern.search(text):
+            minor = int(round(minor / hours))
+            break
+
+    currency = next((code for code, marks in _CURRENCIES if any(m in text for m in marks)), None)
+    return minor, currency
+
+
+def pay_of_job(job: Dict) -> Optional[int]:
+    """A job dict's pay_minor, parsed from `pay` if it was not loaded from the DB."""
+    if "pay_minor" in job:
+        return job["pay_minor"]
+    return parse_pay(job.get("pay"))[0]
+
+
+def pay_matches(pay_minor: Optional[int], min_pay_minor: Optional[int]) -> bool:
+    """True if a job's pay satisfies a subscription minimum (unknown pay always passes)."""
+    return not min_pay_minor or pay_minor is None or pay_minor >= min_pay_minor
+
+
+def min_pay_floor(subs: Iterable[Dict]) -> Optional[int]:
+    """
+    Lowest minimum pay across subscriptions, usable as a SQL pre-filter.
+    None if any subscription accepts every pay (or there are none).
+    """
+    floor: Optional[int] = None
+    for sub in subs:
+        minimum = sub.get("min_pay_minor")
+        if not minimum:
+            return None
+        floor = minimum if floor is None else min(floor, minimum)
+    return floor
+
+
+def format_minor(minor: Optional[int]) -> str:
+    """1430 -> '14.30' (empty string for None)."""
+    if minor is None:
+        return ""
+    return f"{minor // 100}.{minor % 100:02d}"
+
+
+__all__ = [
+    "amount_to_minor",
+    "parse_pay",
+    "pay_of_job",
+    "pay_matches",
+    "min_pay_floor",
+    "format_minor",
+]
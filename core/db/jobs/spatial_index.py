@@ -0,0 +1,62 @@
+"""
+Fixed-size lat/lon grid for radius queries over known locations.
+
+Points are bucketed into CELL_DEGREES x CELL_DEGREES cells once. A "within N miles"
+query only visits the cells overlapping the query's bounding box and runs the exact
+haversine check on the handful of points in them, instead of measuring the distance
+to every location.
+"""
+from __future__ import annotations
+
+import math
+from typing import Dict, Iterable, List, Tuple
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE_LAT = 69.0
+CELL_DEGREES = 0.5
+
+
+def haversine_miles(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in miles."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(min(1.0, math.sqrt(a)))
+
+
+class SpatialGrid:
+    """Grid index over (key, lat, lon) points."""
+
+    def __init__(self, points: Iterable[Tuple[int, float, float]], cell_degrees: float = CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self._cells: Dict[Tuple[int, int], List[Tuple[int, float, float]]] = {}
+        self.size = 0
+        for key, lat, lon in points:
+            self._cells.setdefault(self._cell(lat, lon), []).append((key, float(lat), float(lon)))
+            self.size += 1
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_degrees), math.floor(lon / self.cell_degrees)
+
+    def within(self, lat: float, lon: float, miles: float) -> List[int]:
+        """Return keys of points within `miles` of (lat, lon), nearest first."""
+        if miles <= 0 or not self._cells:
+            return []
+        dlat = miles / MILES_PER_DEGREE_LAT
+        dlon = miles / (MILES_PER_DEGREE_LAT * max(0.01, math.cos(math.radians(lat))))
+        min_y, min_x = self._cell(lat - dlat, lon - dlon)
+        max_y, max_x = self._cell(lat + dlat, lon + dlon)
+
+        hits: List[Tuple[float, int]] = []
+        for y in range(min_y, max_y + 1):
+            for x in range(min_x, max_x + 1):
+                for key, plat, plon in self._cells.get((y, x), ()):
+                    dist = haversine_miles(lat, lon, plat, plon)
+                    if dist <= miles:
+                        hits.append((dist, key))
+        hits.sort()
+        return [key for _dist, key in hits]
+
+
+__all__ = ["EARTH_RADIUS_MILES", "CELL_DEGREES", "haversine_miles", "SpatialGrid"]
@@ -0,0 +1,87 @@
+"""
+Cheap, cached site stats for pages and probes.
+
+get_stats() counts rows exactly, which means scanning the ever-growing jobs table.
+get_cached_stats() instead reads planner estimates: pg_class.reltuples of the partial
+indexes that hold exactly the rows being counted (open jobs, active subscriptions),
+plus an exact count of the small locations table. A relation that has never been
+analyzed reports -1, in which case the exact counts are used. Results are cached in
+process for STATS_CACHE_SECONDS (default 60), so /health probes and dashboard views
+share one query per interval.
+"""
+from __future__ import annotations
+
+import os
+import time
+from typing import Dict, Tuple
+
+from core.db.base import async_connection, get_conn
+from core.db.jobs.jobs_store import get_stats, get_stats_async
+from core.db.statements import register
+
+STATS_CACHE_SECONDS = float(os.getenv("STATS_CACHE_SECONDS", "60"))
+
+_ESTIMATE_STATS = register("stats.estimate", """
+    SELECT
+      (SELECT reltuples FROM pg_class WHERE oid = 'idx_jobs_open_last_seen'::regclass)::bigint AS jobs,
+      (SELECT reltuples FROM pg_class WHERE oid = 'idx_subscriptions_active_region_all'::regclass)::bigint
+        AS active_subscriptions,
+      (SELECT COUNT(*) FROM locations WHERE active = 1) AS locations
+""")
+
+_cache: Tuple[float, Dict] | None = None
+
+
+def _fresh() -> Dict | None:
+    if _cache is not None and _cache[0] > time.monotonic():
+        return dict(_cache[1])
+    return None
+
+
+def _store(stats: Dict) -> Dict:
+    global _cache
+    _cache = (time.monotonic() + STATS_CACHE_SECONDS, dict(stats))
+    return stats
+
+
+def _usable(row: Dict) -> bool:
+    return all(value is not None and value >= 0 for value in row.values())
+
+
+def estimate_stats() -> Dict:
+    """Estimated counts (same keys as get_stats()); exact when estimates are unavailable."""
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute(_ESTIMATE_STATS)
+    row = dict(cur.fetchone())
+    conn.close()
+    return row if _usable(row) else get_stats()
+
+
+def get_cached_stats() -> Dict:
+    """estimate_stats(), cached for STATS_CACHE_SECONDS."""
+    return _fresh() or _store(estimate_stats())
+
+
+async def get_cached_stats_async() -> Dict:
+    cached = _fresh()
+    if cached is not None:
+        return cached
+    async with async_connection() as conn:
+        cur = await conn.cursor().execute(_ESTIMATE_STATS)
+        row = dict(await cur.fetchone())
+    return _store(row if _usable(row) else await get_stats_async())
+
+
+def clear_stats_cache() -> None:
+    global _cache
+    _cache = None
+
+
+__all__ = [
+    "STATS_CACHE_SECONDS",
+    "estimate_stats",
+    "get_cached_stats",
+    "get_cached_stats_async",
+    "clear_stats_cache",
+]
@@ -0,0 +1,308 @@
+"""
+Versioned schema migrations.
+
+init_db() still creates the tables idempotently; changes after that live here as
+numbered migrations. run_migrations() records every applied version in
+`schema_version` and applies the missing ones in order, under an advisory lock so a
+web process and a worker starting together do not race.
+
+Concurrent migrations run their statements in autocommit mode, which is what
+CREATE INDEX CONCURRENTLY needs: the index is built without blocking writes to the
+table. Such a build can fail halfway and leave an INVALID index behind; IF NOT EXISTS
+would then skip it, so an invalid index of the same name is dropped before retrying.
+Other migrations run in one transaction together with their version row.
+
+check_hot_query_plans() EXPLAINs the hot queries with sequential scans disabled and
+reports any that do not use their index. Like any plan, the answer is only meaningful
+on analyzed tables holding realistic data; `python -m scripts.migrate` runs both.
+"""
+from __future__ import annotations
+
+import re
+from typing import Dict, List, Sequence, Tuple
+
+from core.db.base import _connect, _ConnWrapper, close_pool, get_conn
+from core.db.statements import get_statement
+
+# Arbitrary, fixed key for pg_advisory_lock().
+_LOCK_KEY = 7_204_311
+
+_CREATE_INDEX_CONCURRENTLY = re.compile(
+    r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+IF\s+NOT\s+EXISTS\s+(\w+)", re.IGNORECASE
+)
+
+
+class Migration:
+    """One schema version: its statements, and whether they must run outside a transaction."""
+
+    __slots__ = ("version", "name", "statements", "concurrent")
+
+    def __init__(self, version: int, name: str, statements: Sequence[str], concurrent: bool = False):
+        self.version = version
+        self.name = name
+        self.statements = tuple(statements)
+        self.concurrent = concurrent
+
+    def __repr__(self) -> str:
+        return f"Migration({self.version}, {self.name!r})"
+
+
+TIMESTAMP_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "users": ("created_at", "email_verified_at"),
+    "jobs": ("first_seen_at", "last_seen_at", "closed_at"),
+    "subscriptions": ("created_at", "last_deactivated_at"),
+    "sessions": ("created_at", "last_seen_at", "expires_at"),
+    "activation_events": ("activated_at",),
+    "password_reset_tokens": ("created_at", "expires_at", "used_at"),
+    "email_verification_tokens": ("created_at", "expires_at", "used_at"),
+    "alert_deliveries": ("created_at", "sent_at"),
+    "deleted_users": ("created_at", "deleted_at"),
+    "deleted_subscriptions": ("created_at", "deleted_at"),
+    "schema_version": ("applied_at",),
+}
+
+# Timestamps used to be naive UTC ISO strings in TEXT columns ('' meaning "not set").
+# One ALTER per table, so each table is rewritten once; columns that are already
+# timestamptz (databases created after this migration) are left alone.
+_TO_TIMESTAMPTZ = """
+DO $$
+DECLARE t record;
+BEGIN
+  FOR t IN
+    SELECT table_name,
+           string_agg(format(
+             'ALTER COLUMN %I TYPE timestamptz USING nullif(%I, '''')::timestamp AT TIME ZONE ''UTC''',
+             column_name, column_name), ', ') AS alters
+    FROM information_schema.columns
+    WHERE table_schema = current_schema() AND data_type = 'text'
+      AND (table_name, column_name) IN (VALUES {columns})
+    GROUP BY table_name
+  LOOP
+    EXECUTE format('ALTER TABLE %I ', t.table_name) || t.alters;
+  END LOOP;
+END $$
+""".replace("{columns}", ", ".join(
+    f"('{table}', '{column}')" for table, columns in TIMESTAMP_COLUMNS.items() for column in columns
+))
+
+MIGRATIONS: List[Migration] = [
+    Migration(
+        1,
+        "hot-path indexes",
+        [
+            # Worker: get_active_subscriptions(region=...). Its coalesce() predicate could
+            # only ever filter the old plain region index, never seek it.
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_subscriptions_active_region_all "
+            "ON subscriptions ((coalesce(region, 'all'))) WHERE active = 1",
+            "DROP INDEX CONCURRENTLY IF EXISTS idx_subscriptions_active_region",
+            # Dashboard / account pages: get_subscriptions_for_email().
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_subscriptions_email_lower "
+            "ON subscriptions (lower(email), created_at DESC, id DESC)",
+            # My alerts: get_alert_deliveries_for_user().
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_alert_deliveries_user_created "
+            "ON alert_deliveries (user_id, created_at DESC, id DESC)",
+            # Admin job list and worker windows: get_all_jobs() newest first.
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_jobs_first_seen ON jobs (first_seen_at DESC, id DESC)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_jobs_open_first_seen "
+            "ON jobs (first_seen_at DESC, id DESC) WHERE closed_at IS NULL",
+            # purge_expired_sessions() and delete_user_data().
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sessions_expires ON sessions (expires_at)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sessions_user ON sessions (user_id)",
+        ],
+        concurrent=True,
+    ),
+    Migration(2, "timestamptz timestamps", [_TO_TIMESTAMPTZ]),
+    Migration(
+        3,
+        "job location resolution marker",
+        [
+            # Set once a job's location has been resolved, whether or not it matched any
+            # canonical location, so backfill_job_locations() never re-scans it.
+            "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS locations_resolved_at TIMESTAMPTZ",
+            "UPDATE jobs j SET locations_resolved_at = coalesce(j.first_seen_at, now()) "
+            "WHERE EXISTS (SELECT 1 FROM job_locations jl WHERE jl.job_id = j.id)",
+            "CREATE INDEX IF NOT EXISTS idx_jobs_locations_unresolved ON jobs (id) "
+            "WHERE locations_resolved_at IS NULL",
+        ],
+    ),
+    Migration(
+        4,
+        "US seed locations country",
+        [
+            # Seeded without a country, so they defaulted to the UK and subscriptions
+            # naming them were tagged 'uk'. Cleared regions are re-derived by
+            # backfill_subscription_regions() once the catalog is corrected.
+            "UPDATE locations SET country = 'United States' "
+            "WHERE code IS NULL AND (name, region) IN (('Weston', 'WI'), ('Charlton', 'MA'), ('Portland', 'OR'))",
+            "UPDATE subscriptions SET region = NULL "
+            "WHERE region = 'uk' AND preferred_location ~* '(weston|charlton|portland)'",
+        ],
+    ),
+    Migration(
+        5,
+        "job pay parse marker",
+        [
+            # Set once pay has been parsed, whether or not it yielded an amount, so
+            # backfill_job_pay() never re-reads unparseable pay text.
+            "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS pay_parsed_at TIMESTAMPTZ",
+            "UPDATE jobs SET pay_parsed_at = coalesce(first_seen_at, now()) "
+            "WHERE pay_minor IS NOT NULL OR coalesce(pay, '') = ''",
+            "CREATE INDEX IF NOT EXISTS idx_jobs_pay_unparsed ON jobs (id) WHERE pay_parsed_at IS NULL",
+        ],
+    ),
+    Migration(
+        6,
+        "subscription tokens marker",
+        [
+            # Set whenever a subscription's tokens are built, so backfill_subscription_tokens()
+            # does not re-resolve subscriptions whose preference yields no rows.
+            "ALTER TABLE subscriptions ADD COLUMN IF NOT EXISTS tokens_built_at TIMESTAMPTZ",
+            "UPDATE subscriptions s SET tokens_built_at = now() "
+            "WHERE EXISTS (SELECT 1 FROM subscription_tokens st WHERE st.subscription_id = s.id)",
+            "CREATE INDEX IF NOT EXISTS idx_subscriptions_tokens_unbuilt ON subscriptions (id) "
+            "WHERE tokens_built_at IS NULL",
+        ],
+    ),
+]
+
+# (label, SQL, params, index the plan must use); SQL None means the registered
+# statement named label. The two job queries are what get_all_jobs(limit=...) builds.
+HOT_QUERIES: List[Tuple[str, str | None, tuple, str]] = [
+    ("subscriptions.active_in_region", None, ("uk",), "idx_subscriptions_active_region_all"),
+    ("subscriptions.for_email", None, ("a@example.com",), "idx_subscriptions_email_lower"),
+    ("deliveries.for_user", None, (1, 200), "idx_alert_deliveries_user_created"),
+    ("jobs.recent_open",
+     "SELECT id FROM jobs WHERE closed_at IS NULL ORDER BY first_seen_at DESC, id DESC LIMIT ?", (100,),
+     "idx_jobs_open_first_seen"),
+    ("jobs.recent",
+     "SELECT id FROM jobs ORDER BY first_seen_at DESC, id DESC LIMIT ?", (100,), "idx_jobs_first_seen"),
+    ("sessions.purge_expired", None, (), "idx_sessions_expires"),
+]
+
+
+def _autocommit_conn() -> _ConnWrapper:
+    return _ConnWrapper(_connect(autocommit=True), "postgres")
+
+
+def applied_versions() -> List[int]:
+    """Versions recorded in schema_version (empty before the first run)."""
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT to_regclass('schema_version') AS t")
+    if cur.fetchone()["t"] is None:
+        conn.close()
+        return []
+    cur.execute("SELECT version FROM schema_version ORDER BY version")
+    versions = [row["version"] for row in cur.fetchall()]
+    conn.close()
+    return versions
+
+
+def _drop_invalid_index(cur, statement: str) -> None:
+    match = _CREATE_INDEX_CONCURRENTLY.match(statement.strip())
+    if not match:
+        return
+    cur.execute(
+        """
+        SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = ? AND NOT i.indisvalid
+        """,
+        (match.group(1),),
+    )
+    if cur.fetchone():
+        print(f"[db] migrations: dropping invalid index {match.group(1)}")
+        cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {match.group(1)}")
+
+
+def _apply(cur, migration: Migration) -> None:
+    record = ("INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, now())",
+              (migration.version, migration.name))
+    if migration.concurrent:
+        for statement in migration.statements:
+            _drop_invalid_index(cur, statement)
+            cur.execute(statement)
+        cur.execute(*record)
+        return
+    cur.execute("BEGIN")
+    try:
+        for statement in migration.statements:
+            cur.execute(statement)
+        cur.execute(*record)
+    except Exception:
+        cur.execute("ROLLBACK")
+        raise
+    cur.execute("COMMIT")
+
+
+def run_migrations(migrations: Sequence[Migration] | None = None) -> List[int]:
+    """Apply pending migrations in version order. Returns the versions applied by this call."""
+    migrations = sorted(MIGRATIONS if migrations is None else migrations, key=lambda m: m.version)
+    done = set(applied_versions())
+    if all(m.version in done for m in migrations):
+        return []
+
+    conn = _autocommit_conn()
+    cur = conn.cursor()
+    applied: List[int] = []
+    try:
+        cur.execute("SELECT pg_advisory_lock(?)", (_LOCK_KEY,))
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS schema_version(
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TIMESTAMPTZ NOT NULL
+            )
+            """
+        )
+        # Re-read under the lock: another process may have migrated meanwhile.
+        cur.execute("SELECT version FROM schema_version")
+        done = {row["version"] for row in cur.fetchall()}
+        for migration in migrations:
+            if migration.version in done:
+                continue
+            _apply(cur, migration)
+            applied.append(migration.version)
+            print(f"[db] migrations: applied {migration.version} ({migration.name})")
+    finally:
+        try:
+            cur.execute("SELECT pg_advisory_unlock(?)", (_LOCK_KEY,))
+        finally:
+            conn.close()
+    if applied:
+        # Pooled connections may hold prepared plans for the old column types.
+        close_pool()
+    return applied
+
+
+def explain_hot_query(sql: str, params: tuple) -> str:
+    """Text plan of sql with sequential scans disabled."""
+    conn = get_conn()
+    cur = conn.cursor()
+    try:
+        cur.execute("SET LOCAL enable_seqscan = off")
+        cur.execute("EXPLAIN " + sql, params)
+        return "\n".join(row["QUERY PLAN"] for row in cur.fetchall())
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+def check_hot_query_plans() -> List[Dict]:
+    """One row per HOT_QUERIES entry: label, expected index, ok, plan."""
+    results = []
+    for label, sql, params, index in HOT_QUERIES:
+        plan = explain_hot_query(sql or get_statement(label).sql, params)
+        results.append({"label": label, "index": index, "ok": index in plan, "plan": plan})
+    return results
+
+
+__all__ = [
+    "MIGRATIONS",
+    "HOT_QUERIES",
+    "Migration",
+    "applied_versions",
+    "run_migrations",
+    "explain_hot_query",
+    "check_hot_query_plans",
+]
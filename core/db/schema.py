@@ -5,73 +5,79 @@ from __future__ import annotations
 
 import os
 import secrets
-from datetime import datetime
 
+from app.area_groups import AREA_GROUPS
 from core.db.base import get_conn
+from core.db.migrations import run_migrations
+from core.db.jobs.job_identity import backfill_job_identity
+from core.db.jobs.jobs_store import backfill_job_kinds, backfill_job_pay, backfill_job_regions
+from core.db.jobs.location_index import backfill_job_locations, clear_location_cache
+from core.db.subscriptions.subs_store import backfill_subscription_kinds, backfill_subscription_regions
+from core.db.subscriptions.token_index import backfill_subscription_tokens
 from core.db.users import create_user, get_user_by_email, hash_password
 
 # --- Canonical Amazon UK locations (real sites from public lists) ---
 # You can add/remove rows here later if you want.
 DEFAULT_LOCATIONS = [
     # Major cities / areas
-    {"code": None, "name": "Birmingham", "region": "West Midlands"},
-    {"code": None, "name": "Manchester", "region": "Greater Manchester"},
-    {"code": None, "name": "Leeds", "region": "West Yorkshire"},
-    {"code": None, "name": "London", "region": "Greater London"},
-    {"code": None, "name": "Cardiff", "region": "Wales"},
-    {"code": None, "name": "Swansea", "region": "Wales"},
-    {"code": None, "name": "Bristol", "region": "South West"},
-    {"code": None, "name": "Newport", "region": "Wales"},
-    {"code": None, "name": "Glasgow", "region": "Scotland"},
-    {"code": None, "name": "Edinburgh", "region": "Scotland"},
-    {"code": None, "name": "Belfast", "region": "Northern Ireland"},
+    {"code": None, "name": "Birmingham", "region": "West Midlands", "lat": 52.4862, "lon": -1.8904},
+    {"code": None, "name": "Manchester", "region": "Greater Manchester", "lat": 53.4808, "lon": -2.2426},
+    {"code": None, "name": "Leeds", "region": "West Yorkshire", "lat": 53.8008, "lon": -1.5491},
+    {"code": None, "name": "London", "region": "Greater London", "lat": 51.5074, "lon": -0.1278},
+    {"code": None, "name": "Cardiff", "region": "Wales", "lat": 51.4816, "lon": -3.1791},
+    {"code": None, "name": "Swansea", "region": "Wales", "lat": 51.6214, "lon": -3.9436},
+    {"code": None, "name": "Bristol", "region": "South West", "lat": 51.4545, "lon": -2.5879},
+    {"code": None, "name": "Newport", "region": "Wales", "lat": 51.5842, "lon": -2.9977},
+    {"code": None, "name": "Glasgow", "region": "Scotland", "lat": 55.8642, "lon": -4.2518},
+    {"code": None, "name": "Edinburgh", "region": "Scotland", "lat": 55.9533, "lon": -3.1883},
+    {"code": None, "name": "Belfast", "region": "Northern Ireland", "lat": 54.5973, "lon": -5.9301},
     # England - Midlands & North (actual FC / DS towns)
-    {"code": "BHX1", "name": "Rugeley", "region": "Staffordshire"},
-    {"code": "BHX2", "name": "Coalville", "region": "Leicestershire"},
-    {"code": "BHX3", "name": "Daventry", "region": "Northamptonshire"},
-    {"code": "BHX4", "name": "Coventry", "region": "West Midlands"},
-    {"code": "BHX5", "name": "Rugby", "region": "Warwickshire"},
-    {"code": "BHX8", "name": "Redditch", "region": "Worcestershire"},
-    {"code": "MAN2", "name": "Warrington", "region": "Cheshire"},
-    {"code": "MAN3", "name": "Bolton", "region": "Greater Manchester"},
-    {"code": "MAN4", "name": "Chesterfield", "region": "Derbyshire"},
-    {"code": "LBA1", "name": "Doncaster", "region": "South Yorkshire"},
-    {"code": "LBA2", "name": "Doncaster (LBA2)", "region": "South Yorkshire"},
-    {"code": "LBA3", "name": "Doncaster (LBA3)", "region": "South Yorkshire"},
-    {"code": "LBA4", "name": "Doncaster (LBA4)", "region": "South Yorkshire"},
-    {"code": "DXS1", "name": "Sheffield", "region": "South Yorkshire"},
-    {"code": "NCL2", "name": "Billingham", "region": "County Durham"},
-    {"code": "MME1", "name": "Darlington", "region": "County Durham"},
-    {"code": "DPN1", "name": "Carlisle", "region": "Cumbria"},
+    {"code": "BHX1", "name": "Rugeley", "region": "Staffordshire", "lat": 52.7597, "lon": -1.9365},
+    {"code": "BHX2", "name": "Coalville", "region": "Leicestershire", "lat": 52.7225, "lon": -1.37},
+    {"code": "BHX3", "name": "Daventry", "region": "Northamptonshire", "lat": 52.2565, "lon": -1.1627},
+    {"code": "BHX4", "name": "Coventry", "region": "West Midlands", "lat": 52.4068, "lon": -1.5197},
+    {"code": "BHX5", "name": "Rugby", "region": "Warwickshire", "lat": 52.3709, "lon": -1.265},
+    {"code": "BHX8", "name": "Redditch", "region": "Worcestershire", "lat": 52.3093, "lon": -1.9453},
+    {"code": "MAN2", "name": "Warrington", "region": "Cheshire", "lat": 53.39, "lon": -2.597},
+    {"code": "MAN3", "name": "Bolton", "region": "Greater Manchester", "lat": 53.5769, "lon": -2.4282},
+    {"code": "MAN4", "name": "Chesterfield", "region": "Derbyshire", "lat": 53.235, "lon": -1.421},
+    {"code": "LBA1", "name": "Doncaster", "region": "South Yorkshire", "lat": 53.5228, "lon": -1.1285},
+    {"code": "LBA2", "name": "Doncaster (LBA2)", "region": "South Yorkshire", "lat": 53.487, "lon": -1.071},
+    {"code": "LBA3", "name": "Doncaster (LBA3)", "region": "South Yorkshire", "lat": 53.478, "lon": -1.056},
+    {"code": "LBA4", "name": "Doncaster (LBA4)", "region": "South Yorkshire", "lat": 53.508, "lon": -1.085},
+    {"code": "DXS1", "name": "Sheffield", "region": "South Yorkshire", "lat": 53.3811, "lon": -1.4701},
+    {"code": "NCL2", "name": "Billingham", "region": "County Durham", "lat": 54.6056, "lon": -1.2797},
+    {"code": "MME1", "name": "Darlington", "region": "County Durham", "lat": 54.5236, "lon": -1.5595},
+    {"code": "DPN1", "name": "Carlisle", "region": "Cumbria", "lat": 54.8925, "lon": -2.9329},
     # England - South & East
-    {"code": "LCY2", "name": "Tilbury", "region": "Essex"},
-    {"code": "LCY3", "name": "Dartford", "region": "Kent"},
-    {"code": "LCY8", "name": "Rochester", "region": "Kent"},
-    {"code": "DME4", "name": "Aylesford", "region": "Kent"},
-    {"code": "LTN1", "name": "Milton Keynes (Ridgmont)", "region": "Buckinghamshire"},
-    {"code": "ALT1", "name": "Milton Keynes (Northfield)", "region": "Buckinghamshire"},
-    {"code": "LTN7", "name": "Bedford", "region": "Bedfordshire"},
+    {"code": "LCY2", "name": "Tilbury", "region": "Essex", "lat": 51.4628, "lon": 0.3582},
+    {"code": "LCY3", "name": "Dartford", "region": "Kent", "lat": 51.4462, "lon": 0.2169},
+    {"code": "LCY8", "name": "Rochester", "region": "Kent", "lat": 51.388, "lon": 0.506},
+    {"code": "DME4", "name": "Aylesford", "region": "Kent", "lat": 51.303, "lon": 0.479},
+    {"code": "LTN1", "name": "Milton Keynes (Ridgmont)", "region": "Buckinghamshire", "lat": 52.026, "lon": -0.58},
+    {"code": "ALT1", "name": "Milton Keynes (Northfield)", "region": "Buckinghamshire", "lat": 52.058, "lon": -0.723},
+    {"code": "LTN7", "name": "Bedford", "region": "Bedfordshire", "lat": 52.136, "lon": -0.4667},
     # England - South West
-    {"code": "BRS1", "name": "Bristol (BRS1)", "region": "South West"},
-    {"code": "BRS2", "name": "Swindon", "region": "South West"},
+    {"code": "BRS1", "name": "Bristol (BRS1)", "region": "South West", "lat": 51.503, "lon": -2.69},
+    {"code": "BRS2", "name": "Swindon", "region": "South West", "lat": 51.5558, "lon": -1.7797},
     # Wales (FC / DS towns)
-    {"code": "DCF1", "name": "Newport (DCF1)", "region": "Wales"},
-    {"code": "CWL1", "name": "Port Talbot", "region": "Wales"},
+    {"code": "DCF1", "name": "Newport (DCF1)", "region": "Wales", "lat": 51.55, "lon": -2.93},
+    {"code": "CWL1", "name": "Port Talbot", "region": "Wales", "lat": 51.592, "lon": -3.78},
     # Scotland
-    {"code": "EDI4", "name": "Dunfermline", "region": "Scotland"},
-    {"code": "DEH1", "name": "Edinburgh (DEH1)", "region": "Scotland"},
-    {"code": "HEH1", "name": "Edinburgh (HEH1)", "region": "Scotland"},
-    {"code": "DXG1", "name": "Glasgow (DXG1)", "region": "Scotland"},
-    {"code": "DXG2", "name": "Glasgow (DXG2)", "region": "Scotland"},
-    {"code": "DDD1", "name": "Dundee", "region": "Scotland"},
-    {"code": "SEH1", "name": "Bathgate", "region": "Scotland"},
+    {"code": "EDI4", "name": "Dunfermline", "region": "Scotland", "lat": 56.0717, "lon": -3.452},
+    {"code": "DEH1", "name": "Edinburgh (DEH1)", "region": "Scotland", "lat": 55.93, "lon": -3.3},
+    {"code": "HEH1", "name": "Edinburgh (HEH1)", "region": "Scotland", "lat": 55.95, "lon": -3.35},
+    {"code": "DXG1", "name": "Glasgow (DXG1)", "region": "Scotland", "lat": 55.85, "lon": -4.3},
+    {"code": "DXG2", "name": "Glasgow (DXG2)", "region": "Scotland", "lat": 55.87, "lon": -4.2},
+    {"code": "DDD1", "name": "Dundee", "region": "Scotland", "lat": 56.462, "lon": -2.9707},
+    {"code": "SEH1", "name": "Bathgate", "region": "Scotland", "lat": 55.902, "lon": -3.643},
     # Northern Ireland - delivery stations
-    {"code": None, "name": "Portadown", "region": "Northern Ireland"},
+    {"code": None, "name": "Portadown", "region": "Northern Ireland", "lat": 54.423, "lon": -6.444},
 
     # --- US test locations (added for cross-region testing) ---
-    {"code": None, "name": "Weston", "region": "WI"},
-    {"code": None, "name": "Charlton", "region": "MA"},
-    {"code": None, "name": "Portland", "region": "OR"},
+    {"code": None, "name": "Weston", "region": "WI", "country": "United States", "lat": 44.89, "lon": -89.55},
+    {"code": None, "name": "Charlton", "region": "MA", "country": "United States", "lat": 42.1354, "lon": -71.9701},
+    {"code": None, "name": "Portland", "region": "OR", "country": "United States", "lat": 45.5152, "lon": -122.6784},
 ]
 
 
@@ -88,8 +94,8 @@ def init_db() -> None:
             password_hash TEXT NOT NULL,
             role TEXT NOT NULL DEFAULT 'user',
             active INTEGER NOT NULL DEFAULT 1,
-            created_at TEXT,
-            email_verified_at TEXT
+            created_at TIMESTAMPTZ,
+            email_verified_at TIMESTAMPTZ
         )
         """
     )
@@ -103,8 +109,8 @@ def init_db() -> None:
             pay TEXT,
             location TEXT,
             url TEXT,
-            first_seen_at TEXT,
-            UNIQUE(title, location, url)
+            first_seen_at TIMESTAMPTZ,
+            content_hash TEXT
         )
         """
     )
@@ -129,10 +135,10 @@ def init_db() -> None:
             email TEXT NOT NULL,
             preferred_location TEXT,
             job_type TEXT,
-            created_at TEXT,
+            created_at TIMESTAMPTZ,
             active INTEGER DEFAULT 1,
             updated_once INTEGER DEFAULT 0,
-            last_deactivated_at TEXT,
+            last_deactivated_at TIMESTAMPTZ,
             needs_pref_update INTEGER DEFAULT 0,
             FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE
         )
@@ -143,9 +149,9 @@ def init_db() -> None:
         CREATE TABLE IF NOT EXISTS sessions(
             id TEXT PRIMARY KEY,
             user_id INTEGER NOT NULL,
-            created_at TEXT NOT NULL,
-            last_seen_at TEXT NOT NULL,
-            expires_at TEXT NOT NULL,
+            created_at TIMESTAMPTZ NOT NULL,
+            last_seen_at TIMESTAMPTZ NOT NULL,
+            expires_at TIMESTAMPTZ NOT NULL,
             FOREIGN KEY(user_id) REFERENCES users(id)
         )
         """
@@ -157,7 +163,7 @@ def init_db() -> None:
             activation_code TEXT NOT NULL UNIQUE,
             user_id INTEGER NOT NULL,
             subscription_id INTEGER NOT NULL,
-            activated_at TEXT NOT NULL,
+            activated_at TIMESTAMPTZ NOT NULL,
             FOREIGN KEY(user_id) REFERENCES users(id),
             FOREIGN KEY(subscription_id) REFERENCES subscriptions(id)
         )
@@ -169,9 +175,9 @@ def init_db() -> None:
             id SERIAL PRIMARY KEY,
             user_id INTEGER NOT NULL,
             token TEXT NOT NULL UNIQUE,
-            created_at TEXT NOT NULL,
-            expires_at TEXT NOT NULL,
-            used_at TEXT,
+            created_at TIMESTAMPTZ NOT NULL,
+            expires_at TIMESTAMPTZ NOT NULL,
+            used_at TIMESTAMPTZ,
             FOREIGN KEY(user_id) REFERENCES users(id)
         )
         """
@@ -182,9 +188,9 @@ def init_db() -> None:
             id SERIAL PRIMARY KEY,
             user_id INTEGER NOT NULL,
             token TEXT NOT NULL UNIQUE,
-            created_at TEXT NOT NULL,
-            expires_at TEXT NOT NULL,
-            used_at TEXT,
+            created_at TIMESTAMPTZ NOT NULL,
+            expires_at TIMESTAMPTZ NOT NULL,
+            used_at TIMESTAMPTZ,
             FOREIGN KEY(user_id) REFERENCES users(id)
         )
         """
@@ -197,8 +203,8 @@ def init_db() -> None:
             subscription_id INTEGER NOT NULL,
             job_id INTEGER NOT NULL,
             status TEXT NOT NULL DEFAULT 'queued',
-            created_at TEXT NOT NULL,
-            sent_at TEXT,
+            created_at TIMESTAMPTZ NOT NULL,
+            sent_at TIMESTAMPTZ,
             error TEXT,
             FOREIGN KEY(user_id) REFERENCES users(id),
             FOREIGN KEY(subscription_id) REFERENCES subscriptions(id),
@@ -207,6 +213,98 @@ def init_db() -> None:
         )
         """
     )
+    # Coordinates for radius subscriptions ("within N miles of X").
+    cur.execute("ALTER TABLE locations ADD COLUMN IF NOT EXISTS lat DOUBLE PRECISION")
+    cur.execute("ALTER TABLE locations ADD COLUMN IF NOT EXISTS lon DOUBLE PRECISION")
+    cur.execute("ALTER TABLE subscriptions ADD COLUMN IF NOT EXISTS radius_miles INTEGER")
+    # Job type/duration as bitmask flags (see core.db.jobs.job_kinds).
+    cur.execute("ALTER TABLE jobs ADD COLUMN IF NOT EXISTS kind_mask INTEGER")
+    cur.execute("ALTER TABLE subscriptions ADD COLUMN IF NOT EXISTS job_kind_mask INTEGER")
+    # Hourly pay in minor units (pence/cents) parsed from jobs.pay (see core.db.jobs.pay).
+    cur.execute("ALTER TABLE jobs ADD COLUMN IF NOT EXISTS pay_minor INTEGER")
+    cur.execute("ALTER TABLE jobs ADD COLUMN IF NOT EXISTS pay_currency TEXT")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_jobs_pay_minor ON jobs(pay_minor)")
+    cur.execute("ALTER TABLE subscriptions ADD COLUMN IF NOT EXISTS min_pay_minor INTEGER")
+    # Canonical job identity (see core.db.jobs.job_identity); its unique index is created
+    # by backfill_job_identity() once existing duplicates are merged.
+    cur.execute("ALTER TABLE jobs ADD COLUMN IF NOT EXISTS content_hash TEXT")
+    cur.execute("ALTER TABLE jobs DROP CONSTRAINT IF EXISTS jobs_title_location_url_key")
+    # Lifecycle: last time a scrape listed the job, when it stopped being listed, and a
+    # hash of its mutable details (type/duration/pay) to detect changed postings.
+    cur.execute("ALTER TABLE jobs ADD COLUMN IF NOT EXISTS last_seen_at TIMESTAMPTZ")
+    cur.execute("ALTER TABLE jobs ADD COLUMN IF NOT EXISTS closed_at TIMESTAMPTZ")
+    cur.execute("ALTER TABLE jobs ADD COLUMN IF NOT EXISTS detail_hash TEXT")
+    # first_seen_at may still be TEXT here; migration 2 converts it.
+    cur.execute("UPDATE jobs SET last_seen_at = nullif(first_seen_at::text, '')::timestamptz WHERE last_seen_at IS NULL")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_jobs_open_last_seen ON jobs(last_seen_at) WHERE closed_at IS NULL")
+    # Region partitioning between the UK and US workers (see core.db.jobs.location_index).
+    cur.execute("ALTER TABLE jobs ADD COLUMN IF NOT EXISTS region TEXT")
+    cur.execute("ALTER TABLE subscriptions ADD COLUMN IF NOT EXISTS region TEXT")
+    # Candidate windows only ever read open jobs.
+    cur.execute("DROP INDEX IF EXISTS idx_jobs_region_first_seen")
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_jobs_open_region_first_seen ON jobs(region, first_seen_at DESC) "
+        "WHERE closed_at IS NULL"
+    )
+    # "Already sent to this email?" lookups by job in the SQL matcher.
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_alert_deliveries_job ON alert_deliveries(job_id)")
+    # Expanded location tokens per subscription, for SQL-side matching
+    # (see core.db.subscriptions.token_index / core.db.alerts.matching_store).
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS subscription_tokens(
+            subscription_id INTEGER NOT NULL,
+            location_id INTEGER,
+            area_group_id INTEGER,
+            token TEXT,
+            match_all INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY(subscription_id) REFERENCES subscriptions(id) ON DELETE CASCADE
+        )
+        """
+    )
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_subscription_tokens_sub ON subscription_tokens(subscription_id)")
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_subscription_tokens_location ON subscription_tokens(location_id, subscription_id) "
+        "WHERE location_id IS NOT NULL"
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_subscription_tokens_group ON subscription_tokens(area_group_id, subscription_id) "
+        "WHERE area_group_id IS NOT NULL"
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_subscription_tokens_free ON subscription_tokens(subscription_id) "
+        "WHERE token IS NOT NULL OR match_all = 1"
+    )
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS area_groups(
+            id SERIAL PRIMARY KEY,
+            label TEXT NOT NULL UNIQUE
+        )
+        """
+    )
+    # Canonical location / area-group ids resolved once per job at ingest.
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS job_locations(
+            job_id INTEGER NOT NULL,
+            location_id INTEGER,
+            area_group_id INTEGER,
+            FOREIGN KEY(job_id) REFERENCES jobs(id) ON DELETE CASCADE,
+            FOREIGN KEY(location_id) REFERENCES locations(id) ON DELETE CASCADE,
+            FOREIGN KEY(area_group_id) REFERENCES area_groups(id) ON DELETE CASCADE
+        )
+        """
+    )
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_job_locations_job ON job_locations(job_id)")
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_job_locations_location ON job_locations(location_id, job_id) "
+        "WHERE location_id IS NOT NULL"
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_job_locations_group ON job_locations(area_group_id, job_id) "
+        "WHERE area_group_id IS NOT NULL"
+    )
     cur.execute(
         """
         CREATE TABLE IF NOT EXISTS deleted_users(
@@ -214,8 +312,8 @@ def init_db() -> None:
             user_id INTEGER NOT NULL,
             email TEXT NOT NULL,
             role TEXT NOT NULL,
-            created_at TEXT,
-            deleted_at TEXT NOT NULL
+            created_at TIMESTAMPTZ,
+            deleted_at TIMESTAMPTZ NOT NULL
         )
         """
     )
@@ -228,9 +326,9 @@ def init_db() -> None:
             email TEXT NOT NULL,
             preferred_location TEXT,
             job_type TEXT,
-            created_at TEXT,
+            created_at TIMESTAMPTZ,
             active INTEGER,
-            deleted_at TEXT NOT NULL
+            deleted_at TIMESTAMPTZ NOT NULL
         )
         """
     )
@@ -238,9 +336,21 @@ def init_db() -> None:
     conn.commit()
     conn.close()
 
+    # Indexes and later schema changes are versioned (see core.db.migrations).
+    run_migrations()
+
     seed_default_locations()
+    seed_area_groups()
     ensure_admin_from_env()
     backfill_users_from_subscriptions()
+    backfill_job_identity()
+    backfill_job_locations()
+    backfill_job_kinds()
+    backfill_job_pay()
+    backfill_job_regions()
+    backfill_subscription_kinds()
+    backfill_subscription_regions()
+    backfill_subscription_tokens()
 
 
 def seed_default_locations() -> None:
@@ -251,8 +361,8 @@ def seed_default_locations() -> None:
     for loc in DEFAULT_LOCATIONS:
         cur.execute(
             """
-            INSERT INTO locations (code, name, region, country, active)
-            VALUES (%s, %s, %s, %s, 1)
+            INSERT INTO locations (code, name, region, country, active, lat, lon)
+            VALUES (%s, %s, %s, %s, 1, %s, %s)
             ON CONFLICT (name, region, code) DO NOTHING
             """,
             (
@@ -260,11 +370,32 @@ def seed_default_locations() -> None:
                 loc.get("name"),
                 loc.get("region"),
                 loc.get("country") or "United Kingdom",
+                loc.get("lat"),
+                loc.get("lon"),
             ),
         )
+        # Fill coordinates for rows seeded before lat/lon existed.
+        cur.execute(
+            "UPDATE locations SET lat = %s, lon = %s WHERE name = %s AND lat IS NULL",
+            (loc.get("lat"), loc.get("lon"), loc.get("name")),
+        )
+
+    conn.commit()
+    conn.close()
+    clear_location_cache()
+
 
+def seed_area_groups() -> None:
+    """Insert AREA_GROUPS labels into the area_groups table (idempotent)."""
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.executemany(
+        "INSERT INTO area_groups (label) VALUES (%s) ON CONFLICT (label) DO NOTHING",
+        [(label,) for label in AREA_GROUPS],
+    )
     conn.commit()
     conn.close()
+    clear_location_cache()
 
 
 def ensure_admin_from_env() -> None:
@@ -279,7 +410,6 @@ def ensure_admin_from_env() -> None:
         return
 
     existing = get_user_by_email(admin_email)
-    now = datetime.utcnow().isoformat(timespec="seconds")
 
     if existing:
         conn = get_conn()
@@ -294,8 +424,8 @@ def ensure_admin_from_env() -> None:
             (hash_password(admin_password), admin_email.strip().lower()),
         )
         cur.execute(
-            "UPDATE users SET email_verified_at = %s WHERE email = %s AND (email_verified_at IS NULL OR email_verified_at = '')",
-            (now, admin_email.strip().lower()),
+            "UPDATE users SET email_verified_at = now() WHERE email = %s AND email_verified_at IS NULL",
+            (admin_email.strip().lower(),),
         )
         conn.commit()
         conn.close()
@@ -337,6 +467,7 @@ __all__ = [
     "DEFAULT_LOCATIONS",
     "init_db",
     "seed_default_locations",
+    "seed_area_groups",
     "ensure_admin_from_env",
     "backfill_users_from_subscriptions",
 ]
@@ -0,0 +1,91 @@
+"""
+Named SQL statements for hot queries.
+
+register() converts the `?` placeholders once, at import time, and returns a
+Statement. Passing a Statement to cursor.execute() (sync or async wrapper) skips the
+per-call conversion and runs it with prepare=True, so each pooled connection plans it
+once and reuses the server-side prepared statement afterwards. Every execution is
+counted and timed; statement_stats() reports the totals.
+
+Set DB_PREPARE_STATEMENTS=0 when connecting through a pooler that cannot keep
+prepared statements (e.g. PgBouncer in transaction mode).
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Dict, List
+
+PREPARE_STATEMENTS = os.getenv("DB_PREPARE_STATEMENTS", "1").lower() not in ("0", "false", "no")
+
+_registry: Dict[str, "Statement"] = {}
+_lock = threading.Lock()
+
+
+class Statement:
+    """A registered query: converted SQL plus call counters."""
+
+    __slots__ = ("name", "sql", "calls", "total_ms", "max_ms")
+
+    def __init__(self, name: str, sql: str):
+        self.name = name
+        self.sql = sql.replace("?", "%s")
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, started: float) -> None:
+        elapsed = (time.perf_counter() - started) * 1000.0
+        with _lock:
+            self.calls += 1
+            self.total_ms += elapsed
+            if elapsed > self.max_ms:
+                self.max_ms = elapsed
+
+    def __repr__(self) -> str:
+        return f"Statement({self.name!r})"
+
+
+def register(name: str, sql: str) -> Statement:
+    """Register (or look up) a named statement. Re-registering a name with other SQL is an error."""
+    stmt = Statement(name, sql)
+    with _lock:
+        existing = _registry.get(name)
+        if existing is not None:
+            if existing.sql != stmt.sql:
+                raise ValueError(f"Statement {name!r} is already registered with different SQL")
+            return existing
+        _registry[name] = stmt
+    return stmt
+
+
+def get_statement(name: str) -> Statement:
+    """The registered statement called name (KeyError when unknown)."""
+    with _lock:
+        return _registry[name]
+
+
+def statement_stats() -> List[Dict]:
+    """Per-statement calls and timings (ms), slowest total first."""
+    with _lock:
+        rows = [
+            {
+                "name": s.name,
+                "calls": s.calls,
+                "total_ms": round(s.total_ms, 3),
+                "avg_ms": round(s.total_ms / s.calls, 3) if s.calls else 0.0,
+                "max_ms": round(s.max_ms, 3),
+            }
+            for s in _registry.values()
+        ]
+    return sorted(rows, key=lambda r: (-r["total_ms"], r["name"]))
+
+
+def reset_statement_stats() -> None:
+    with _lock:
+        for s in _registry.values():
+            s.calls, s.total_ms, s.max_ms = 0, 0.0, 0.0
+
+
+__all__ = ["PREPARE_STATEMENTS", "Statement", "register", "get_statement", "statement_stats", "reset_statement_stats"]
@@ -2,21 +2,37 @@
 Subscription storage re-exports.
 """
 from core.db.subscriptions.subs_store import (
+    MAX_RADIUS_MILES,
     add_subscription,
     activate_latest_inactive_subscription,
     get_active_subscriptions,
     get_subscriptions_for_email,
+    get_subscriptions_for_email_async,
     deactivate_subscription,
     update_subscription_for_user,
+    backfill_subscription_kinds,
+    backfill_subscription_regions,
     get_deleted_subscriptions,
 )
+from core.db.subscriptions.token_index import (
+    subscription_token_rows,
+    store_subscription_tokens,
+    backfill_subscription_tokens,
+)
 
 __all__ = [
+    "MAX_RADIUS_MILES",
     "add_subscription",
     "activate_latest_inactive_subscription",
     "get_active_subscriptions",
     "get_subscriptions_for_email",
+    "get_subscriptions_for_email_async",
     "deactivate_subscription",
     "update_subscription_for_user",
+    "backfill_subscription_kinds",
+    "backfill_subscription_regions",
     "get_deleted_subscriptions",
+    "subscription_token_rows",
+    "store_subscription_tokens",
+    "backfill_subscription_tokens",
 ]
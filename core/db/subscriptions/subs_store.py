@@ -3,10 +3,36 @@ Subscription storage helpers (data-level only).
 """
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Dict, List
 
-from core.db.base import get_conn
+from core.db.base import async_read_connection, get_conn, get_read_conn
+from core.db.statements import register
+from core.db.jobs.job_kinds import preference_kind_mask
+from core.db.jobs.location_index import REGION_ALL, preference_region
+from core.db.subscriptions.token_index import store_subscription_tokens
+
+MAX_RADIUS_MILES = 100
+
+
+def _clean_radius(radius_miles) -> int | None:
+    """Normalize a radius to 1..MAX_RADIUS_MILES, or None for no radius."""
+    try:
+        radius = int(radius_miles or 0)
+    except (TypeError, ValueError):
+        return None
+    if radius <= 0:
+        return None
+    return min(radius, MAX_RADIUS_MILES)
+
+
+def _clean_min_pay(min_pay_minor) -> int | None:
+    """Normalize a minimum hourly pay (minor units) to a positive int, or None for no minimum."""
+    try:
+        minimum = int(min_pay_minor or 0)
+    except (TypeError, ValueError):
+        return None
+    return minimum if minimum > 0 else None
 
 
 def add_subscription(
@@ -15,30 +41,58 @@ def add_subscription(
     job_type: str,
     active: int = 1,
     user_id: int | None = None,
-) -> None:
-    """Add a new subscription (active=1 by default)."""
+    radius_miles: int | None = None,
+    min_pay_minor: int | None = None,
+) -> int:
+    """
+    Add a new subscription (active=1 by default) and return its id.
+    radius_miles also matches jobs within that distance of each named town.
+    min_pay_minor skips jobs paying less per hour (in pence/cents).
+    Location tokens are materialized into subscription_tokens in the same transaction,
+    and the region is derived from the named locations (see preference_region).
+    """
     conn = get_conn()
     cur = conn.cursor()
-    now = datetime.utcnow().isoformat(timespec="seconds")
+    now = datetime.now(timezone.utc)
     email_normalized = (email or "").strip().lower()
 
     cur.execute(
         """
-        INSERT INTO subscriptions (user_id, email, preferred_location, job_type, created_at, active)
-        VALUES (?, ?, ?, ?, ?, ?)
+        INSERT INTO subscriptions
+            (user_id, email, preferred_location, job_type, job_kind_mask, created_at, active, radius_miles,
+             min_pay_minor, region)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        RETURNING id
         """,
-        (user_id, email_normalized, preferred_location, job_type, now, int(active)),
+        (
+            user_id,
+            email_normalized,
+            preferred_location,
+            job_type,
+            preference_kind_mask(job_type),
+            now,
+            int(active),
+            _clean_radius(radius_miles),
+            _clean_min_pay(min_pay_minor),
+            preference_region(preferred_location, _clean_radius(radius_miles)),
+        ),
     )
+    sub_id = cur.fetchone()["id"]
+    store_subscription_tokens(cur, sub_id, preferred_location, _clean_radius(radius_miles))
 
     conn.commit()
     conn.close()
+    return sub_id
 
 
-def activate_latest_inactive_subscription(email: str) -> bool:
-    """Activate the most recently created inactive subscription for an email."""
+def activate_latest_inactive_subscription(email: str) -> int | None:
+    """
+    Activate the most recently created inactive subscription for an email.
+    Returns its id, or None if there was nothing to activate.
+    """
     email_normalized = (email or "").strip().lower()
     if not email_normalized:
-        return False
+        return None
 
     conn = get_conn()
     cur = conn.cursor()
@@ -52,27 +106,49 @@ def activate_latest_inactive_subscription(email: str) -> bool:
             ORDER BY created_at DESC, id DESC
             LIMIT 1
         )
+        RETURNING id
         """,
         (email_normalized,),
     )
-    updated = cur.rowcount
+    row = cur.fetchone()
     conn.commit()
     conn.close()
-    return updated > 0
+    return row["id"] if row else None
 
 
-def get_active_subscriptions() -> List[Dict]:
-    """Return all active subscriptions as a list of dicts."""
-    conn = get_conn()
+# The owning account comes along in the same query, so callers need no per-email
+# user lookups.
+_ACTIVE_COLUMNS = """
+    SELECT s.id, s.user_id, s.email, s.preferred_location, s.job_type, s.job_kind_mask, s.radius_miles,
+           s.min_pay_minor, s.region,
+           u.id AS account_id, u.active AS account_active,
+           CASE WHEN u.id IS NOT NULL THEN u.email_verified_at IS NOT NULL END AS account_verified
+    FROM subscriptions s
+    LEFT JOIN users u ON u.email = lower(s.email)
+    WHERE s.active = 1
+"""
+_ACTIVE_SUBSCRIPTIONS = register("subscriptions.active", _ACTIVE_COLUMNS)
+# REGION_ALL is inlined so the predicate matches idx_subscriptions_active_region_all.
+_ACTIVE_SUBSCRIPTIONS_IN_REGION = register(
+    "subscriptions.active_in_region",
+    _ACTIVE_COLUMNS + f" AND coalesce(s.region, '{REGION_ALL}') IN ('{REGION_ALL}', ?)",
+)
+
+
+def get_active_subscriptions(region: str | None = None) -> List[Dict]:
+    """
+    Return all active subscriptions as a list of dicts.
+    With region, only subscriptions in that region or REGION_ALL are returned.
+    Each row also carries its email's account: account_id, account_active and
+    account_verified (None when no user has that email).
+    """
+    conn = get_read_conn()
     cur = conn.cursor()
 
-    cur.execute(
-        """
-        SELECT id, user_id, email, preferred_location, job_type
-        FROM subscriptions
-        WHERE active = 1
-        """
-    )
+    if region is None:
+        cur.execute(_ACTIVE_SUBSCRIPTIONS)
+    else:
+        cur.execute(_ACTIVE_SUBSCRIPTIONS_IN_REGION, (region,))
 
     rows = cur.fetchall()
     conn.close()
@@ -80,26 +156,33 @@ def get_active_subscriptions() -> List[Dict]:
     return [dict(row) for row in rows]
 
 
+_SUBSCRIPTIONS_FOR_EMAIL = register("subscriptions.for_email", """
+    SELECT id, user_id, email, preferred_location, job_type, radius_miles, min_pay_minor, created_at, active, updated_once, needs_pref_update, last_deactivated_at
+    FROM subscriptions
+    WHERE lower(email) = lower(?)
+    ORDER BY created_at DESC, id DESC
+""")
+
+
 def get_subscriptions_for_email(email: str) -> List[Dict]:
     """Return all subscriptions for a given email."""
-    conn = get_conn()
+    conn = get_read_conn()
     cur = conn.cursor()
 
-    cur.execute(
-        """
-        SELECT id, user_id, email, preferred_location, job_type, created_at, active, updated_once, needs_pref_update, last_deactivated_at
-        FROM subscriptions
-        WHERE lower(email) = lower(?)
-        ORDER BY created_at DESC, id DESC
-        """,
-        (email.strip(),),
-    )
+    cur.execute(_SUBSCRIPTIONS_FOR_EMAIL, (email.strip(),))
 
     rows = cur.fetchall()
     conn.close()
     return [dict(r) for r in rows]
 
 
+async def get_subscriptions_for_email_async(email: str) -> List[Dict]:
+    async with async_read_connection() as conn:
+        cur = await conn.cursor().execute(_SUBSCRIPTIONS_FOR_EMAIL, (email.strip(),))
+        rows = await cur.fetchall()
+    return [dict(r) for r in rows]
+
+
 def deactivate_subscription(sub_id: int) -> None:
     """Mark a subscription as inactive (unsubscribe)."""
     conn = get_conn()
@@ -111,12 +194,20 @@ def deactivate_subscription(sub_id: int) -> None:
     conn.close()
 
 
-def update_subscription_for_user(sub_id: int, email: str, preferred_location: str, job_type: str) -> bool:
+def update_subscription_for_user(
+    sub_id: int,
+    email: str,
+    preferred_location: str,
+    job_type: str,
+    radius_miles: int | None = None,
+    min_pay_minor: int | None = None,
+) -> bool:
     """
     Update a subscription owned by email.
     - Enforce max 3 locations (semicolon separated).
     - Allow updates any time for the owner.
     - After update, set updated_once=1, keep it active.
+    - radius_miles / min_pay_minor replace the previous values (None clears them).
     Returns True if a row was updated.
     """
     parts = [p.strip() for p in preferred_location.split(";") if p.strip()]
@@ -127,20 +218,58 @@ def update_subscription_for_user(sub_id: int, email: str, preferred_location: st
     cur.execute(
         """
         UPDATE subscriptions
-        SET preferred_location = ?, job_type = ?, updated_once = 1, needs_pref_update = 0, active = 1
+        SET preferred_location = ?, job_type = ?, job_kind_mask = ?, radius_miles = ?, min_pay_minor = ?,
+            region = ?, updated_once = 1, needs_pref_update = 0, active = 1
         WHERE id = ? AND lower(email) = lower(?)
         """,
-        (trimmed, job_type, sub_id, email.strip()),
+        (
+            trimmed,
+            job_type,
+            preference_kind_mask(job_type),
+            _clean_radius(radius_miles),
+            _clean_min_pay(min_pay_minor),
+            preference_region(trimmed, _clean_radius(radius_miles)),
+            sub_id,
+            email.strip(),
+        ),
     )
     updated = cur.rowcount
+    if updated:
+        store_subscription_tokens(cur, sub_id, trimmed, _clean_radius(radius_miles))
     conn.commit()
     conn.close()
     return updated > 0
 
 
+def backfill_subscription_kinds() -> int:
+    """Compute job_kind_mask for subscriptions stored before the column existed."""
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT id, job_type FROM subscriptions WHERE job_kind_mask IS NULL")
+    rows = [(preference_kind_mask(r["job_type"]), r["id"]) for r in cur.fetchall()]
+    if rows:
+        cur.executemany("UPDATE subscriptions SET job_kind_mask = ? WHERE id = ?", rows)
+    conn.commit()
+    conn.close()
+    return len(rows)
+
+
+def backfill_subscription_regions() -> int:
+    """Derive region for subscriptions stored before the column existed."""
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT id, preferred_location, radius_miles FROM subscriptions WHERE region IS NULL")
+    rows = [(preference_region(r["preferred_location"], r["radius_miles"]), r["id"]) for r in cur.fetchall()]
+    if rows:
+        cur.executemany("UPDATE subscriptions SET region = ? WHERE id = ?", rows)
+    conn.commit()
+    conn.close()
+    return len(rows)
+
+
 def get_deleted_subscriptions(limit: int = 100) -> List[Dict]:
     """Return recently deleted subscriptions (archive view)."""
-    conn = get_conn()
+    conn = get_read_conn()
     cur = conn.cursor()
     try:
         cur.execute(
@@ -160,11 +289,15 @@ def get_deleted_subscriptions(limit: int = 100) -> List[Dict]:
 
 
 __all__ = [
+    "MAX_RADIUS_MILES",
     "add_subscription",
     "activate_latest_inactive_subscription",
     "get_active_subscriptions",
     "get_subscriptions_for_email",
+    "get_subscriptions_for_email_async",
     "deactivate_subscription",
     "update_subscription_for_user",
+    "backfill_subscription_kinds",
+    "backfill_subscription_regions",
     "get_deleted_subscriptions",
 ]
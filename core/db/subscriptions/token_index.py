@@ -0,0 +1,80 @@
+"""
+Materialized location tokens for subscriptions (`subscription_tokens`).
+
+Each subscription's preferred_location (plus radius) is resolved once, when it is
+written, into rows of:
+  - location_id    canonical location (joins job_locations.location_id)
+  - area_group_id  area group (joins job_locations.area_group_id)
+  - token          leftover free text, matched as a substring of the job location
+  - match_all=1    the "Any" preference
+A subscription with no rows named no locations at all; subscriptions.tokens_built_at
+records that its rows were built, whether or not there are any.
+
+This lets core.db.alerts.matching_store match new jobs against every active
+subscription inside Postgres instead of loading them all into the worker.
+"""
+from __future__ import annotations
+
+from typing import List, Optional, Tuple
+
+from core.db.base import get_conn
+from core.db.jobs.location_index import resolve_preference
+
+# (location_id, area_group_id, token, match_all)
+TokenRow = Tuple[Optional[int], Optional[int], Optional[str], int]
+
+
+def subscription_token_rows(raw_pref: str | None, radius_miles: int | None = None) -> List[TokenRow]:
+    """Resolve a preference into subscription_tokens rows (same rules as the matchers)."""
+    pref = resolve_preference(raw_pref or "", radius_miles)
+    if pref["any"]:
+        return [(None, None, None, 1)]
+    rows: List[TokenRow] = [(lid, None, None, 0) for lid in sorted(pref["location_ids"])]
+    rows.extend((None, gid, None, 0) for gid in sorted(pref["area_group_ids"]))
+    rows.extend((None, None, tok, 0) for tok in pref["tokens"])
+    return rows
+
+
+def store_subscription_tokens(cur, sub_id: int, raw_pref: str | None, radius_miles: int | None = None) -> int:
+    """
+    Replace a subscription's token rows and stamp its tokens_built_at (same transaction
+    as the caller). Returns rows written.
+    """
+    cur.execute("DELETE FROM subscription_tokens WHERE subscription_id = ?", (sub_id,))
+    rows = subscription_token_rows(raw_pref, radius_miles)
+    if rows:
+        cur.executemany(
+            """
+            INSERT INTO subscription_tokens (subscription_id, location_id, area_group_id, token, match_all)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            [(sub_id, *row) for row in rows],
+        )
+    cur.execute("UPDATE subscriptions SET tokens_built_at = now() WHERE id = ?", (sub_id,))
+    return len(rows)
+
+
+def backfill_subscription_tokens(rebuild: bool = False) -> int:
+    """
+    Resolve subscriptions whose token rows were never built (rebuild=True re-resolves all,
+    e.g. after the locations catalog changed). Returns the number of subscriptions processed.
+    """
+    conn = get_conn()
+    cur = conn.cursor()
+    sql = "SELECT id, preferred_location, radius_miles FROM subscriptions"
+    if not rebuild:
+        sql += " WHERE tokens_built_at IS NULL"
+    cur.execute(sql)
+    subs = cur.fetchall()
+    for sub in subs:
+        store_subscription_tokens(cur, sub["id"], sub["preferred_location"], sub["radius_miles"])
+    conn.commit()
+    conn.close()
+    return len(subs)
+
+
+__all__ = [
+    "subscription_token_rows",
+    "store_subscription_tokens",
+    "backfill_subscription_tokens",
+]
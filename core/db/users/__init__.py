@@ -5,7 +5,9 @@ from core.db.users.auth import hash_password, verify_password
 from core.db.users.user_store import (
     create_user,
     get_user_by_email,
+    get_user_by_email_async,
     get_user_by_id,
+    get_user_by_id_async,
     update_user_password,
     deactivate_user,
     reactivate_user,
@@ -20,9 +22,14 @@ from core.db.users.password_reset import (
 )
 from core.db.users.sessions import (
     create_session,
+    create_session_async,
     delete_session,
+    delete_session_async,
     get_session,
+    get_session_async,
     touch_session,
+    touch_session_async,
+    purge_expired_sessions,
     SESSION_TIMEOUT_MINUTES,
 )
 from core.db.users.email_verification import (
@@ -38,7 +45,9 @@ __all__ = [
     "verify_password",
     "create_user",
     "get_user_by_email",
+    "get_user_by_email_async",
     "get_user_by_id",
+    "get_user_by_id_async",
     "update_user_password",
     "deactivate_user",
     "reactivate_user",
@@ -49,9 +58,14 @@ __all__ = [
     "mark_reset_token_used",
     "RESET_TOKEN_MINUTES",
     "create_session",
+    "create_session_async",
     "delete_session",
+    "delete_session_async",
     "get_session",
+    "get_session_async",
     "touch_session",
+    "touch_session_async",
+    "purge_expired_sessions",
     "SESSION_TIMEOUT_MINUTES",
     "VERIFY_TOKEN_HOURS",
     "create_email_verification_token",
@@ -3,7 +3,6 @@ Email verification token storage helpers.
 """
 from __future__ import annotations
 
-from datetime import datetime, timedelta
 from typing import Dict, Optional
 
 from core.db.base import get_conn
@@ -18,18 +17,15 @@ def create_email_verification_token(user_id: int) -> str:
     import secrets
 
     token = secrets.token_urlsafe(32)
-    now = datetime.utcnow()
-    created_at = now.isoformat(timespec="seconds")
-    expires_at = (now + timedelta(hours=VERIFY_TOKEN_HOURS)).isoformat(timespec="seconds")
 
     conn = get_conn()
     cur = conn.cursor()
     cur.execute(
         """
         INSERT INTO email_verification_tokens (user_id, token, created_at, expires_at, used_at)
-        VALUES (?, ?, ?, ?, NULL)
+        VALUES (?, ?, now(), now() + make_interval(hours => ?), NULL)
         """,
-        (user_id, token, created_at, expires_at),
+        (user_id, token, VERIFY_TOKEN_HOURS),
     )
     conn.commit()
     conn.close()
@@ -49,32 +45,17 @@ def get_email_verification_token(token: str) -> Optional[Dict]:
         """
         SELECT id, user_id, token, created_at, expires_at, used_at
         FROM email_verification_tokens
-        WHERE token = ? AND used_at IS NULL
+        WHERE token = ? AND used_at IS NULL AND expires_at > now()
         """,
         (token,),
     )
     row = cur.fetchone()
     if not row:
-        conn.close()
-        return None
-
-    data = dict(row)
-    try:
-        expires_at = datetime.fromisoformat(data["expires_at"])
-    except Exception:
-        cur.execute("DELETE FROM email_verification_tokens WHERE token = ?", (token,))
-        conn.commit()
-        conn.close()
-        return None
-
-    if expires_at <= datetime.utcnow():
-        cur.execute("DELETE FROM email_verification_tokens WHERE token = ?", (token,))
+        # Drop it if it exists but has expired (used tokens are kept).
+        cur.execute("DELETE FROM email_verification_tokens WHERE token = ? AND used_at IS NULL", (token,))
         conn.commit()
-        conn.close()
-        return None
-
     conn.close()
-    return data
+    return dict(row) if row else None
 
 
 def mark_email_verification_token_used(token: str) -> None:
@@ -84,8 +65,8 @@ def mark_email_verification_token_used(token: str) -> None:
     conn = get_conn()
     cur = conn.cursor()
     cur.execute(
-        "UPDATE email_verification_tokens SET used_at = ? WHERE token = ? AND used_at IS NULL",
-        (datetime.utcnow().isoformat(timespec="seconds"), token),
+        "UPDATE email_verification_tokens SET used_at = now() WHERE token = ? AND used_at IS NULL",
+        (token,),
     )
     conn.commit()
     conn.close()
@@ -96,8 +77,8 @@ def mark_user_email_verified(user_id: int) -> None:
     conn = get_conn()
     cur = conn.cursor()
     cur.execute(
-        "UPDATE users SET email_verified_at = ? WHERE id = ? AND (email_verified_at IS NULL OR email_verified_at = '')",
-        (datetime.utcnow().isoformat(timespec="seconds"), user_id),
+        "UPDATE users SET email_verified_at = now() WHERE id = ? AND email_verified_at IS NULL",
+        (user_id,),
     )
     conn.commit()
     conn.close()
@@ -3,7 +3,6 @@ Password reset token storage.
 """
 from __future__ import annotations
 
-from datetime import datetime, timedelta
 from typing import Dict, Optional
 
 from core.db.base import get_conn
@@ -15,8 +14,6 @@ def create_password_reset_token(user_id: int) -> str:
     import secrets
 
     token = secrets.token_urlsafe(32)
-    now = datetime.utcnow()
-    expires = now + timedelta(minutes=RESET_TOKEN_MINUTES)
 
     conn = get_conn()
     cur = conn.cursor()
@@ -25,14 +22,9 @@ def create_password_reset_token(user_id: int) -> str:
     cur.execute(
         """
         INSERT INTO password_reset_tokens (user_id, token, created_at, expires_at)
-        VALUES (?, ?, ?, ?)
+        VALUES (?, ?, now(), now() + make_interval(mins => ?))
         """,
-        (
-            user_id,
-            token,
-            now.isoformat(timespec="seconds"),
-            expires.isoformat(timespec="seconds"),
-        ),
+        (user_id, token, RESET_TOKEN_MINUTES),
     )
     conn.commit()
     conn.close()
@@ -40,6 +32,7 @@ def create_password_reset_token(user_id: int) -> str:
 
 
 def get_password_reset_token(token: str) -> Optional[Dict]:
+    """Return the token row if it is unused and unexpired; otherwise delete it and return None."""
     if not token:
         return None
 
@@ -49,33 +42,16 @@ def get_password_reset_token(token: str) -> Optional[Dict]:
         """
         SELECT id, user_id, token, created_at, expires_at, used_at
         FROM password_reset_tokens
-        WHERE token = ?
+        WHERE token = ? AND used_at IS NULL AND expires_at >= now()
         """,
         (token,),
     )
     row = cur.fetchone()
-
     if not row:
-        conn.close()
-        return None
-
-    data = dict(row)
-    try:
-        expires_at = datetime.fromisoformat(data["expires_at"])
-    except Exception:
         cur.execute("DELETE FROM password_reset_tokens WHERE token = ?", (token,))
         conn.commit()
-        conn.close()
-        return None
-
-    if data.get("used_at") or expires_at < datetime.utcnow():
-        cur.execute("DELETE FROM password_reset_tokens WHERE token = ?", (token,))
-        conn.commit()
-        conn.close()
-        return None
-
     conn.close()
-    return data
+    return dict(row) if row else None
 
 
 def mark_reset_token_used(token: str) -> None:
@@ -91,10 +67,7 @@ def mark_reset_token_used(token: str) -> None:
         user_id = row.get("user_id")
     else:
         user_id = row[0]
-    cur.execute(
-        "UPDATE password_reset_tokens SET used_at=? WHERE token=?",
-        (datetime.utcnow().isoformat(timespec="seconds"), token),
-    )
+    cur.execute("UPDATE password_reset_tokens SET used_at=now() WHERE token=?", (token,))
     if user_id:
         cur.execute("DELETE FROM password_reset_tokens WHERE user_id = ? AND token != ?", (user_id, token))
     conn.commit()
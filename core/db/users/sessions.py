@@ -1,44 +1,57 @@
 """
 Session storage helpers.
+
+The *_async variants run the same statements on async_connection() for async routes.
 """
 from __future__ import annotations
 
 import secrets
-from datetime import datetime, timedelta
 from typing import Dict, Optional
 
-from core.db.base import get_conn
+from core.db.base import async_connection, get_conn
+from core.db.statements import register
 
 SESSION_TIMEOUT_MINUTES = 30  # inactivity timeout
 
+_INSERT_SESSION = register("sessions.create", """
+    INSERT INTO sessions (id, user_id, created_at, last_seen_at, expires_at)
+    VALUES (?, ?, now(), now(), now() + make_interval(mins => ?))
+""")
+_DELETE_SESSION = register("sessions.delete", "DELETE FROM sessions WHERE id = ?")
+# Expiry is checked in SQL; an expired row reads like a missing one.
+_GET_SESSION = register("sessions.get", """
+    SELECT id, user_id, created_at, last_seen_at, expires_at
+    FROM sessions
+    WHERE id = ? AND expires_at >= now()
+""")
+_TOUCH_SESSION = register("sessions.touch", """
+    UPDATE sessions
+    SET last_seen_at = now(), expires_at = now() + make_interval(mins => ?)
+    WHERE id = ?
+""")
+_PURGE_EXPIRED = register("sessions.purge_expired", "DELETE FROM sessions WHERE expires_at < now()")
+
 
 def create_session(user_id: int) -> str:
     """Create a new login session for the given user_id and return the session token."""
     token = secrets.token_urlsafe(32)
-    now = datetime.utcnow()
-    expires = now + timedelta(minutes=SESSION_TIMEOUT_MINUTES)
 
     conn = get_conn()
     cur = conn.cursor()
-    cur.execute(
-        """
-        INSERT INTO sessions (id, user_id, created_at, last_seen_at, expires_at)
-        VALUES (?, ?, ?, ?, ?)
-        """,
-        (
-            token,
-            user_id,
-            now.isoformat(timespec="seconds"),
-            now.isoformat(timespec="seconds"),
-            expires.isoformat(timespec="seconds"),
-        ),
-    )
+    cur.execute(_INSERT_SESSION, (token, user_id, SESSION_TIMEOUT_MINUTES))
     conn.commit()
     conn.close()
 
     return token
 
 
+async def create_session_async(user_id: int) -> str:
+    token = secrets.token_urlsafe(32)
+    async with async_connection() as conn:
+        await conn.cursor().execute(_INSERT_SESSION, (token, user_id, SESSION_TIMEOUT_MINUTES))
+    return token
+
+
 def delete_session(session_id: str) -> None:
     """Remove a session from the DB (logout)."""
     if not session_id:
@@ -46,11 +59,18 @@ def delete_session(session_id: str) -> None:
 
     conn = get_conn()
     cur = conn.cursor()
-    cur.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+    cur.execute(_DELETE_SESSION, (session_id,))
     conn.commit()
     conn.close()
 
 
+async def delete_session_async(session_id: str) -> None:
+    if not session_id:
+        return
+    async with async_connection() as conn:
+        await conn.cursor().execute(_DELETE_SESSION, (session_id,))
+
+
 def get_session(session_id: str) -> Optional[Dict]:
     """
     Look up a session by id.
@@ -62,32 +82,26 @@ def get_session(session_id: str) -> Optional[Dict]:
 
     conn = get_conn()
     cur = conn.cursor()
-    cur.execute(
-        """
-        SELECT id, user_id, created_at, last_seen_at, expires_at
-        FROM sessions
-        WHERE id = ?
-        """,
-        (session_id,),
-    )
+    cur.execute(_GET_SESSION, (session_id,))
     row = cur.fetchone()
+    if not row:
+        # Drop the row if it exists but has expired.
+        cur.execute(_DELETE_SESSION, (session_id,))
+        conn.commit()
     conn.close()
 
-    if not row:
-        return None
+    return dict(row) if row else None
 
-    expires_at_str = row["expires_at"]
-    try:
-        expires_at = datetime.fromisoformat(expires_at_str)
-    except Exception:
-        delete_session(session_id)
-        return None
 
-    if expires_at < datetime.utcnow():
-        delete_session(session_id)
+async def get_session_async(session_id: str) -> Optional[Dict]:
+    if not session_id:
         return None
-
-    return dict(row)
+    async with async_connection() as conn:
+        cur = await conn.cursor().execute(_GET_SESSION, (session_id,))
+        row = await cur.fetchone()
+        if not row:
+            await cur.execute(_DELETE_SESSION, (session_id,))
+    return dict(row) if row else None
 
 
 def touch_session(session_id: str) -> None:
@@ -95,31 +109,40 @@ def touch_session(session_id: str) -> None:
     if not session_id:
         return
 
-    now = datetime.utcnow()
-    new_expires = now + timedelta(minutes=SESSION_TIMEOUT_MINUTES)
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute(_TOUCH_SESSION, (SESSION_TIMEOUT_MINUTES, session_id))
+    conn.commit()
+    conn.close()
+
+
+async def touch_session_async(session_id: str) -> None:
+    if not session_id:
+        return
+    async with async_connection() as conn:
+        await conn.cursor().execute(_TOUCH_SESSION, (SESSION_TIMEOUT_MINUTES, session_id))
+
 
+def purge_expired_sessions() -> int:
+    """Delete every expired session (get_session only removes the ones it is asked about)."""
     conn = get_conn()
     cur = conn.cursor()
-    cur.execute(
-        """
-        UPDATE sessions
-        SET last_seen_at = ?, expires_at = ?
-        WHERE id = ?
-        """,
-        (
-            now.isoformat(timespec="seconds"),
-            new_expires.isoformat(timespec="seconds"),
-            session_id,
-        ),
-    )
+    cur.execute(_PURGE_EXPIRED)
+    removed = cur.rowcount
     conn.commit()
     conn.close()
+    return removed
 
 
 __all__ = [
     "SESSION_TIMEOUT_MINUTES",
+    "purge_expired_sessions",
     "create_session",
     "delete_session",
     "get_session",
     "touch_session",
+    "create_session_async",
+    "delete_session_async",
+    "get_session_async",
+    "touch_session_async",
 ]
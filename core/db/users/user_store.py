@@ -4,10 +4,11 @@ User CRUD and activation/deactivation helpers.
 from __future__ import annotations
 
 import secrets
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Dict, Optional
 
-from core.db.base import get_conn
+from core.db.base import async_connection, get_conn, get_read_conn
+from core.db.statements import register
 from core.db.users.auth import hash_password
 
 try:
@@ -18,7 +19,7 @@ except Exception:  # pragma: no cover - optional in SQLite-only mode
 def create_user(email: str, raw_password: str, role: str = "user", verified: bool = True) -> int:
     conn = get_conn()
     cur = conn.cursor()
-    now = datetime.utcnow().isoformat(timespec="seconds")
+    now = datetime.now(timezone.utc)
 
     password_hash = hash_password(raw_password)
     email_verified_at = now if verified else None
@@ -39,43 +40,48 @@ def create_user(email: str, raw_password: str, role: str = "user", verified: boo
     return user_id
 
 
+_USER_COLUMNS = "id, email, password_hash, role, active, created_at, email_verified_at"
+_USER_BY_EMAIL = register("users.by_email", f"SELECT {_USER_COLUMNS} FROM users WHERE email = %s")
+_USER_BY_ID = register("users.by_id", f"SELECT {_USER_COLUMNS} FROM users WHERE id = %s")
+
+
 def get_user_by_email(email: str) -> Dict | None:
     conn = get_conn()
     cur = conn.cursor()
 
-    cur.execute(
-        """
-        SELECT id, email, password_hash, role, active, created_at, email_verified_at
-        FROM users
-        WHERE email = %s
-        """,
-        (email.strip().lower(),),
-    )
+    cur.execute(_USER_BY_EMAIL, (email.strip().lower(),))
     row = cur.fetchone()
     conn.close()
 
     return dict(row) if row else None
 
 
+async def get_user_by_email_async(email: str) -> Dict | None:
+    async with async_connection() as conn:
+        cur = await conn.cursor().execute(_USER_BY_EMAIL, (email.strip().lower(),))
+        row = await cur.fetchone()
+    return dict(row) if row else None
+
+
 def get_user_by_id(user_id: int) -> Optional[Dict]:
     """Look up a user by numeric id. Returns dict or None."""
     conn = get_conn()
     cur = conn.cursor()
 
-    cur.execute(
-        """
-        SELECT id, email, password_hash, role, active, created_at, email_verified_at
-        FROM users
-        WHERE id = %s
-        """,
-        (user_id,),
-    )
+    cur.execute(_USER_BY_ID, (user_id,))
     row = cur.fetchone()
     conn.close()
 
     return dict(row) if row else None
 
 
+async def get_user_by_id_async(user_id: int) -> Optional[Dict]:
+    async with async_connection() as conn:
+        cur = await conn.cursor().execute(_USER_BY_ID, (user_id,))
+        row = await cur.fetchone()
+    return dict(row) if row else None
+
+
 def update_user_password(user_id: int, raw_password: str) -> None:
     conn = get_conn()
     cur = conn.cursor()
@@ -94,7 +100,7 @@ def deactivate_user(user_id: int) -> None:
     cur.execute("SELECT email FROM users WHERE id=%s", (user_id,))
     row = cur.fetchone()
     email = row["email"] if row else None
-    now = datetime.utcnow().isoformat(timespec="seconds")
+    now = datetime.now(timezone.utc)
 
     cur.execute("UPDATE users SET active=0 WHERE id=%s", (user_id,))
     if email:
@@ -118,7 +124,7 @@ def reactivate_user(user_id: int) -> None:
     Also mark that subscription as needing a preference update and log an activation event.
     """
 
-    def _generate_activation_code(cur, user_id: int, sub_id: int, now: str) -> None:
+    def _generate_activation_code(cur, user_id: int, sub_id: int, now: datetime) -> None:
         """
         Insert an activation event with a short, random code (<=10 chars).
         Retries on rare collisions against the UNIQUE activation_code column.
@@ -145,7 +151,7 @@ def reactivate_user(user_id: int) -> None:
     cur.execute("SELECT email FROM users WHERE id=%s", (user_id,))
     row = cur.fetchone()
     email = row["email"] if row else None
-    now = datetime.utcnow().isoformat(timespec="seconds")
+    now = datetime.now(timezone.utc)
 
     cur.execute("UPDATE users SET active=1 WHERE id=%s", (user_id,))
     if email:
@@ -211,7 +217,7 @@ def delete_user_data(user_id: int) -> None:
 
 
 def get_deleted_users(limit: int = 100):
-    conn = get_conn()
+    conn = get_read_conn()
     cur = conn.cursor()
     try:
         cur.execute(
@@ -233,6 +239,8 @@ def get_deleted_users(limit: int = 100):
 __all__ = [
     "create_user",
     "get_user_by_email",
+    "get_user_by_email_async",
+    "get_user_by_id_async",
     "get_user_by_id",
     "update_user_password",
     "deactivate_user",
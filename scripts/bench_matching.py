@@ -0,0 +1,95 @@
+"""
+Benchmark the python, numpy and process-pool matchers on synthetic subscriptions.
+
+Usage (DATABASE_URL must be set like for the other scripts; no queries are run):
+    python -m scripts.bench_matching            # 10k and 100k subscriptions
+    python -m scripts.bench_matching 50000
+"""
+import asyncio
+import random
+import sys
+import time
+
+from app.area_groups import AREA_GROUPS
+from worker import main_us
+from worker.sharded_matcher import ShardedMatcher
+
+JOB_TYPES = ["Full Time", "Part Time", "Flex Time", "Reduced Time"]
+DURATIONS = ["Regular", "Fixed-term", "Seasonal"]
+PREF_TYPES = ["Any", "Any", "Full Time", "Part Time", "Fixed-term", "Seasonal"]
+
+
+def _make_jobs(rng: random.Random, count: int):
+    towns = [t for towns in AREA_GROUPS.values() for t in towns]
+    return [
+        {
+            "id": i + 1,
+            "title": f"Warehouse Operative {i}",
+            "type": rng.choice(JOB_TYPES),
+            "duration": rng.choice(DURATIONS),
+            "pay": "From GBP14.30",
+            "location": f"{rng.choice(towns)}, United Kingdom",
+            "url": f"https://example.com/job{i}",
+        }
+        for i in range(count)
+    ]
+
+
+def _make_subs(rng: random.Random, count: int):
+    labels = list(AREA_GROUPS.keys())
+    towns = [t for towns in AREA_GROUPS.values() for t in towns]
+    subs = []
+    for i in range(count):
+        roll = rng.random()
+        if roll < 0.2:
+            pref = "Any"
+        elif roll < 0.5:
+            pref = rng.choice(labels)
+        else:
+            pref = "; ".join(rng.sample(towns, rng.randint(1, 3)))
+        subs.append(
+            {
+                "id": i + 1,
+                "email": f"user{i}@example.com",
+                "preferred_location": pref,
+                "job_type": rng.choice(PREF_TYPES),
+                "active": 1,
+            }
+        )
+    return subs
+
+
+def bench(sub_count: int, job_count: int = 200) -> None:
+    rng = random.Random(sub_count)
+    jobs = _make_jobs(rng, job_count)
+    subs = _make_subs(rng, sub_count)
+
+    start = time.perf_counter()
+    expected = [(j["id"], s["id"]) for j, s in main_us.iter_matches(jobs, subs, engine="python")]
+    python_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    got = [(j["id"], s["id"]) for j, s in main_us.iter_matches(jobs, subs, engine="numpy")]
+    numpy_s = time.perf_counter() - start
+
+    matcher = ShardedMatcher(main_us.MATCH_SHARDS, main_us._subscription_prefs)
+    try:
+        asyncio.run(matcher.match(jobs[:1], subs))  # ship compiled shards once
+        start = time.perf_counter()
+        sharded = [(j["id"], s["id"]) for j, s in asyncio.run(matcher.match(jobs, subs))]
+        process_s = time.perf_counter() - start
+    finally:
+        matcher.shutdown()
+
+    status = "identical" if got == expected and sharded == expected else "MISMATCH"
+    print(
+        f"subs={sub_count:>7} jobs={job_count} matches={len(expected):>9} "
+        f"python={python_s:8.2f}s numpy={numpy_s:8.2f}s "
+        f"process[{matcher.shards}]={process_s:8.2f}s {status}"
+    )
+
+
+if __name__ == "__main__":
+    counts = [int(a) for a in sys.argv[1:]] or [10_000, 100_000]
+    for n in counts:
+        bench(n)
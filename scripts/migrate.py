@@ -0,0 +1,26 @@
+"""
+Apply pending schema migrations and check that the hot queries use their indexes.
+
+Usage:
+  python -m scripts.migrate
+Exits non-zero when a hot query's plan does not use its index.
+"""
+import sys
+
+from core.database import applied_versions, check_hot_query_plans, init_db
+
+
+def main() -> int:
+    init_db()
+    print(f"Schema versions: {applied_versions()}")
+    failed = 0
+    for result in check_hot_query_plans():
+        print(f"{'ok  ' if result['ok'] else 'MISS'} {result['label']} -> {result['index']}")
+        if not result["ok"]:
+            failed += 1
+            print("     " + result["plan"].replace("\n", "\n     "))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,7 +9,7 @@
 # DB access where feasible with an in-memory sqlite DB or a temp copy.
 # Core targets
 # Matching logic:
-# worker.main_us.job_matches_subscription and _location_matches with cases: Any, exact town, area group, empty prefs, and job_type filtering.
+# worker.main_us.job_matches_subscription with cases: Any, exact town, area group, empty prefs, and job_type filtering.
 # app.routes.my_alerts.job_matches_subscription similarly.
 # Validation:
 # _is_valid_email and _is_valid_password in app/routes/public.py with valid/invalid samples and length/space constraints.
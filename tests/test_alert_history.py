@@ -50,11 +50,10 @@ def test_my_alerts_shows_only_user_history(monkeypatch):
     create_alert_deliveries(user_id=user_id, subscription_id=sub_id, job_ids=[job_id])
 
     import app.routes.my_alerts as my_alerts_route
-    monkeypatch.setattr(
-        my_alerts_route,
-        "get_current_user",
-        lambda request: ({"id": user_id, "email": "u@example.com"}, "tok"),
-    )
+    async def fake_user(request):
+        return {"id": user_id, "email": "u@example.com"}, "tok"
+
+    monkeypatch.setattr(my_alerts_route, "get_current_user_async", fake_user)
 
     client = TestClient(api_module.app)
     resp = client.get("/my-alerts")
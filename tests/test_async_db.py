@@ -0,0 +1,75 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import app.api as api_module
+from core.db import base
+from core.db.base import get_conn
+from core.database import (
+    add_subscription,
+    create_session,
+    create_session_async,
+    create_user,
+    get_session,
+    get_session_async,
+    get_stats,
+    get_stats_async,
+    get_subscriptions_for_email,
+    get_subscriptions_for_email_async,
+    get_user_by_email_async,
+    mark_user_email_verified,
+)
+
+
+def _verified_user(email="a@example.com"):
+    user_id = create_user(email, "Passw0rd1")
+    mark_user_email_verified(user_id)
+    return user_id
+
+
+def test_async_helpers_match_sync():
+    user_id = _verified_user()
+    add_subscription("a@example.com", "Coventry", "Any", active=1)
+
+    async def run():
+        token = await create_session_async(user_id)
+        return (
+            token,
+            await get_session_async(token),
+            await get_user_by_email_async(" A@example.com "),
+            await get_subscriptions_for_email_async("a@example.com"),
+            await get_stats_async(),
+        )
+
+    token, session, user, subs, stats = asyncio.run(run())
+    assert session == get_session(token)
+    assert user["id"] == user_id
+    assert subs == get_subscriptions_for_email("a@example.com")
+    assert stats == get_stats()
+
+
+def test_expired_session_is_removed_by_async_lookup():
+    token = create_session(_verified_user())
+    conn = get_conn()
+    conn.cursor().execute("UPDATE sessions SET expires_at = '2000-01-01T00:00:00' WHERE id = ?", (token,))
+    conn.commit()
+    conn.close()
+
+    assert asyncio.run(get_session_async(token)) is None
+    assert get_session(token) is None
+
+
+def test_async_routes_use_lifespan_pool():
+    token = create_session(_verified_user())
+    with TestClient(api_module.app) as client:
+        client.cookies.set("session_id", token)
+        for _ in range(3):
+            resp = client.get("/dashboard", follow_redirects=False)
+            assert resp.status_code == 200
+        assert client.get("/my-alerts").status_code == 200
+        assert client.get("/", follow_redirects=False).headers["location"] == "/dashboard"
+        stats = client.get("/health").json()["db_async_pool"]
+        assert stats["pool_max"] == base.POOL_MAX_SIZE
+        assert stats.get("requests_num", 0) >= 5  # served from the pool, not fresh connections
+        assert stats["pool_size"] <= base.POOL_MAX_SIZE
+    assert base.async_pool_stats() == {}
@@ -11,9 +11,15 @@ def test_login_logout_flow_redirects_when_user_missing(monkeypatch):
     # Stub auth helpers
     monkeypatch.setattr(auth, "allow_request_with_remaining", lambda *a, **k: (True, 9))
     monkeypatch.setattr(auth, "validate_csrf", lambda req, tok: True)
-    monkeypatch.setattr(auth, "get_user_by_email", lambda email: {"id": 1, "password_hash": "x", "email_verified_at": "2025-01-01T00:00:00"})
+    async def fake_user_by_email(email):
+        return {"id": 1, "password_hash": "x", "email_verified_at": "2025-01-01T00:00:00"}
+
+    async def fake_create_session(uid):
+        return "session-token"
+
+    monkeypatch.setattr(auth, "get_user_by_email_async", fake_user_by_email)
     monkeypatch.setattr(auth, "verify_password", lambda pw, hash_: True)
-    monkeypatch.setattr(auth, "create_session", lambda uid: "session-token")
+    monkeypatch.setattr(auth, "create_session_async", fake_create_session)
     # Avoid DB side effects
     monkeypatch.setattr(auth, "set_session_cookie", lambda resp, token: resp.set_cookie("session_id", token))
 
@@ -26,7 +32,10 @@ def test_login_logout_flow_redirects_when_user_missing(monkeypatch):
     assert "session_id" in resp.cookies
 
     # Simulate missing/invalid session for protected route
-    monkeypatch.setattr(dashboard, "get_current_user", lambda req: (None, None))
+    async def no_user(req):
+        return None, None
+
+    monkeypatch.setattr(dashboard, "get_current_user_async", no_user)
     resp2 = client.get("/dashboard", follow_redirects=False)
     assert resp2.status_code in (302, 303)
     assert "/login" in resp2.headers.get("location", "")
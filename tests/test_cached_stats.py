@@ -0,0 +1,78 @@
+from fastapi.testclient import TestClient
+
+import app.api as api_module
+from app.routes import dashboard
+from core.db.base import get_conn
+from core.db.jobs import jobs_store, stats
+from core.database import create_session, create_user, mark_user_email_verified
+
+
+def _jobs(n, prefix="Job"):
+    return [{"title": f"{prefix} {i}", "location": "Coventry, United Kingdom", "url": f"https://e.com/{prefix}{i}"}
+            for i in range(n)]
+
+
+def _analyze():
+    conn = get_conn()
+    conn.cursor().execute("ANALYZE jobs, subscriptions")
+    conn.commit()
+    conn.close()
+
+
+def test_estimates_fall_back_to_exact_counts_before_analyze():
+    jobs_store.get_new_jobs(_jobs(3))
+    assert stats.estimate_stats() == jobs_store.get_stats()
+
+
+def test_estimates_come_from_partial_index_statistics():
+    jobs_store.get_new_jobs(_jobs(4))
+    _analyze()
+    assert stats.estimate_stats()["jobs"] == 4
+
+    # No full count: new rows show up once statistics are refreshed.
+    jobs_store.get_new_jobs(_jobs(2, "Late"))
+    assert stats.estimate_stats()["jobs"] == 4
+    assert jobs_store.get_stats()["jobs"] == 6
+    _analyze()
+    assert stats.estimate_stats()["jobs"] == 6
+
+
+def test_cached_stats_respect_ttl(monkeypatch):
+    stats.clear_stats_cache()
+    jobs_store.get_new_jobs(_jobs(1))
+    first = stats.get_cached_stats()
+    jobs_store.get_new_jobs(_jobs(2, "More"))
+    assert stats.get_cached_stats() == first
+
+    monkeypatch.setattr(stats, "STATS_CACHE_SECONDS", 0)
+    stats.clear_stats_cache()
+    assert stats.get_cached_stats()["jobs"] == 3
+    stats.clear_stats_cache()
+
+
+def test_dashboard_skips_stats_for_non_admins(monkeypatch):
+    async def boom():
+        raise AssertionError("stats queried for a non-admin")
+
+    monkeypatch.setattr(dashboard, "get_cached_stats_async", boom)
+    monkeypatch.setattr(dashboard, "get_stats_async", boom)
+    user_id = create_user("u@example.com", "Passw0rd1")
+    mark_user_email_verified(user_id)
+    client = TestClient(api_module.app)
+    client.cookies.set("session_id", create_session(user_id))
+    assert client.get("/dashboard", follow_redirects=False).status_code == 200
+
+
+def test_admin_dashboard_shows_estimates_unless_exact_requested():
+    stats.clear_stats_cache()
+    user_id = create_user("admin@example.com", "Passw0rd1")
+    mark_user_email_verified(user_id)
+    conn = get_conn()
+    conn.cursor().execute("UPDATE users SET role = 'admin' WHERE id = ?", (user_id,))
+    conn.commit()
+    conn.close()
+    client = TestClient(api_module.app)
+    client.cookies.set("session_id", create_session(user_id))
+    assert "Estimated counts" in client.get("/dashboard").text
+    assert "Exact counts" in client.get("/dashboard?exact=1").text
+    stats.clear_stats_cache()
@@ -0,0 +1,51 @@
+from core.db.base import get_conn
+from core.db.jobs import jobs_store
+from core.db.jobs.location_index import REGION_UK
+
+
+def _jobs(n, prefix):
+    return [
+        {"title": f"{prefix} {i}", "location": "Coventry, United Kingdom", "url": f"https://e.com/{prefix}/{i}",
+         "region": REGION_UK}
+        for i in range(n)
+    ]
+
+
+def test_window_returns_every_recent_job_and_no_old_ones():
+    jobs_store.get_new_jobs(_jobs(5, "old"))
+    conn = get_conn()
+    conn.cursor().execute("UPDATE jobs SET first_seen_at = '2000-01-01T00:00:00'")
+    conn.commit()
+    conn.close()
+    jobs_store.get_new_jobs(_jobs(250, "new"))
+
+    recent = jobs_store.get_all_jobs(region=REGION_UK, since="2020-01-01T00:00:00")
+    assert len(recent) == 250  # no 200-row cap
+    assert all(j["title"].startswith("new") for j in recent)
+    assert len(jobs_store.get_all_jobs(region=REGION_UK)) == 255
+
+
+def test_window_uses_open_region_first_seen_index():
+    conn = get_conn()
+    cur = conn.cursor()
+    # A realistic spread (two regions, a long tail of old jobs) with fresh statistics,
+    # so the planner is not choosing between indexes on default estimates.
+    cur.execute(
+        """
+        INSERT INTO jobs (title, location, url, content_hash, region, first_seen_at, last_seen_at)
+        SELECT 'Job ' || i, 'Somewhere', 'https://e.com/' || i, md5(i::text),
+               CASE WHEN i % 2 = 0 THEN 'uk' ELSE 'us' END,
+               timestamp '2024-01-01' + i * interval '1 hour',
+               timestamp '2024-01-01' + i * interval '1 hour'
+        FROM generate_series(1, 5000) AS i
+        """
+    )
+    conn.commit()
+    cur.execute("ANALYZE jobs")
+    cur.execute(
+        "EXPLAIN SELECT id FROM jobs WHERE region = 'uk' AND first_seen_at >= '2024-07-20' AND closed_at IS NULL "
+        "ORDER BY first_seen_at DESC, id DESC"
+    )
+    plan = "\n".join(next(iter(r.values())) for r in cur.fetchall())
+    conn.close()
+    assert "idx_jobs_open_region_first_seen" in plan
@@ -0,0 +1,54 @@
+import pytest
+
+from core.db import base
+
+
+def test_close_returns_connection_to_pool():
+    base.get_conn().close()
+    opened = base.pool_stats().get("connections_num", 0)
+    for _ in range(20):
+        conn = base.get_conn()
+        conn.cursor().execute("SELECT 1")
+        conn.close()
+        conn.close()  # idempotent
+
+    stats = base.pool_stats()
+    assert stats.get("connections_num", 0) == opened
+    assert stats["pool_max"] == base.POOL_MAX_SIZE
+    assert stats["pool_available"] >= 1
+
+
+def test_uncommitted_work_is_rolled_back_on_return():
+    conn = base.get_conn()
+    cur = conn.cursor()
+    cur.execute("INSERT INTO locations (name) VALUES (?)", ("Pooltown",))
+    conn.close()
+
+    conn = base.get_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT COUNT(*) AS n FROM locations WHERE name = ?", ("Pooltown",))
+    assert cur.fetchone()["n"] == 0
+    conn.close()
+
+
+def test_connection_block_commits_or_rolls_back():
+    with base.connection() as conn:
+        conn.cursor().execute("INSERT INTO locations (name) VALUES (?)", ("Kept",))
+    with pytest.raises(RuntimeError):
+        with base.connection() as conn:
+            conn.cursor().execute("INSERT INTO locations (name) VALUES (?)", ("Dropped",))
+            raise RuntimeError("boom")
+
+    with base.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT name FROM locations WHERE name IN ('Kept', 'Dropped')")
+        assert [r["name"] for r in cur.fetchall()] == ["Kept"]
+
+
+def test_health_reports_pool_stats():
+    from fastapi.testclient import TestClient
+    from app.api import app
+
+    body = TestClient(app).get("/health").json()
+    assert body["status"] == "ok"
+    assert body["db_pool"]["pool_max"] == base.POOL_MAX_SIZE
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta, timezone
+
+from core.db.alerts import create_alert_deliveries, get_delivery_pairs_since
+from core.db.base import get_conn
+from core.db.jobs import jobs_store
+from core.db.subscriptions.subs_store import add_subscription, get_active_subscriptions
+from core.db.users import create_user
+from worker.delivered_pairs import DeliveredPairs
+import worker.main as worker_uk
+
+
+def _seed():
+    jobs_store.get_new_jobs(
+        [
+            {"title": f"Job {i}", "location": "Coventry, United Kingdom", "type": "Full Time",
+             "duration": "Regular", "pay": "", "url": f"https://e.com/{i}"}
+            for i in range(3)
+        ]
+    )
+    user_id = create_user("a@example.com", "Passw0rd1")
+    add_subscription("a@example.com", "Coventry", "Any", active=1)
+    sub = get_active_subscriptions()[0]
+    jobs = jobs_store.get_all_jobs()
+    return user_id, sub, jobs
+
+
+def test_warm_and_incremental_refresh():
+    user_id, sub, jobs = _seed()
+    ids = [j["id"] for j in jobs]
+    create_alert_deliveries(user_id=user_id, subscription_id=sub["id"], job_ids=ids[:1])
+
+    pairs = DeliveredPairs(24)
+    assert pairs.refresh() == 1
+    assert (sub["id"], ids[0]) in pairs
+    assert pairs.unknown(sub["id"], ids) == ids[1:]
+
+    create_alert_deliveries(user_id=user_id, subscription_id=sub["id"], job_ids=ids[1:2])
+    assert pairs.refresh() == 1
+    assert pairs.unknown(sub["id"], ids) == ids[2:]
+
+
+def test_refresh_rebuilds_after_ids_restart():
+    user_id, sub, jobs = _seed()
+    ids = [j["id"] for j in jobs]
+    create_alert_deliveries(user_id=user_id, subscription_id=sub["id"], job_ids=ids)
+    pairs = DeliveredPairs(24)
+    pairs.refresh()
+    assert len(pairs) == 3
+
+    conn = get_conn()
+    conn.cursor().execute("TRUNCATE alert_deliveries RESTART IDENTITY")
+    conn.commit()
+    conn.close()
+    create_alert_deliveries(user_id=user_id, subscription_id=sub["id"], job_ids=ids[:1])
+
+    pairs.refresh()
+    assert len(pairs) == 1
+    rows, max_id = get_delivery_pairs_since(0)
+    assert ([(r[0], r[1]) for r in rows], max_id) == ([(sub["id"], ids[0])], 1)
+
+
+
+def test_pairs_are_bounded_by_the_window():
+    user_id, sub, jobs = _seed()
+    ids = [j["id"] for j in jobs]
+    conn = get_conn()
+    conn.cursor().execute("UPDATE jobs SET first_seen_at = now() - interval '3 days' WHERE id = ?", (ids[0],))
+    conn.commit()
+    conn.close()
+    create_alert_deliveries(user_id=user_id, subscription_id=sub["id"], job_ids=ids[:2])
+
+    # Warm-up skips jobs already outside the window.
+    pairs = DeliveredPairs(24)
+    assert pairs.refresh() == 1
+    assert (sub["id"], ids[1]) in pairs and (sub["id"], ids[0]) not in pairs
+
+    # Once the window moves past a job, its pairs are evicted.
+    assert pairs.refresh(now=datetime.now(timezone.utc) + timedelta(days=2)) == 0
+    assert len(pairs) == 0
+
+def test_queue_skips_known_pairs_without_db(monkeypatch):
+    user_id, sub, jobs = _seed()
+    ids = [j["id"] for j in jobs]
+    create_alert_deliveries(user_id=user_id, subscription_id=sub["id"], job_ids=ids[:2])
+    pairs = DeliveredPairs(24)
+    pairs.refresh()
+    monkeypatch.setattr(worker_uk, "_delivered_pairs", pairs)
+
+    calls = []
+    real = worker_uk.create_alert_deliveries_bulk
+
+    def spy(rows):
+        calls.append([job_id for _user_id, _sub_id, job_id in rows])
+        return real(rows)
+
+    monkeypatch.setattr(worker_uk, "create_alert_deliveries_bulk", spy)
+
+    groups = worker_uk._queue_deliveries([(job, sub) for job in jobs])
+    assert calls == [ids[2:]]
+    assert [job["id"] for _sub_id, job in groups[0][1]] == ids[2:]
+    assert (sub["id"], ids[2]) in pairs
+
+    # Everything is known now: no database round trip at all.
+    assert worker_uk._queue_deliveries([(job, sub) for job in jobs]) == []
+    assert calls == [ids[2:]]
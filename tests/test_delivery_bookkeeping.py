@@ -0,0 +1,115 @@
+from core.db import base
+from core.db.alerts import (
+    create_alert_deliveries_bulk,
+    mark_alert_deliveries_failed_bulk,
+    mark_alert_deliveries_sent_bulk,
+)
+from core.db.base import get_conn
+from core.db.jobs import jobs_store
+from core.db.subscriptions.subs_store import add_subscription, get_active_subscriptions
+from core.db.users import create_user
+from worker.delivery_cycle import DeliveryCycle
+
+
+def _seed():
+    jobs_store.get_new_jobs(
+        [{"title": f"Job {i}", "location": "Coventry, United Kingdom", "url": f"https://e.com/{i}"} for i in range(4)]
+    )
+    user_id = create_user("a@example.com", "Passw0rd1")
+    subs = [add_subscription("a@example.com", loc, "Any", active=1) for loc in ("Coventry", "Any")]
+    job_ids = sorted(j["id"] for j in jobs_store.get_all_jobs())
+    return user_id, subs, job_ids
+
+
+def _statuses():
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT subscription_id, job_id, status, error FROM alert_deliveries ORDER BY subscription_id, job_id")
+    rows = [(r["subscription_id"], r["job_id"], r["status"], r["error"]) for r in cur.fetchall()]
+    conn.close()
+    return rows
+
+
+def test_bulk_insert_returns_only_new_pairs_in_order():
+    user_id, (a, b), jobs = _seed()
+    assert create_alert_deliveries_bulk([(user_id, a, jobs[0])]) == [(a, jobs[0])]
+    rows = [(user_id, b, jobs[1]), (user_id, a, jobs[0]), (user_id, a, jobs[2])]
+    assert create_alert_deliveries_bulk(rows) == [(b, jobs[1]), (a, jobs[2])]
+    assert create_alert_deliveries_bulk(rows) == []
+
+
+def test_bulk_marks_update_exactly_the_given_pairs():
+    user_id, (a, b), jobs = _seed()
+    create_alert_deliveries_bulk([(user_id, s, j) for s in (a, b) for j in jobs[:2]])
+
+    mark_alert_deliveries_sent_bulk({a: [jobs[0]], b: [jobs[1]]})
+    mark_alert_deliveries_failed_bulk({a: [jobs[1]]}, "  SMTP down ")
+    assert _statuses() == [
+        (a, jobs[0], "sent", None),
+        (a, jobs[1], "failed", "SMTP down"),
+        (b, jobs[0], "queued", None),
+        (b, jobs[1], "sent", None),
+    ]
+
+
+def test_bookkeeping_is_one_statement_per_call(monkeypatch):
+    user_id, (a, b), jobs = _seed()
+    statements = []
+    real_execute = base._CursorWrapper.execute
+
+    def spy(self, sql, params=None):
+        statements.append(sql)
+        return real_execute(self, sql, params)
+
+    monkeypatch.setattr(base._CursorWrapper, "execute", spy)
+    create_alert_deliveries_bulk([(user_id, s, j) for s in (a, b) for j in jobs])
+    mark_alert_deliveries_sent_bulk({a: jobs, b: jobs})
+    mark_alert_deliveries_failed_bulk({a: jobs}, "x")
+    assert len(statements) == 3
+
+
+def test_active_subscriptions_carry_their_account():
+    user_id, (a, b), _jobs = _seed()
+    orphan = add_subscription("nobody@example.com", "Coventry", "Any", active=1)
+    accounts = {s["id"]: (s["account_id"], s["account_active"], s["account_verified"]) for s in get_active_subscriptions()}
+    assert accounts == {a: (user_id, 1, True), b: (user_id, 1, True), orphan: (None, None, None)}
+
+
+def test_cycle_borrows_one_connection_per_batch(monkeypatch):
+    user_id, (a, b), jobs = _seed()
+    import worker.delivery_cycle as delivery_cycle
+
+    borrowed = []
+    real_get_conn = delivery_cycle.get_conn
+
+    def counting_get_conn():
+        borrowed.append(1)
+        return real_get_conn()
+
+    monkeypatch.setattr(delivery_cycle, "get_conn", counting_get_conn)
+    cycle = DeliveryCycle()
+    assert borrowed == []  # nothing is held before the first queue()
+
+    assert cycle.queue([(user_id, a, j) for j in jobs[:2]]) == [(a, jobs[0]), (a, jobs[1])]
+    assert cycle.queue([(user_id, b, jobs[0])]) == [(b, jobs[0])]
+    cycle.sent({a: [jobs[0]]})
+    cycle.sent({b: [jobs[0]]})
+    cycle.failed({a: [jobs[1]]}, "SMTP down")
+    assert _statuses()[0][2] == "queued"  # queued rows are committed, marks wait for flush
+    assert cycle.pending() == 3
+    cycle.flush()
+    assert cycle.pending() == 0
+    assert len(borrowed) == 1
+    assert _statuses() == [
+        (a, jobs[0], "sent", None),
+        (a, jobs[1], "failed", "SMTP down"),
+        (b, jobs[0], "sent", None),
+    ]
+
+    # The next batch borrows again; flush() handed the first connection back.
+    cycle.queue([(user_id, b, jobs[1])])
+    cycle.sent({b: [jobs[1]]})
+    cycle.flush()
+    cycle.close()
+    assert len(borrowed) == 2
+    assert _statuses()[-1] == (b, jobs[1], "sent", None)
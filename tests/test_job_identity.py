@@ -0,0 +1,70 @@
+from core.db.alerts import create_alert_deliveries
+from core.db.base import get_conn
+from core.db.jobs import job_identity, jobs_store
+from core.db.jobs.job_identity import backfill_job_identity, job_content_hash
+from core.db.subscriptions.subs_store import add_subscription, get_active_subscriptions
+from core.db.users import create_user
+
+
+def _job(url, title="Warehouse Operative", location="Coventry, United Kingdom"):
+    return {"title": title, "type": "Full Time", "duration": "Regular", "pay": "", "location": location, "url": url}
+
+
+def test_hash_ignores_case_spacing_and_url():
+    a = _job("https://e.com/1")
+    b = _job("https://www.jobsatamazon.co.uk/app#/jobSearch", title=" warehouse  operative", location="Coventry ,united kingdom")
+    assert job_content_hash(a) == job_content_hash(b)
+    assert job_content_hash(a) != job_content_hash(_job("https://e.com/1", location="Rugby, United Kingdom"))
+
+
+def test_same_posting_under_another_url_is_not_new():
+    first = jobs_store.get_new_jobs([_job("https://e.com/1")])
+    second = jobs_store.get_new_jobs([_job("https://www.jobsatamazon.co.uk/app#/jobSearch")])
+    assert len(first) == 1
+    assert second == []
+    rows = jobs_store.get_all_jobs()
+    assert len(rows) == 1
+    assert rows[0]["content_hash"] == job_content_hash(_job(""))
+
+
+def test_backfill_merges_duplicates_and_their_deliveries():
+    user_id = create_user("a@example.com", "Passw0rd1")
+    add_subscription("a@example.com", "Any", "Any", active=1)
+    sub_id = get_active_subscriptions()[0]["id"]
+
+    # Legacy rows stored before content_hash existed.
+    conn = get_conn()
+    cur = conn.cursor()
+    ids = []
+    for url, title in [("https://e.com/1", "Warehouse Operative"), ("https://e.com/2", "WAREHOUSE OPERATIVE"), ("https://e.com/3", "Sorter")]:
+        cur.execute(
+            "INSERT INTO jobs (title, location, url, first_seen_at) VALUES (?, ?, ?, '2024-01-01T00:00:00') RETURNING id",
+            (title, "Coventry, United Kingdom", url),
+        )
+        ids.append(cur.fetchone()["id"])
+    conn.commit()
+    conn.close()
+    create_alert_deliveries(user_id=user_id, subscription_id=sub_id, job_ids=ids)
+
+    assert backfill_job_identity() == 1
+    assert sorted(j["id"] for j in jobs_store.get_all_jobs()) == [ids[0], ids[2]]
+
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT job_id FROM alert_deliveries ORDER BY job_id")
+    assert [r["job_id"] for r in cur.fetchall()] == [ids[0], ids[2]]
+    conn.close()
+
+    assert backfill_job_identity() == 0
+    assert jobs_store.get_new_jobs([_job("https://e.com/9")]) == []
+
+
+def test_backfill_skips_merge_once_hashed_and_indexed(monkeypatch):
+    jobs_store.get_new_jobs([_job("https://e.com/1")])
+    backfill_job_identity()
+
+    def _no_merge(cur):
+        raise AssertionError("job_merge built with nothing to migrate")
+
+    monkeypatch.setattr(job_identity, "_hash_and_merge", _no_merge)
+    assert backfill_job_identity() == 0
@@ -0,0 +1,72 @@
+from core.db.base import get_conn
+from core.db.jobs import jobs_store
+from core.db.jobs.job_kinds import (
+    ANY_KIND,
+    FIXED_TERM,
+    FULL_TIME,
+    PART_TIME,
+    REGULAR,
+    SEASONAL,
+    UNKNOWN_KIND,
+    job_kind_mask,
+    kind_matches,
+    preference_kind_mask,
+)
+from core.db.subscriptions.subs_store import add_subscription, get_active_subscriptions
+import worker.main_us as worker_us
+
+
+def test_raw_strings_normalize_to_flags():
+    assert job_kind_mask("Full Time", "Fixed-term") == FULL_TIME | FIXED_TERM
+    assert job_kind_mask("Full-Time", "fixed term") == FULL_TIME | FIXED_TERM
+    assert job_kind_mask("PART TIME", "Permanent") == PART_TIME | REGULAR
+    assert job_kind_mask("Contract", "") == 0
+    assert job_kind_mask(None, None) == 0
+
+
+def test_preference_masks():
+    assert preference_kind_mask("Any") == ANY_KIND
+    assert preference_kind_mask("") == ANY_KIND
+    assert preference_kind_mask("Seasonal") == SEASONAL
+    assert preference_kind_mask("Permanent") == REGULAR
+    assert preference_kind_mask("Warehouse") == UNKNOWN_KIND
+
+    job = job_kind_mask("Full Time", "Regular")
+    assert kind_matches(job, preference_kind_mask("full time"))
+    assert kind_matches(job, ANY_KIND)
+    assert not kind_matches(job, preference_kind_mask("Part Time"))
+    assert not kind_matches(job, UNKNOWN_KIND)
+
+
+def test_masks_stored_and_filterable_in_sql():
+    inserted = jobs_store.get_new_jobs(
+        [
+            {"title": "A", "type": "Full Time", "duration": "Seasonal", "location": "Coventry", "url": "https://e.com/a"},
+            {"title": "B", "type": "Part Time", "duration": "Regular", "location": "Coventry", "url": "https://e.com/b"},
+        ]
+    )
+    assert inserted[0]["kind_mask"] == FULL_TIME | SEASONAL
+
+    seasonal = jobs_store.get_all_jobs(kind_mask=SEASONAL)
+    assert [j["title"] for j in seasonal] == ["A"]
+    assert len(jobs_store.get_all_jobs(kind_mask=ANY_KIND)) == 2
+
+    add_subscription("k@example.com", "Coventry", "Part Time", active=1)
+    sub = get_active_subscriptions()[0]
+    assert sub["job_kind_mask"] == PART_TIME
+    assert [j["title"] for j in jobs_store.get_all_jobs() if worker_us.job_matches_subscription(j, sub)] == ["B"]
+
+
+def test_backfill_fills_legacy_rows():
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute(
+        "INSERT INTO jobs (title, type, duration, location, url, first_seen_at) VALUES (?, ?, ?, ?, ?, ?)",
+        ("Legacy", "Full Time", "Fixed-term", "Swansea", "https://e.com/legacy", "2025-01-01T00:00:00"),
+    )
+    conn.commit()
+    conn.close()
+
+    assert jobs_store.backfill_job_kinds() == 1
+    assert jobs_store.get_all_jobs()[0]["kind_mask"] == FULL_TIME | FIXED_TERM
+    assert jobs_store.backfill_job_kinds() == 0
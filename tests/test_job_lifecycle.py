@@ -0,0 +1,70 @@
+from core.db import base
+from core.db.base import get_conn
+from core.db.jobs import jobs_store
+from core.db.jobs.location_index import REGION_UK, REGION_US
+
+
+def _job(title="Warehouse Operative", pay="From GBP12.00", url="https://e.com/1"):
+    return {"title": title, "type": "Full Time", "duration": "Regular", "pay": pay,
+            "location": "Coventry, United Kingdom", "url": url}
+
+
+def _age_jobs(hours_ago_iso):
+    conn = get_conn()
+    conn.cursor().execute("UPDATE jobs SET last_seen_at = ?", (hours_ago_iso,))
+    conn.commit()
+    conn.close()
+
+
+def test_upsert_reports_new_and_changed_jobs():
+    first = jobs_store.upsert_jobs([_job(), _job(title="Sorter")])
+    assert len(first["new"]) == 2
+    assert first["changed"] == []
+
+    again = jobs_store.upsert_jobs([_job(), _job(title="Sorter", pay="From GBP13.50"), _job()])
+    assert again["new"] == []
+    assert [(j["title"], j["previous_pay_minor"], j["pay_minor"]) for j in again["changed"]] == [("Sorter", 1200, 1350)]
+
+    sorter = [j for j in jobs_store.get_all_jobs() if j["title"] == "Sorter"][0]
+    assert sorter["pay_minor"] == 1350
+    assert sorter["last_seen_at"] >= sorter["first_seen_at"]
+
+
+def test_stale_jobs_close_and_reopen_when_seen():
+    jobs_store.get_new_jobs([_job(), _job(title="Sorter")])
+    _age_jobs("2000-01-01T00:00:00")
+    jobs_store.get_new_jobs([_job()])  # still listed
+
+    assert jobs_store.close_stale_jobs(24, region=REGION_US) == 0  # another worker's jobs
+    assert jobs_store.close_stale_jobs(24, region=REGION_UK) == 1
+    assert [j["title"] for j in jobs_store.get_all_jobs()] == ["Warehouse Operative"]
+    assert len(jobs_store.get_all_jobs(include_closed=True)) == 2
+    assert jobs_store.get_stats()["jobs"] == 1
+
+    # Listed again: reopened, but not reported as new.
+    assert jobs_store.get_new_jobs([_job(title="Sorter")]) == []
+    assert len(jobs_store.get_all_jobs()) == 2
+    assert jobs_store.close_stale_jobs(24) == 0
+
+
+def test_ingest_round_trips_do_not_grow_with_batch_size(monkeypatch):
+    statements = []
+    real_execute = base._CursorWrapper.execute
+
+    def spy(self, sql, params=None):
+        statements.append(str(sql))
+        return real_execute(self, sql, params)
+
+    monkeypatch.setattr(base._CursorWrapper, "execute", spy)
+    monkeypatch.setattr(base._CursorWrapper, "executemany", lambda *a, **k: statements.append("executemany"))
+
+    jobs_store.upsert_jobs([_job(title="Warm-up")])  # loads the cached location catalog
+    statements.clear()
+    jobs_store.upsert_jobs([_job(title=f"Small {i}", url=f"https://e.com/s{i}") for i in range(2)])
+    small = list(statements)
+    statements.clear()
+    jobs_store.upsert_jobs([_job(title=f"Big {i}", url=f"https://e.com/b{i}") for i in range(60)])
+
+    assert len(statements) == len(small) == 2
+    assert not any("COUNT(" in sql.upper() for sql in small + statements)
+    assert len(jobs_store.get_all_jobs()) == 63
@@ -0,0 +1,104 @@
+from core.db.base import get_conn
+from core.db.jobs import jobs_store, location_index
+from worker.main_us import expand_preferred_locations
+
+
+def _job(location, url):
+    return {
+        "title": "Warehouse Operative",
+        "type": "Full Time",
+        "duration": "Regular",
+        "pay": "From GBP14.30",
+        "location": location,
+        "url": url,
+    }
+
+
+def test_get_new_jobs_stores_location_ids():
+    location_index.clear_location_cache()
+    inserted = jobs_store.get_new_jobs(
+        [_job("Coventry, United Kingdom", "https://example.com/1"), _job("Nowhere, Mars", "https://example.com/2")]
+    )
+    coventry_id = inserted[0]["id"]
+
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT id FROM locations WHERE name = 'Coventry'")
+    location_id = cur.fetchone()["id"]
+    cur.execute("SELECT id FROM area_groups WHERE label = 'Birmingham / Midlands'")
+    group_id = cur.fetchone()["id"]
+    conn.close()
+
+    by_location = jobs_store.get_all_jobs(location_id=location_id)
+    by_group = jobs_store.get_all_jobs(area_group_id=group_id)
+    assert [j["id"] for j in by_location] == [coventry_id]
+    assert [j["id"] for j in by_group] == [coventry_id]
+
+    stats = location_index.get_job_location_stats()
+    assert {"id": group_id, "label": "Birmingham / Midlands", "jobs": 1} in stats["area_groups"]
+
+
+def test_backfill_resolves_legacy_jobs():
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute(
+        "INSERT INTO jobs (title, location, url, first_seen_at) VALUES (?, ?, ?, ?)",
+        ("Legacy", "Swansea, Wales", "https://example.com/legacy", "2025-01-01T00:00:00"),
+    )
+    conn.commit()
+    conn.close()
+
+    assert location_index.backfill_job_locations() > 0
+    assert location_index.backfill_job_locations() == 0
+
+
+def test_backfill_does_not_rescan_unresolvable_jobs(monkeypatch):
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute(
+        "INSERT INTO jobs (title, location, url, first_seen_at) VALUES (?, ?, ?, now())",
+        ("Nowhere", "Atlantis", "https://example.com/nowhere"),
+    )
+    conn.commit()
+    conn.close()
+
+    assert location_index.backfill_job_locations() == 0
+    scanned = []
+    monkeypatch.setattr(location_index, "store_job_locations", lambda cur, jobs: scanned.extend(jobs) or 0)
+    location_index.backfill_job_locations()
+    assert scanned == []
+
+
+def test_preference_ids_agree_with_token_matching():
+    location_index.clear_location_cache()
+    locations = [
+        "Coventry, United Kingdom",
+        "Doncaster (LBA2), United Kingdom",
+        "Gloucester, United Kingdom",
+        "Rochester, NY",
+        "Edinburgh, united kingdom",
+        "",
+    ]
+    prefs = [
+        "Birmingham / Midlands",
+        "Doncaster",
+        "Glasgow",
+        "london; Rochester, NY",
+        "glasgow / edinburgh",
+        "Hinckley; Swindon",
+    ]
+    for raw in prefs:
+        resolved = location_index.resolve_preference(raw)
+        tokens, _ = expand_preferred_locations(raw)
+        for loc in locations:
+            by_tokens = any(tok in loc.lower() for tok in tokens)
+            assert location_index.preference_matches_location(resolved, loc) == by_tokens, (raw, loc)
+
+
+def test_resolve_preference_any_and_groups():
+    any_pref = location_index.resolve_preference("London; Any")
+    assert any_pref["any"] is True
+    assert location_index.preference_is_empty(any_pref)
+
+    group_pref = location_index.resolve_preference("Midlands")
+    assert group_pref["area_group_ids"] and not group_pref["tokens"]
@@ -1,4 +1,4 @@
-from worker.main_us import job_matches_subscription, expand_preferred_locations, _location_matches
+from worker.main_us import job_matches_subscription, expand_preferred_locations
 
 
 def test_expand_any():
@@ -14,13 +14,6 @@ def test_expand_area_group_and_specific():
     assert "london" in tokens or any("london" in t for t in tokens)
 
 
-def test_location_matches_tokenized():
-    job_loc = "Coventry, United Kingdom"
-    tokens = ["coventry"]
-    assert _location_matches(tokens, job_loc)
-    assert not _location_matches(["manchester"], job_loc)
-
-
 def test_job_matches_any_location():
     job = {"location": "Anywhere", "type": "Full Time", "duration": "Regular"}
     sub = {"preferred_location": "Any", "job_type": "Any"}
@@ -0,0 +1,127 @@
+from datetime import datetime, timezone
+
+from core.db.base import _connect, get_conn
+from core.db.migrations import (
+    _TO_TIMESTAMPTZ,
+    MIGRATIONS,
+    Migration,
+    applied_versions,
+    check_hot_query_plans,
+    run_migrations,
+)
+
+
+def _execute(*statements):
+    conn = get_conn()
+    cur = conn.cursor()
+    for sql in statements:
+        cur.execute(sql)
+    conn.commit()
+    conn.close()
+
+
+def test_init_db_records_every_migration():
+    assert applied_versions() == [m.version for m in MIGRATIONS]
+    assert run_migrations() == []
+
+
+def test_pending_migrations_apply_once_in_order():
+    extra = [
+        Migration(9002, "second", ["ALTER TABLE migration_probe ADD COLUMN IF NOT EXISTS b INTEGER"]),
+        Migration(9001, "first", ["CREATE TABLE migration_probe (a INTEGER)"]),
+    ]
+    try:
+        assert run_migrations(extra) == [9001, 9002]
+        assert run_migrations(extra) == []
+        assert applied_versions()[-2:] == [9001, 9002]
+    finally:
+        _execute("DROP TABLE IF EXISTS migration_probe", "DELETE FROM schema_version WHERE version >= 9000")
+
+
+def test_failed_migration_is_not_recorded():
+    broken = [Migration(9003, "broken", ["CREATE TABLE migration_probe (a INTEGER)", "SELECT * FROM no_such_table"])]
+    try:
+        try:
+            run_migrations(broken)
+        except Exception:
+            pass
+        else:
+            raise AssertionError("the broken migration should raise")
+        assert 9003 not in applied_versions()
+        conn = get_conn()
+        cur = conn.cursor()
+        cur.execute("SELECT to_regclass('migration_probe') AS t")
+        assert cur.fetchone()["t"] is None  # rolled back with the failing statement
+        conn.close()
+    finally:
+        _execute("DROP TABLE IF EXISTS migration_probe", "DELETE FROM schema_version WHERE version >= 9000")
+
+
+def test_text_timestamps_convert_to_utc_timestamptz():
+    conn = _connect(autocommit=True)
+    try:
+        conn.execute("DROP SCHEMA IF EXISTS legacy_ts CASCADE")
+        conn.execute("CREATE SCHEMA legacy_ts")
+        conn.execute("SET search_path TO legacy_ts")
+        conn.execute("CREATE TABLE sessions (id TEXT, created_at TEXT, last_seen_at TEXT, expires_at TEXT)")
+        conn.execute("INSERT INTO sessions VALUES ('a', '2024-05-01T12:30:00', '', '2024-05-01T13:00:00')")
+        conn.execute(_TO_TIMESTAMPTZ)
+        conn.execute(_TO_TIMESTAMPTZ)  # already converted: a no-op
+
+        types = conn.execute(
+            "SELECT column_name, data_type FROM information_schema.columns "
+            "WHERE table_schema = 'legacy_ts' AND table_name = 'sessions' ORDER BY column_name"
+        ).fetchall()
+        assert {r["column_name"]: r["data_type"] for r in types} == {
+            "created_at": "timestamp with time zone",
+            "expires_at": "timestamp with time zone",
+            "id": "text",
+            "last_seen_at": "timestamp with time zone",
+        }
+        row = conn.execute("SELECT created_at, last_seen_at FROM sessions").fetchone()
+        assert row["created_at"] == datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+        assert row["last_seen_at"] is None
+    finally:
+        conn.execute("DROP SCHEMA IF EXISTS legacy_ts CASCADE")
+        conn.close()
+
+
+def test_hot_queries_use_their_indexes():
+    # Realistic row counts with fresh statistics, so plans are not chosen on defaults.
+    _execute(
+        """
+        INSERT INTO users (email, password_hash, created_at)
+        SELECT 'user' || i || '@example.com', 'x', '2024-01-01T00:00:00' FROM generate_series(1, 500) AS i
+        """,
+        """
+        INSERT INTO subscriptions (user_id, email, preferred_location, created_at, active, region)
+        SELECT 1 + i % 500, 'User' || (i % 500) || '@example.com', 'Coventry', '2024-01-01T00:00:00',
+               CASE WHEN i % 3 = 0 THEN 0 ELSE 1 END,
+               (ARRAY['uk', 'us', 'all'])[1 + i % 3]
+        FROM generate_series(1, 3000) AS i
+        """,
+        """
+        INSERT INTO jobs (title, location, url, content_hash, region, first_seen_at, last_seen_at, closed_at)
+        SELECT 'Job ' || i, 'Somewhere', 'https://e.com/' || i, md5(i::text), 'uk',
+               timestamp '2024-01-01' + i * interval '1 hour',
+               timestamp '2024-01-01' + i * interval '1 hour',
+               CASE WHEN i % 4 = 0 THEN timestamptz '2025-01-01' END
+        FROM generate_series(1, 5000) AS i
+        """,
+        """
+        INSERT INTO alert_deliveries (user_id, subscription_id, job_id, status, created_at)
+        SELECT 1 + i % 500, i, 1 + i % 5000, 'sent',
+               timestamp '2024-01-01' + i * interval '1 minute'
+        FROM generate_series(1, 3000) AS i
+        """,
+        """
+        INSERT INTO sessions (id, user_id, created_at, last_seen_at, expires_at)
+        SELECT md5(i::text), 1 + i % 500, '2024-01-01T00:00:00', '2024-01-01T00:00:00',
+               timestamp '2024-01-01' + i * interval '1 minute'
+        FROM generate_series(1, 3000) AS i
+        """,
+        "ANALYZE users, subscriptions, jobs, alert_deliveries, sessions",
+    )
+
+    misses = [(r["label"], r["plan"]) for r in check_hot_query_plans() if not r["ok"]]
+    assert misses == []
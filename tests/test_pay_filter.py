@@ -0,0 +1,78 @@
+import pytest
+
+from core.db.base import get_conn
+from core.db.jobs import jobs_store
+from core.db.jobs.pay import amount_to_minor, min_pay_floor, parse_pay
+from core.db.subscriptions.subs_store import add_subscription, get_active_subscriptions
+from worker import bitset_matcher
+import worker.main as worker_uk
+import worker.main_us as worker_us
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [
+        ("From GBP14.30", (1430, "GBP")),
+        ("From $19.75", (1975, "USD")),
+        ("£12 - £13.50 per hour", (1200, "GBP")),
+        ("$41,600 per year", (2000, "USD")),
+        ("Competitive", (None, None)),
+        ("", (None, None)),
+        (None, (None, None)),
+    ],
+)
+def test_parse_pay(raw, expected):
+    assert parse_pay(raw) == expected
+
+
+def test_amount_to_minor_and_floor():
+    assert amount_to_minor("14.5") == 1450
+    assert amount_to_minor("£15") == 1500
+    assert amount_to_minor("abc") is None
+    assert amount_to_minor("0") is None
+    assert min_pay_floor([{"min_pay_minor": 1500}, {"min_pay_minor": 1400}]) == 1400
+    assert min_pay_floor([{"min_pay_minor": 1500}, {"min_pay_minor": None}]) is None
+
+
+def _job(title, pay):
+    return {"title": title, "type": "Full Time", "duration": "Regular", "pay": pay, "location": "Coventry, United Kingdom", "url": f"https://e.com/{title}"}
+
+
+def test_pay_stored_and_filtered_in_sql():
+    jobs_store.get_new_jobs([_job("low", "From GBP11.00"), _job("high", "From GBP15.00"), _job("unknown", "")])
+    titles = {j["title"] for j in jobs_store.get_all_jobs(min_pay_minor=1400)}
+    assert titles == {"high", "unknown"}
+    stored = {j["title"]: (j["pay_minor"], j["pay_currency"]) for j in jobs_store.get_all_jobs()}
+    assert stored["low"] == (1100, "GBP")
+
+
+
+def test_backfill_job_pay_reads_each_legacy_row_once():
+    conn = get_conn()
+    cur = conn.cursor()
+    for title, pay in [("Paid", "From GBP12.00"), ("Vague", "Competitive")]:
+        cur.execute(
+            "INSERT INTO jobs (title, pay, url, first_seen_at) VALUES (?, ?, ?, now())",
+            (title, pay, f"https://e.com/{title}"),
+        )
+    conn.commit()
+    conn.close()
+
+    assert jobs_store.backfill_job_pay() == 1
+    assert {j["title"]: j["pay_minor"] for j in jobs_store.get_all_jobs()} == {"Paid": 1200, "Vague": None}
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT count(*) AS n FROM jobs WHERE pay_parsed_at IS NULL")
+    assert cur.fetchone()["n"] == 0
+    conn.close()
+
+def test_min_pay_in_matchers():
+    add_subscription("p@example.com", "Coventry", "Any", active=1, min_pay_minor=1400)
+    sub = get_active_subscriptions()[0]
+    assert sub["min_pay_minor"] == 1400
+
+    jobs = [dict(_job("low", "From GBP11.00"), id=1), dict(_job("high", "From GBP15.00"), id=2)]
+    for module in (worker_uk, worker_us):
+        assert [j["id"] for j in jobs if module.job_matches_subscription(j, sub)] == [2]
+        if bitset_matcher.available():
+            assert [j["id"] for j, _s in module.iter_matches(jobs, [sub], engine="numpy")] == [2]
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from worker.pipeline import run_pipeline
+
+
+async def _source(jobs, events=None):
+    for job in jobs:
+        if events is not None:
+            events.append(("scraped", job["id"]))
+        yield job
+        await asyncio.sleep(0)
+
+
+def test_pipeline_streams_jobs_through_all_stages():
+    events = []
+    jobs = [{"id": i} for i in range(10)]
+
+    def ingest(batch):
+        events.append(("ingested", [j["id"] for j in batch]))
+        return [j for j in batch if j["id"] % 2 == 0]  # odd ids already stored
+
+    async def match(new_jobs):
+        return [(f"user{j['id']}@example.com", [(1, j)], {1: [j["id"]]}) for j in new_jobs]
+
+    def deliver(email, items, sub_to_job_ids):
+        events.append(("sent", email))
+        return True
+
+    stats = asyncio.run(run_pipeline(_source(jobs, events), ingest=ingest, match=match, deliver=deliver, batch_size=3, queue_size=2))
+
+    assert stats == {"scraped": 10, "new": 5, "groups": 5, "sent": 5}
+    assert [e[1] for e in events if e[0] == "sent"] == [f"user{i}@example.com" for i in range(0, 10, 2)]
+    assert all(len(e[1]) <= 3 for e in events if e[0] == "ingested")
+    # The first alert goes out before the scrape has finished.
+    first_sent = next(i for i, e in enumerate(events) if e[0] == "sent")
+    assert first_sent < events.index(("scraped", 9))
+
+
+def test_pipeline_stage_failure_cancels_the_rest():
+    async def endless():
+        i = 0
+        while True:
+            yield {"id": i}
+            i += 1
+            await asyncio.sleep(0)
+
+    def ingest(batch):
+        raise RuntimeError("db down")
+
+    async def match(new_jobs):
+        return []
+
+    with pytest.raises(RuntimeError, match="db down"):
+        asyncio.run(run_pipeline(endless(), ingest=ingest, match=match, deliver=lambda *g: True, queue_size=2))
+
+
+def test_pipeline_flushes_after_each_delivered_batch():
+    events = []
+
+    async def match(new_jobs):
+        return [(j["id"],) for j in new_jobs]
+
+    def deliver(job_id):
+        events.append(("sent", job_id))
+        return True
+
+    stats = asyncio.run(
+        run_pipeline(
+            _source([{"id": i} for i in range(4)]),
+            ingest=lambda batch: batch,
+            match=match,
+            deliver=deliver,
+            flush=lambda: events.append(("flush",)),
+            batch_size=2,
+        )
+    )
+
+    assert stats["sent"] == 4
+    assert events[-1] == ("flush",)
+    # Every delivery is followed by a flush before the pipeline returns.
+    last_sent = max(i for i, e in enumerate(events) if e[0] == "sent")
+    assert ("flush",) in events[last_sent:]
+    assert events.count(("flush",)) >= 2
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from worker import bitset_matcher
+from worker.preference_classes import PreferenceClasses
+import worker.main as worker_uk
+import worker.main_us as worker_us
+
+ENGINES = ["python", "numpy"] if bitset_matcher.available() else ["python"]
+
+
+def _subs():
+    prefs = ["Any", "Coventry", "coventry", "Leeds", "", "  leeds ", "Any"]
+    subs = [
+        {"id": i, "email": f"u{i}@example.com", "preferred_location": p, "job_type": "Any", "active": 1}
+        for i, p in enumerate(prefs, start=1)
+    ]
+    subs.append({"id": 50, "email": "pt@example.com", "preferred_location": "Coventry", "job_type": "Part Time", "active": 1})
+    subs.append({"id": 51, "email": "rich@example.com", "preferred_location": "Any", "job_type": "Any", "active": 1, "min_pay_minor": 2000})
+    subs.append({"id": 52, "email": "off@example.com", "preferred_location": "Coventry", "job_type": "Any", "active": 0})
+    return subs
+
+
+def _jobs():
+    return [
+        {"id": 1, "location": "Coventry, United Kingdom", "type": "Full Time", "duration": "Regular", "pay": "From £14.30"},
+        {"id": 2, "location": "Leeds, United Kingdom", "type": "Part Time", "duration": "Regular", "pay": "From £21.00"},
+        {"id": 3, "location": "Glasgow, United Kingdom", "type": "Full Time", "duration": "Regular", "pay": ""},
+    ]
+
+
+def test_fan_out_keeps_job_major_subscription_order():
+    subs = [{"k": "a"}, {"k": "b"}, {"k": "a"}, {"k": "c"}, {"k": "b"}]
+    classes = PreferenceClasses(subs, lambda s: s["k"])
+    assert len(classes) == 3
+    assert classes.members == [[0, 2], [1, 4], [3]]
+
+    jobs = ["j0", "j1"]
+    pairs = list(classes.fan_out(jobs, [(0, 1), (0, 0), (1, 2)]))
+    assert pairs == [("j0", subs[0]), ("j0", subs[1]), ("j0", subs[2]), ("j0", subs[4]), ("j1", subs[3])]
+
+
+@pytest.mark.parametrize("worker", [worker_uk, worker_us])
+def test_equal_preferences_share_a_class(worker):
+    classes = PreferenceClasses(_subs(), worker.preference_key)
+    # case and surrounding whitespace do not split a class
+    assert len(classes) < len(_subs())
+    keys = [worker.preference_key(s) for s in _subs()]
+    assert keys[1] == keys[2]
+    assert keys[3] == keys[5]
+    assert keys[1] != keys[7]  # different job kind
+    assert keys[0] != keys[8]  # different minimum pay
+
+
+@pytest.mark.parametrize("worker", [worker_uk, worker_us])
+@pytest.mark.parametrize("engine", ENGINES)
+def test_grouped_matching_equals_per_subscription(worker, engine):
+    subs, jobs = _subs(), _jobs()
+    expected = [(job["id"], sub["id"]) for job in jobs for sub in subs if worker.job_matches_subscription(job, sub)]
+    got = [(job["id"], sub["id"]) for job, sub in worker.iter_matches(jobs, subs, engine=engine)]
+    assert got == expected
+
+
+@pytest.mark.parametrize("worker", [worker_uk, worker_us])
+def test_process_engine_fans_out_classes(worker, monkeypatch):
+    monkeypatch.setattr(worker, "MATCH_ENGINE", "process")
+    monkeypatch.setattr(worker, "MATCH_SHARDS", 1)
+    monkeypatch.setattr(worker, "_sharded_matcher", None)
+    subs, jobs = _subs(), _jobs()
+    expected = [(job["id"], sub["id"]) for job in jobs for sub in subs if worker.job_matches_subscription(job, sub)]
+    try:
+        got = [(job["id"], sub["id"]) for job, sub in asyncio.run(worker.match_pairs(jobs, subs))]
+    finally:
+        worker._sharded_matcher.shutdown()
+    assert got == expected
+
+
+def test_alert_body_rendered_once_per_job_list(monkeypatch):
+    calls = []
+    real = worker_uk.format_alert_body
+    monkeypatch.setattr(worker_uk, "format_alert_body", lambda jobs: calls.append(1) or real(jobs))
+    worker_uk._rendered_bodies.clear()
+    job = _jobs()[0]
+    a = worker_uk._render_alert_body([(1, job)])
+    b = worker_uk._render_alert_body([(2, job)])
+    assert a == b
+    assert len(calls) == 1
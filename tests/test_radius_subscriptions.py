@@ -0,0 +1,65 @@
+from core.db.jobs import location_index
+from core.db.jobs.spatial_index import SpatialGrid, haversine_miles
+from core.db.subscriptions.subs_store import (
+    add_subscription,
+    get_active_subscriptions,
+    update_subscription_for_user,
+)
+from worker import bitset_matcher
+import worker.main as worker_uk
+import worker.main_us as worker_us
+
+
+def test_haversine_known_distance():
+    # Coventry -> Birmingham is roughly 18 miles
+    assert 15 < haversine_miles(52.4068, -1.5197, 52.4862, -1.8904) < 21
+
+
+def test_grid_matches_brute_force():
+    points = [(i, 50 + (i % 17) * 0.37, -5 + (i // 17) * 0.41) for i in range(300)]
+    grid = SpatialGrid(points)
+    for lat, lon, miles in [(52.0, -1.5, 25), (55.1, -3.0, 60), (50.0, -5.0, 5)]:
+        expected = sorted(k for k, plat, plon in points if haversine_miles(lat, lon, plat, plon) <= miles)
+        assert sorted(grid.within(lat, lon, miles)) == expected
+
+
+def test_radius_expands_to_nearby_sites():
+    location_index.clear_location_cache()
+    names = location_index.radius_tokens("Coventry", 25)
+    assert "coventry" in names
+    assert "rugby" in names
+    assert "birmingham" in names
+    assert "glasgow" not in names
+    assert location_index.radius_tokens("Coventry", None) == []
+
+
+def test_radius_subscription_matches_nearby_job():
+    location_index.clear_location_cache()
+    job = {"location": "Rugby, United Kingdom", "type": "Full Time", "duration": "Regular"}
+    sub = {"preferred_location": "Coventry", "job_type": "Any", "active": 1}
+    assert not worker_us.job_matches_subscription(job, sub)
+
+    sub["radius_miles"] = 25
+    assert worker_us.job_matches_subscription(job, sub)
+    assert worker_uk.job_matches_subscription(job, sub)
+
+    far_job = {"location": "Glasgow, United Kingdom", "type": "Full Time", "duration": "Regular"}
+    assert not worker_us.job_matches_subscription(far_job, sub)
+
+
+def test_radius_set_through_update_flow():
+    location_index.clear_location_cache()
+    add_subscription("r@example.com", "Coventry", "Any", active=1)
+    sub_id = get_active_subscriptions()[0]["id"]
+
+    assert update_subscription_for_user(sub_id, "r@example.com", "Coventry", "Any", radius_miles=25)
+    sub = get_active_subscriptions()[0]
+    assert sub["radius_miles"] == 25
+
+    job = {"id": 1, "location": "Rugby, United Kingdom", "type": "Full Time", "duration": "Regular"}
+    engines = ["python", "numpy"] if bitset_matcher.available() else ["python"]
+    for engine in engines:
+        assert [(j["id"], s["id"]) for j, s in worker_us.iter_matches([job], [sub], engine=engine)] == [(1, sub_id)]
+
+    assert update_subscription_for_user(sub_id, "r@example.com", "Coventry", "Any", radius_miles=None)
+    assert get_active_subscriptions()[0]["radius_miles"] is None
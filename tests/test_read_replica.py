@@ -0,0 +1,90 @@
+import asyncio
+import os
+
+import psycopg
+import pytest
+from psycopg.conninfo import conninfo_to_dict, make_conninfo
+
+from core.db import base
+from core.db.jobs import get_locations, get_locations_async
+
+
+def _replica_url() -> str:
+    """
+    TEST_DATABASE_READ_URL (a second local Postgres instance), or a sibling database on
+    the test server. Either way it must be writable: the test gives it its own rows.
+    """
+    url = os.getenv("TEST_DATABASE_READ_URL")
+    if url:
+        return url
+    params = conninfo_to_dict(base.database_url)
+    name = f"{params.get('dbname') or 'postgres'}_replica"
+    with psycopg.connect(base.database_url, autocommit=True) as conn:
+        if conn.execute("SELECT 1 FROM pg_database WHERE datname = %s", (name,)).fetchone() is None:
+            conn.execute(f"CREATE DATABASE \"{name}\" ENCODING 'UTF8' TEMPLATE template0")
+    return make_conninfo(base.database_url, dbname=name)
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    url = _replica_url()
+    with psycopg.connect(url, autocommit=True) as conn:
+        conn.execute("DROP TABLE IF EXISTS locations")
+        conn.execute(
+            "CREATE TABLE locations (id SERIAL PRIMARY KEY, code TEXT, name TEXT, region TEXT, "
+            "country TEXT, active INTEGER DEFAULT 1)"
+        )
+        conn.execute("INSERT INTO locations (name) VALUES ('Replicaville')")
+    base.close_pool()
+    monkeypatch.setattr(base, "read_database_url", url)
+    yield url
+    base.close_pool()
+
+
+def test_without_replica_reads_use_the_primary():
+    assert not base.reads_use_replica()
+    assert "Replicaville" not in [l["name"] for l in get_locations()]
+    assert base.read_pool_stats() == {}
+
+
+def test_read_helpers_use_replica_unless_pinned(replica):
+    assert [l["name"] for l in get_locations()] == ["Replicaville"]
+    assert base.read_pool_stats()["pool_size"] >= 1
+    with base.reads_on_primary():
+        assert not base.reads_use_replica()
+        assert "Replicaville" not in [l["name"] for l in get_locations()]
+    assert base.reads_use_replica()
+
+    # get_conn() (writes, read-after-write) never goes to the replica.
+    conn = base.get_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT COUNT(*) AS n FROM locations WHERE name = 'Replicaville'")
+    assert cur.fetchone()["n"] == 0
+    conn.close()
+
+
+def test_async_read_helpers_follow_the_same_routing(replica):
+    async def names():
+        return [l["name"] for l in await get_locations_async()]
+
+    async def pinned():
+        with base.reads_on_primary():
+            return await names()
+
+    assert asyncio.run(names()) == ["Replicaville"]
+    assert "Replicaville" not in asyncio.run(pinned())
+
+
+def test_app_reads_from_primary_after_a_write(replica):
+    from fastapi.testclient import TestClient
+    from app.api import READ_PRIMARY_COOKIE, app
+
+    client = TestClient(app)
+    assert "Replicaville" in client.get("/").text
+
+    response = client.post("/login", data={"email": "nobody@example.com", "password": "x"})
+    assert response.cookies.get(READ_PRIMARY_COOKIE) == "1"
+    assert "Replicaville" not in client.get("/").text
+
+    client.cookies.delete(READ_PRIMARY_COOKIE)
+    assert "Replicaville" in client.get("/").text
@@ -0,0 +1,88 @@
+from core.db.alerts.matching_store import match_jobs_to_deliveries
+from core.db.base import get_conn
+from core.db.jobs import jobs_store, location_index
+from core.db.jobs.location_index import REGION_ALL, REGION_UK, REGION_US, location_region, preference_region
+from core.db.subscriptions.subs_store import add_subscription, get_active_subscriptions, update_subscription_for_user
+from core.db.users import create_user
+import worker.main as worker_uk
+import worker.main_us as worker_us
+
+
+def test_location_region():
+    assert location_region("Coventry, United Kingdom") == REGION_UK
+    assert location_region("Rochester, NY") == REGION_US
+    assert location_region("Seattle, United States") == REGION_US
+    assert location_region("Somewhere") is None
+
+
+def test_preference_region():
+    location_index.clear_location_cache()
+    assert preference_region("Coventry; Birmingham / Midlands") == REGION_UK
+    assert preference_region("US Test") == REGION_US
+    assert preference_region("Rochester, NY") == REGION_US
+    assert preference_region("Any") == REGION_ALL
+    assert preference_region("") == REGION_ALL
+    assert preference_region("Coventry; Rochester, NY") == REGION_ALL
+    assert preference_region("Atlantis") == REGION_ALL
+
+
+def test_us_seed_locations_belong_to_the_us_worker():
+    location_index.clear_location_cache()
+    assert preference_region("Portland") == REGION_US
+    sub_id = add_subscription("us@example.com", "Portland", "Any", active=1)
+    subs = get_active_subscriptions(region=REGION_US)
+    assert [s["id"] for s in subs] == [sub_id]
+
+    job = {"id": 1, "title": "B", "location": "Portland, OR", "type": "Full Time", "duration": "Regular"}
+    assert [sub["id"] for _job, sub in worker_us.iter_matches([job], subs)] == [sub_id]
+
+
+def test_subscriptions_filtered_by_region():
+    location_index.clear_location_cache()
+    add_subscription("uk@example.com", "Coventry", "Any", active=1)
+    add_subscription("us@example.com", "Rochester, NY", "Any", active=1)
+    add_subscription("any@example.com", "Any", "Any", active=1)
+
+    emails = lambda region: sorted(s["email"] for s in get_active_subscriptions(region=region))
+    assert emails(REGION_UK) == ["any@example.com", "uk@example.com"]
+    assert emails(REGION_US) == ["any@example.com", "us@example.com"]
+    assert len(get_active_subscriptions()) == 3
+
+    uk_sub = [s for s in get_active_subscriptions() if s["email"] == "uk@example.com"][0]
+    update_subscription_for_user(uk_sub["id"], "uk@example.com", "US Test", "Any")
+    assert emails(REGION_UK) == ["any@example.com"]
+
+
+def test_jobs_tagged_at_ingest_and_filtered():
+    worker_uk._ingest([{"title": "A", "location": "Coventry, United Kingdom", "url": "https://e.com/a"}])
+    worker_us._ingest([{"title": "B", "location": "Rochester, NY", "url": "https://e.com/b"}])
+    assert [j["title"] for j in jobs_store.get_all_jobs(region=REGION_UK)] == ["A"]
+    assert [j["title"] for j in jobs_store.get_all_jobs(region=REGION_US)] == ["B"]
+
+
+def test_sql_matching_respects_region():
+    location_index.clear_location_cache()
+    for email in ("uk@example.com", "any@example.com"):
+        create_user(email, "Passw0rd1")
+    add_subscription("uk@example.com", "Rochester", "Any", active=1)
+    add_subscription("any@example.com", "Any", "Any", active=1)
+    job = worker_us._ingest([{"title": "B", "location": "Rochester, NY", "url": "https://e.com/b"}])[0]
+
+    rows = match_jobs_to_deliveries([job["id"]], empty_pref_matches_all=False, region=REGION_US)
+    assert [r["email"] for r in rows] == ["any@example.com"]
+
+
+def test_backfill_job_regions_defaults_unknown_locations():
+    conn = get_conn()
+    cur = conn.cursor()
+    for title, location in [("US", "Rochester, NY"), ("Unknown", "Atlantis")]:
+        cur.execute(
+            "INSERT INTO jobs (title, location, url, first_seen_at) VALUES (?, ?, ?, now())",
+            (title, location, f"https://e.com/{title}"),
+        )
+    conn.commit()
+    conn.close()
+
+    assert jobs_store.backfill_job_regions() == 2
+    assert {j["title"]: j["region"] for j in jobs_store.get_all_jobs()} == {"US": REGION_US, "Unknown": REGION_UK}
+    assert jobs_store.backfill_job_regions() == 0
@@ -1,6 +1,8 @@
+import asyncio
 import types
 
 import pytest
+from fastapi import BackgroundTasks
 
 from app import security
 from app.routes import admin
@@ -64,7 +66,7 @@ def test_login_rejects_missing_csrf(monkeypatch):
         client=types.SimpleNamespace(host="127.0.0.1"),
         cookies={security.CSRF_COOKIE_NAME: "cookie-token"},
     )
-    resp = auth.login(dummy_req, email="user@example.com", password="bad", csrf_token="wrong")
+    resp = asyncio.run(auth.login(dummy_req, email="user@example.com", password="bad", csrf_token="wrong"))
     assert resp.status_code == 403
 
 
@@ -86,6 +88,7 @@ def test_subscribe_rejects_missing_csrf(monkeypatch):
         cookies={security.CSRF_COOKIE_NAME: "cookie-token"},
     )
     resp = public.subscribe(
+        background_tasks=BackgroundTasks(),
         email="user@example.com",
         password="Passw0rd1",
         password2="Passw0rd1",
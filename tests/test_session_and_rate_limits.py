@@ -1,6 +1,8 @@
+import asyncio
 import types
 
 import pytest
+from fastapi import BackgroundTasks
 
 from app import security
 from app.routes import auth, admin, public
@@ -23,9 +25,9 @@ def test_login_rate_limit(monkeypatch):
     )
 
     # first call passes limit check but fails CSRF -> 403
-    resp1 = auth.login(dummy_req, email="user@example.com", password="bad", csrf_token="wrong")
+    resp1 = asyncio.run(auth.login(dummy_req, email="user@example.com", password="bad", csrf_token="wrong"))
     # second call exceeds limit -> 429
-    resp2 = auth.login(dummy_req, email="user@example.com", password="bad", csrf_token="wrong")
+    resp2 = asyncio.run(auth.login(dummy_req, email="user@example.com", password="bad", csrf_token="wrong"))
     assert resp2.status_code == 429
 
 
@@ -43,6 +45,7 @@ def test_subscribe_rate_limit(monkeypatch):
     )
 
     resp1 = public.subscribe(
+        background_tasks=BackgroundTasks(),
         email="user@example.com",
         password="Passw0rd1",
         password2="Passw0rd1",
@@ -54,6 +57,7 @@ def test_subscribe_rate_limit(monkeypatch):
         request=dummy_req,
     )
     resp2 = public.subscribe(
+        background_tasks=BackgroundTasks(),
         email="user@example.com",
         password="Passw0rd1",
         password2="Passw0rd1",
@@ -78,3 +82,23 @@ def test_session_cleared_for_missing_user(monkeypatch):
     resp = auth.logout(DummyReq())
     # Should redirect to home when session is gone
     assert resp.status_code in (302, 303)
+
+
+def test_expired_sessions_are_filtered_and_purged():
+    from core.db.base import get_conn
+    from core.db.users import create_session, create_user, get_session, purge_expired_sessions
+
+    user_id = create_user("sess@example.com", "Passw0rd1")
+    live = create_session(user_id)
+    expired = [create_session(user_id), create_session(user_id)]
+    conn = get_conn()
+    conn.cursor().execute("UPDATE sessions SET expires_at = '2000-01-01T00:00:00' WHERE id = ANY(?)", (expired,))
+    conn.commit()
+    conn.close()
+
+    assert get_session(expired[0]) is None  # expired in SQL, and dropped
+    assert purge_expired_sessions() == 1
+    session = get_session(live)
+    assert session["expires_at"].tzinfo is not None
+    assert session["expires_at"] > session["created_at"]
+    assert purge_expired_sessions() == 0
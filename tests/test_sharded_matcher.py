@@ -0,0 +1,88 @@
+import asyncio
+
+import worker.main_us as worker_us
+from worker.sharded_matcher import ShardedMatcher
+
+
+JOBS = [
+    {"id": 1, "location": "Coventry, United Kingdom", "type": "Full Time", "duration": "Fixed-term"},
+    {"id": 2, "location": "Rochester, NY", "type": "Full Time", "duration": "Seasonal"},
+    {"id": 3, "location": "Edinburgh, United Kingdom", "type": "Part Time", "duration": "Regular"},
+]
+
+
+def _subs():
+    return [
+        {"id": i, "email": f"u{i}@example.com", "preferred_location": loc, "job_type": jt, "active": 1}
+        for i, (loc, jt) in enumerate(
+            [
+                ("Any", "Any"),
+                ("Birmingham / Midlands", "Full Time"),
+                ("Rochester, NY", "Any"),
+                ("Glasgow / Edinburgh", "Part Time"),
+                ("London", "Any"),
+                ("Any", "Seasonal"),
+                ("", "Any"),
+            ],
+            start=1,
+        )
+    ]
+
+
+def _ids(pairs):
+    return [(j["id"], s["id"]) for j, s in pairs]
+
+
+def test_sharded_matches_in_process_results():
+    subs = _subs()
+    expected = _ids(worker_us.iter_matches(JOBS, subs, engine="python"))
+
+    matcher = ShardedMatcher(3, worker_us._subscription_prefs)
+    try:
+        got = _ids(asyncio.run(matcher.match(JOBS, subs)))
+    finally:
+        matcher.shutdown()
+
+    assert got == expected
+
+
+def test_sharded_ships_only_changed_subscriptions():
+    subs = _subs()
+    matcher = ShardedMatcher(2, worker_us._subscription_prefs)
+    try:
+        asyncio.run(matcher.match(JOBS, subs))
+        assert (matcher.reloads, matcher.shipped) == (2, 0)
+
+        asyncio.run(matcher.match(JOBS, subs))
+        assert (matcher.reloads, matcher.shipped) == (2, 0)  # unchanged subscriptions are not re-shipped
+
+        subs[1]["preferred_location"] = "London"  # edited
+        subs.pop(4)  # removed (id=5)
+        subs.append({"id": 8, "email": "u8@example.com", "preferred_location": "Coventry", "job_type": "Any", "active": 1})
+        got = _ids(asyncio.run(matcher.match(JOBS, subs)))
+        # The live executors get just those three entries; no shard is restarted.
+        assert (matcher.reloads, matcher.shipped) == (2, 3)
+        assert got == _ids(worker_us.iter_matches(JOBS, subs, engine="python"))
+    finally:
+        matcher.shutdown()
+
+
+def test_sharded_compiles_each_preference_once():
+    subs = _subs()
+    compiled = []
+
+    def prefs_for(sub):
+        compiled.append(sub["id"])
+        return worker_us._subscription_prefs(sub)
+
+    matcher = ShardedMatcher(2, prefs_for)
+    try:
+        asyncio.run(matcher.match(JOBS, subs))
+        asyncio.run(matcher.match(JOBS, subs))
+        assert sorted(compiled) == [s["id"] for s in subs]
+
+        subs[2]["job_type"] = "Part Time"
+        asyncio.run(matcher.match(JOBS, subs))
+        assert compiled[len(subs):] == [subs[2]["id"]]
+    finally:
+        matcher.shutdown()
@@ -0,0 +1,137 @@
+import asyncio
+
+import pytest
+
+from core.db.alerts.matching_store import match_jobs_to_deliveries
+from core.db.base import get_conn
+from core.db.jobs import jobs_store, location_index
+from core.db.subscriptions.subs_store import (
+    add_subscription,
+    get_active_subscriptions,
+    update_subscription_for_user,
+)
+from core.db.subscriptions.token_index import backfill_subscription_tokens
+from core.db.users import create_user
+import worker.main as worker_uk
+import worker.main_us as worker_us
+
+JOBS = [
+    ("Coventry, United Kingdom", "Full Time", "Fixed-term", "From GBP14.30"),
+    ("Rugby, United Kingdom", "Part Time", "Regular", "From GBP12.00"),
+    ("Doncaster (LBA2), United Kingdom", "Full Time", "Seasonal", "From GBP15.00"),
+    ("Rochester, NY", "Flex Time", "Regular", "From $19.75"),
+    ("Edinburgh, united kingdom", "Full Time", "Regular", ""),
+]
+
+SUBS = [
+    ("a@example.com", "Any", "Any", None, None),
+    ("b@example.com", "Birmingham / Midlands", "Full Time", None, None),
+    ("c@example.com", "Coventry", "Any", 25, None),
+    ("d@example.com", "glasgow / edinburgh; Rochester, NY", "Any", None, None),
+    ("e@example.com", "", "part time", None, None),
+    ("f@example.com", "Doncaster", "Any", None, 1450),
+    ("f@example.com", "Yorkshire", "Seasonal", None, None),
+    ("nouser@example.com", "Any", "Any", None, None),
+    ("inactive@example.com", "Any", "Any", None, None),
+]
+
+
+def _seed():
+    location_index.clear_location_cache()
+    jobs_store.get_new_jobs(
+        [
+            {"title": f"Job {i}", "location": loc, "type": t, "duration": d, "pay": pay, "url": f"https://e.com/{i}"}
+            for i, (loc, t, d, pay) in enumerate(JOBS)
+        ]
+    )
+    for email in sorted({s[0] for s in SUBS} - {"nouser@example.com"}):
+        create_user(email, "Passw0rd1")
+    for email, loc, job_type, radius, min_pay in SUBS:
+        add_subscription(email, loc, job_type, active=1, radius_miles=radius, min_pay_minor=min_pay)
+    conn = get_conn()
+    conn.cursor().execute("UPDATE users SET active = 0 WHERE email = 'inactive@example.com'")
+    conn.commit()
+    conn.close()
+    return [j["id"] for j in jobs_store.get_all_jobs()]
+
+
+def _python_pairs(module, job_ids):
+    """Expected (subscription_id, job_id) pairs using the worker's own matcher and dedup rules."""
+    jobs = [j for j in jobs_store.get_all_jobs() if j["id"] in job_ids]
+    subs = sorted(get_active_subscriptions(), key=lambda s: s["id"])
+    pairs = set()
+    for job in jobs:
+        seen = set()
+        for sub in subs:
+            # Same account rule as the workers' _queue_deliveries.
+            if not sub["account_id"] or not sub["account_active"] or not module.job_matches_subscription(job, sub):
+                continue
+            if sub["email"] in seen:
+                continue
+            seen.add(sub["email"])
+            pairs.add((sub["id"], job["id"]))
+    return pairs
+
+
+@pytest.mark.parametrize("module, empty_all", [(worker_uk, True), (worker_us, False)])
+def test_sql_matches_agree_with_python(module, empty_all):
+    job_ids = _seed()
+    expected = _python_pairs(module, job_ids)
+    assert expected
+
+    rows = match_jobs_to_deliveries(job_ids, empty_pref_matches_all=empty_all)
+    assert {(r["subscription_id"], r["id"]) for r in rows} == expected
+    assert all(r["email"] and r["title"] and r["url"] for r in rows)
+
+    # Already queued pairs are not returned again.
+    assert match_jobs_to_deliveries(job_ids, empty_pref_matches_all=empty_all) == []
+
+
+def test_update_rewrites_tokens():
+    job_ids = _seed()
+    sub = next(s for s in get_active_subscriptions() if s["email"] == "e@example.com")
+    assert update_subscription_for_user(sub["id"], "e@example.com", "Rochester, NY", "Any")
+
+    rows = match_jobs_to_deliveries(job_ids, empty_pref_matches_all=False)
+    assert [r["location"] for r in rows if r["subscription_id"] == sub["id"]] == ["Rochester, NY"]
+
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT token FROM subscription_tokens WHERE subscription_id = ?", (sub["id"],))
+    assert [r["token"] for r in cur.fetchall()] == ["rochester, ny"]
+    conn.close()
+
+
+
+def test_backfill_tokens_skips_subscriptions_already_built():
+    _seed()  # includes an empty preference, which has no token rows
+    assert backfill_subscription_tokens() == 0
+    conn = get_conn()
+    conn.cursor().execute("UPDATE subscriptions SET tokens_built_at = NULL WHERE email = 'e@example.com'")
+    conn.commit()
+    conn.close()
+    assert backfill_subscription_tokens() == 1
+    assert backfill_subscription_tokens() == 0
+
+def test_run_once_sql_engine_sends_queued_rows(monkeypatch):
+    _seed()
+    sent = []
+
+    async def _iter_jobs(headless=True):
+        return
+        yield
+
+    monkeypatch.setattr(worker_us, "TEST_MODE", False)
+    monkeypatch.setattr(worker_us, "MATCH_ENGINE", "sql")
+    monkeypatch.setattr(worker_us, "iter_jobs", _iter_jobs)
+    monkeypatch.setattr(worker_us, "get_active_subscriptions", lambda region=None: pytest.fail("subscriptions loaded"))
+    monkeypatch.setattr(worker_us, "send_email", lambda to, body: sent.append(to))
+
+    assert asyncio.run(worker_us.run_once()) == len(sent) > 0
+    assert "nouser@example.com" not in sent
+
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT DISTINCT status FROM alert_deliveries")
+    assert [r["status"] for r in cur.fetchall()] == ["sent"]
+    conn.close()
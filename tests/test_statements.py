@@ -0,0 +1,65 @@
+import asyncio
+import types
+
+import pytest
+
+from app.routes import admin
+from core.db.base import async_connection, get_conn
+from core.db.statements import register, reset_statement_stats, statement_stats
+from core.database import create_session, create_user, get_session, get_session_async
+
+
+def _stats(name):
+    return next(s for s in statement_stats() if s["name"] == name)
+
+
+def test_register_converts_once_and_rejects_conflicts():
+    stmt = register("test.echo", "SELECT ?::int AS n")
+    assert stmt.sql == "SELECT %s::int AS n"
+    assert register("test.echo", "SELECT ?::int AS n") is stmt
+    with pytest.raises(ValueError):
+        register("test.echo", "SELECT 2")
+
+
+def test_statements_are_prepared_and_timed():
+    stmt = register("test.echo", "SELECT ?::int AS n")
+    reset_statement_stats()
+
+    conn = get_conn()
+    cur = conn.cursor()
+    for i in range(3):
+        cur.execute(stmt, (i,))
+        assert cur.fetchone()["n"] == i
+    # Server-side prepared on this connection (psycopg sends the $n form).
+    cur.execute("SELECT count(*) AS n FROM pg_prepared_statements WHERE statement = 'SELECT $1::int AS n'")
+    assert cur.fetchone()["n"] == 1
+    conn.close()
+
+    async def run():
+        async with async_connection() as aconn:
+            cur = await aconn.cursor().execute(stmt, (7,))
+            return (await cur.fetchone())["n"]
+
+    assert asyncio.run(run()) == 7
+    stats = _stats("test.echo")
+    assert stats["calls"] == 4
+    assert stats["max_ms"] >= stats["avg_ms"] > 0
+
+
+def test_session_lookup_is_a_registered_statement():
+    reset_statement_stats()
+    token = create_session(create_user("a@example.com", "Passw0rd1"))
+    assert get_session(token)["id"] == token
+    assert asyncio.run(get_session_async(token))["id"] == token
+    assert _stats("sessions.get")["calls"] == 2
+    assert _stats("sessions.create")["calls"] == 1
+
+
+def test_db_stats_page_is_admin_only(monkeypatch):
+    req = types.SimpleNamespace(cookies={})
+    monkeypatch.setattr(admin, "get_current_user", lambda r: ({"role": "user"}, None))
+    assert admin.db_stats(req).status_code == 403
+    monkeypatch.setattr(admin, "get_current_user", lambda r: ({"role": "admin", "email": "a@x"}, None))
+    resp = admin.db_stats(req)
+    assert resp.status_code == 200
+    assert b"sessions.get" in resp.body
@@ -0,0 +1,96 @@
+from fastapi.testclient import TestClient
+
+import app.api as api_module
+from app import alert_backfill
+from app.routes import auth
+from core.db.alerts import get_alert_deliveries_for_user
+from core.db.alerts.matching_store import backfill_subscription_deliveries
+from core.db.base import get_conn
+from core.db.jobs import jobs_store, location_index
+from core.db.jobs.location_index import REGION_UK
+from core.db.subscriptions.subs_store import activate_latest_inactive_subscription, add_subscription
+from core.db.users import create_user
+
+
+def _seed_jobs():
+    location_index.clear_location_cache()
+    jobs_store.get_new_jobs(
+        [
+            {"title": t, "location": loc, "type": "Full Time", "duration": "Regular", "url": f"https://e.com/{t}",
+             "region": REGION_UK}
+            for t, loc in [("Open", "Coventry, United Kingdom"), ("Leeds job", "Leeds, United Kingdom"),
+                           ("Closed", "Coventry, United Kingdom")]
+        ]
+    )
+    conn = get_conn()
+    conn.cursor().execute("UPDATE jobs SET closed_at = last_seen_at WHERE title = 'Closed'")
+    conn.commit()
+    conn.close()
+
+
+def test_backfill_matches_open_jobs_for_one_subscription():
+    _seed_jobs()
+    create_user("a@example.com", "Passw0rd1")
+    create_user("other@example.com", "Passw0rd1")
+    other_id = add_subscription("other@example.com", "Any", "Any", active=1)
+    sub_id = add_subscription("a@example.com", "Coventry", "Any", active=1)
+
+    rows = backfill_subscription_deliveries(sub_id)
+    assert [(r["subscription_id"], r["title"]) for r in rows] == [(sub_id, "Open")]
+    assert backfill_subscription_deliveries(sub_id) == []
+    assert backfill_subscription_deliveries(other_id) != []
+
+    # A second alert for the same email does not resend a job it already got.
+    any_id = add_subscription("a@example.com", "Any", "Any", active=1)
+    assert [r["title"] for r in backfill_subscription_deliveries(any_id)] == ["Leeds job"]
+
+
+
+def test_backfill_skips_jobs_older_than_the_window():
+    _seed_jobs()
+    conn = get_conn()
+    conn.cursor().execute("UPDATE jobs SET first_seen_at = now() - interval '3 days' WHERE title = 'Leeds job'")
+    conn.commit()
+    conn.close()
+    create_user("a@example.com", "Passw0rd1")
+    sub_id = add_subscription("a@example.com", "Any", "Any", active=1)
+
+    assert [r["title"] for r in backfill_subscription_deliveries(sub_id, window_hours=24)] == ["Open"]
+    assert [r["title"] for r in backfill_subscription_deliveries(sub_id, window_hours=96)] == ["Leeds job"]
+
+def test_backfill_subscription_emails_and_marks_sent(monkeypatch):
+    _seed_jobs()
+    user_id = create_user("a@example.com", "Passw0rd1")
+    sub_id = add_subscription("a@example.com", "Coventry", "Any", active=1)
+    sent = []
+    monkeypatch.setattr(alert_backfill, "send_text_email", lambda to_email, subject, body: sent.append((to_email, body)))
+
+    assert alert_backfill.backfill_subscription(sub_id) == 1
+    assert sent[0][0] == "a@example.com"
+    assert "Title: Open" in sent[0][1]
+    assert "Profile: Open - Full Time, Regular, Coventry, United Kingdom" in sent[0][1]  # same body as the workers'
+    assert [d["status"] for d in get_alert_deliveries_for_user(user_id=user_id)] == ["sent"]
+
+
+def test_verify_email_schedules_backfill(monkeypatch):
+    client = TestClient(api_module.app)
+    scheduled = []
+    monkeypatch.setattr(auth, "get_email_verification_token", lambda tok: {"user_id": 1})
+    monkeypatch.setattr(auth, "get_user_by_id", lambda uid: {"id": uid, "email": "u@example.com", "role": "user"})
+    monkeypatch.setattr(auth, "mark_user_email_verified", lambda uid: None)
+    monkeypatch.setattr(auth, "mark_email_verification_token_used", lambda tok: None)
+    monkeypatch.setattr(auth, "activate_latest_inactive_subscription", lambda email: 42)
+    monkeypatch.setattr(auth, "create_session", lambda uid: "session-token")
+    monkeypatch.setattr(auth, "backfill_subscription", scheduled.append)
+
+    resp = client.get("/verify-email?token=t", follow_redirects=False)
+    assert resp.status_code == 303
+    assert scheduled == [42]
+
+
+def test_activate_latest_inactive_subscription_returns_its_id():
+    create_user("a@example.com", "Passw0rd1")
+    sub_id = add_subscription("a@example.com", "Coventry", "Any", active=0)
+    assert activate_latest_inactive_subscription("A@example.com") == sub_id
+    assert activate_latest_inactive_subscription("a@example.com") is None
+    assert activate_latest_inactive_subscription("") is None
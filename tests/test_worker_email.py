@@ -3,6 +3,7 @@ import asyncio
 
 import pytest
 
+import worker.delivery_cycle as delivery_cycle
 import worker.main_us as worker_us
 
 
@@ -14,6 +15,11 @@ def restore_test_mode():
     worker_us.TEST_MODE = original
 
 
+async def _iter_jobs(jobs):
+    for job in jobs:
+        yield job
+
+
 def _make_job(title="Job1", location="Rochester, NY", type_="Full Time"):
     return {
         "id": 1,
@@ -29,24 +35,32 @@ def _make_job(title="Job1", location="Rochester, NY", type_="Full Time"):
 def test_run_once_sends_emails_to_matching_subs(monkeypatch):
     jobs = [_make_job(title="Job1", location="Rochester, NY")]
     subs = [
-        {"id": 1, "email": "user1@example.com", "preferred_location": "Rochester, NY", "job_type": "Any", "active": 1},
-        {"id": 2, "email": "user2@example.com", "preferred_location": "London", "job_type": "Any", "active": 1},
+        {"id": 1, "email": "user1@example.com", "preferred_location": "Rochester, NY", "job_type": "Any", "active": 1,
+         "account_id": 10, "account_active": 1},
+        {"id": 2, "email": "user2@example.com", "preferred_location": "London", "job_type": "Any", "active": 1,
+         "account_id": 10, "account_active": 1},
     ]
     sent = []
     deliveries = []
 
     monkeypatch.setattr(worker_us, "TEST_MODE", False)
-    async def _fetch_jobs(headless=True):
-        return jobs
-
-    monkeypatch.setattr(worker_us, "fetch_jobs", _fetch_jobs)
+    monkeypatch.setattr(worker_us, "iter_jobs", lambda headless=True: _iter_jobs(jobs))
     monkeypatch.setattr(worker_us, "get_new_jobs", lambda _jobs: _jobs)
-    monkeypatch.setattr(worker_us, "get_active_subscriptions", lambda: subs)
+    monkeypatch.setattr(worker_us, "get_active_subscriptions", lambda region=None: subs)
     monkeypatch.setattr(worker_us, "send_email", lambda to, body: sent.append((to, body)))
-    monkeypatch.setattr(worker_us, "get_user_by_email", lambda email: {"id": 10, "email": email})
-    monkeypatch.setattr(worker_us, "create_alert_deliveries", lambda **kw: deliveries.append(("create", kw)))
-    monkeypatch.setattr(worker_us, "mark_alert_deliveries_sent", lambda **kw: deliveries.append(("sent", kw)))
-    monkeypatch.setattr(worker_us, "mark_alert_deliveries_failed", lambda **kw: deliveries.append(("failed", kw)))
+    def create(rows, conn=None):
+        deliveries.append(("create", rows))
+        return [(sub_id, job_id) for _user_id, sub_id, job_id in rows]
+
+    monkeypatch.setattr(delivery_cycle, "create_alert_deliveries_bulk", create)
+    monkeypatch.setattr(
+        delivery_cycle, "mark_alert_deliveries_sent_bulk", lambda pairs, conn=None: deliveries.append(("sent", pairs))
+    )
+    monkeypatch.setattr(
+        delivery_cycle,
+        "mark_alert_deliveries_failed_bulk",
+        lambda pairs, error, conn=None: deliveries.append(("failed", pairs)),
+    )
 
     sent_count = asyncio.run(worker_us.run_once())
 
@@ -60,18 +74,17 @@ def test_run_once_sends_emails_to_matching_subs(monkeypatch):
 
 def test_run_once_no_matches_sends_no_email(monkeypatch):
     jobs = [_make_job(title="Job1", location="London, United Kingdom")]
-    subs = [{"id": 1, "email": "user1@example.com", "preferred_location": "Rochester, NY", "job_type": "Any", "active": 1}]
+    subs = [
+        {"id": 1, "email": "user1@example.com", "preferred_location": "Rochester, NY", "job_type": "Any", "active": 1,
+         "account_id": 10, "account_active": 1},
+    ]
     sent = []
 
     monkeypatch.setattr(worker_us, "TEST_MODE", False)
-    async def _fetch_jobs(headless=True):
-        return jobs
-
-    monkeypatch.setattr(worker_us, "fetch_jobs", _fetch_jobs)
+    monkeypatch.setattr(worker_us, "iter_jobs", lambda headless=True: _iter_jobs(jobs))
     monkeypatch.setattr(worker_us, "get_new_jobs", lambda _jobs: _jobs)
-    monkeypatch.setattr(worker_us, "get_active_subscriptions", lambda: subs)
+    monkeypatch.setattr(worker_us, "get_active_subscriptions", lambda region=None: subs)
     monkeypatch.setattr(worker_us, "send_email", lambda to, body: sent.append((to, body)))
-    monkeypatch.setattr(worker_us, "get_user_by_email", lambda email: {"id": 10, "email": email})
 
     sent_count = asyncio.run(worker_us.run_once())
 
@@ -81,19 +94,22 @@ def test_run_once_no_matches_sends_no_email(monkeypatch):
 
 def test_run_once_logs_and_skips_on_smtp_failure(monkeypatch, caplog):
     jobs = [_make_job(title="Job1", location="Rochester, NY")]
-    subs = [{"id": 1, "email": "user1@example.com", "preferred_location": "Rochester, NY", "job_type": "Any", "active": 1}]
+    subs = [
+        {"id": 1, "email": "user1@example.com", "preferred_location": "Rochester, NY", "job_type": "Any", "active": 1,
+         "account_id": 10, "account_active": 1},
+    ]
 
     monkeypatch.setattr(worker_us, "TEST_MODE", False)
-    async def _fetch_jobs(headless=True):
-        return jobs
-
-    monkeypatch.setattr(worker_us, "fetch_jobs", _fetch_jobs)
+    monkeypatch.setattr(worker_us, "iter_jobs", lambda headless=True: _iter_jobs(jobs))
     monkeypatch.setattr(worker_us, "get_new_jobs", lambda _jobs: _jobs)
-    monkeypatch.setattr(worker_us, "get_active_subscriptions", lambda: subs)
-    monkeypatch.setattr(worker_us, "get_user_by_email", lambda email: {"id": 10, "email": email})
-    monkeypatch.setattr(worker_us, "create_alert_deliveries", lambda **kw: None)
-    monkeypatch.setattr(worker_us, "mark_alert_deliveries_sent", lambda **kw: None)
-    monkeypatch.setattr(worker_us, "mark_alert_deliveries_failed", lambda **kw: None)
+    monkeypatch.setattr(worker_us, "get_active_subscriptions", lambda region=None: subs)
+    monkeypatch.setattr(
+        delivery_cycle,
+        "create_alert_deliveries_bulk",
+        lambda rows, conn=None: [(sub_id, job_id) for _u, sub_id, job_id in rows],
+    )
+    monkeypatch.setattr(delivery_cycle, "mark_alert_deliveries_sent_bulk", lambda pairs, conn=None: None)
+    monkeypatch.setattr(delivery_cycle, "mark_alert_deliveries_failed_bulk", lambda pairs, error, conn=None: None)
 
     def _fail(*args, **kwargs):
         raise RuntimeError("SMTP down")
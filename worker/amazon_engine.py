@@ -1,8 +1,9 @@
 import re
-from typing import Dict, List
-from worker.amazon_engine_us import fetch_jobs
+from typing import AsyncIterator, Dict, List
 from playwright.async_api import async_playwright
 
+from core.db.jobs.job_identity import job_content_hash
+
 SEARCH_URL = "https://www.jobsatamazon.co.uk/app#/jobSearch"
 
 
@@ -73,9 +74,10 @@ def _parse_jobs_from_text(text: str) -> List[Dict]:
             }
         )
 
-    unique: Dict[tuple, Dict] = {}
+    # Same key the jobs table dedupes on (core.db.jobs.job_identity).
+    unique: Dict[str, Dict] = {}
     for j in jobs:
-        key = (j["title"], j["location"])
+        key = job_content_hash(j)
         if key not in unique:
             unique[key] = j
 
@@ -107,14 +109,15 @@ async def _find_job_url(page, title: str) -> str | None:
     return None
 
 
-async def fetch_jobs(headless: bool = False) -> List[Dict]:
+async def iter_jobs(headless: bool = False) -> AsyncIterator[Dict]:
     """
     High-level engine function:
     - Opens the Amazon jobs page with Playwright
     - Handles cookies / sticky alerts / modals
     - Extracts visible text
     - Parses jobs into structured dicts
-    - Returns: list of jobs
+    - Yields each job as soon as its URL is resolved, so callers can ingest and
+      match it while the remaining URLs are still being looked up
     """
     try:
         async with async_playwright() as p:
@@ -202,11 +205,15 @@ async def fetch_jobs(headless: bool = False) -> List[Dict]:
                     print(f"[engine] Error finding URL for {job['title']}: {e}")
                     url = None
                 job["url"] = url or SEARCH_URL
+                yield job
 
             await browser.close()
-            return jobs
 
     except Exception as e:
-        print(f"[engine] Fatal error in fetch_jobs (returning 0 jobs): {e}")
-        return []
+        print(f"[engine] Fatal error in iter_jobs (stopping scrape): {e}")
+
+
+async def fetch_jobs(headless: bool = False) -> List[Dict]:
+    """Scrape all jobs and return them as a list (see iter_jobs)."""
+    return [job async for job in iter_jobs(headless=headless)]
 
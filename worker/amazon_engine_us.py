@@ -1,8 +1,10 @@
 import re
-from typing import Dict, List
+from typing import AsyncIterator, Dict, List
 
 from playwright.async_api import async_playwright
 
+from core.db.jobs.job_identity import job_content_hash
+
 # US hiring site
 SEARCH_URL = "https://hiring.amazon.com/app#/jobSearch"
 
@@ -71,9 +73,10 @@ def _parse_jobs_from_text(text: str) -> List[Dict]:
             }
         )
 
-    unique: Dict[tuple, Dict] = {}
+    # Same key the jobs table dedupes on (core.db.jobs.job_identity).
+    unique: Dict[str, Dict] = {}
     for j in jobs:
-        key = (j["title"], j["location"])
+        key = job_content_hash(j)
         if key not in unique:
             unique[key] = j
 
@@ -105,14 +108,15 @@ async def _find_job_url(page, title: str) -> str | None:
     return None
 
 
-async def fetch_jobs(headless: bool = False) -> List[Dict]:
+async def iter_jobs(headless: bool = False) -> AsyncIterator[Dict]:
     """
     High-level engine function for the US site:
     - Opens the Amazon hiring page with Playwright
     - Handles cookies / sticky alerts / modals
     - Extracts visible text
     - Parses jobs into structured dicts
-    - Returns: list of jobs
+    - Yields each job as soon as its URL is resolved, so callers can ingest and
+      match it while the remaining URLs are still being looked up
     """
     try:
         async with async_playwright() as p:
@@ -230,10 +234,14 @@ async def fetch_jobs(headless: bool = False) -> List[Dict]:
                     print(f"[engine_us] Error finding URL for {job['title']}: {e}", flush=True)
                     url = None
                 job["url"] = url or SEARCH_URL
+                yield job
 
             await browser.close()
-            return jobs
 
     except Exception as e:
-        print(f"[engine_us] Fatal error in fetch_jobs (returning 0 jobs): {e}", flush=True)
-        return []
+        print(f"[engine_us] Fatal error in iter_jobs (stopping scrape): {e}", flush=True)
+
+
+async def fetch_jobs(headless: bool = False) -> List[Dict]:
+    """Scrape all jobs and return them as a list (see iter_jobs)."""
+    return [job async for job in iter_jobs(headless=headless)]
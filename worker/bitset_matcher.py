@@ -0,0 +1,171 @@
+"""
+Vectorized jobs x subscriptions matcher (NumPy).
+
+Each distinct location token and job-kind preference mask across all subscriptions
+gets a bit position. Jobs are encoded once as bit vectors ("which tokens/prefs appear in my
+location / type string") and subscriptions as masks, so the full match matrix is a
+handful of array ANDs instead of a Python call per (job, subscription) pair.
+
+Semantics are identical to the workers' `job_matches_subscription`:
+  - location matches if the subscription is in "any" mode or one of its tokens is a
+    substring of the lowercased job location
+  - job type matches if the subscription's kind mask is 0 ("any") or shares a flag
+    with the job's kind mask (core.db.jobs.job_kinds)
+  - pay matches if the subscription has no minimum, the job's pay is unknown, or the
+    job's hourly pay_minor is at least the minimum (core.db.jobs.pay)
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from core.db.jobs.job_kinds import ANY_KIND, kind_of_job
+from core.db.jobs.pay import pay_of_job
+
+try:
+    import numpy as np
+except Exception:  # pragma: no cover - optional dependency
+    np = None
+
+# (tokens, any_mode, job_kind_mask, min_pay_minor) as produced by the worker for one
+# subscription; min_pay_minor is None for "no minimum".
+SubscriptionPrefs = Tuple[Sequence[str], bool, int, Optional[int]]
+
+# Upper bound on the temporary (jobs x subs x words) array built per chunk.
+_CHUNK_CELLS = 8_000_000
+
+
+def available() -> bool:
+    """Return True if NumPy is installed and the vectorized engine can be used."""
+    return np is not None
+
+
+def _pack(bits):
+    """Pack a (rows x n_bits) bool matrix into (rows x words) uint64 bitsets."""
+    rows, n_bits = bits.shape
+    words = max(1, (n_bits + 63) // 64)
+    padded = np.zeros((rows, words * 64), dtype=bool)
+    padded[:, :n_bits] = bits
+    return np.packbits(padded, axis=1).view(np.uint64)
+
+
+def encode_subscriptions(prefs: Sequence[SubscriptionPrefs]) -> Dict:
+    """
+    Build the token/kind vocabularies and per-subscription masks.
+
+    Returns a dict with:
+      - tokens: location vocabulary (bit position -> string)
+      - types: distinct non-"any" kind masks (column -> mask)
+      - loc_masks: (subs x words) uint64 location masks
+      - any_location: (subs,) bool, True for "any" subscriptions
+      - type_cols: (subs,) int index into the job type matrix (last column = "any")
+      - min_pay: (subs,) int64 minimum hourly pay in minor units (0 = no minimum)
+    """
+    token_index: Dict[str, int] = {}
+    type_index: Dict[int, int] = {}
+    for tokens, _any_mode, kind_mask, _min_pay in prefs:
+        for tok in tokens:
+            token_index.setdefault(tok, len(token_index))
+        if kind_mask != ANY_KIND:
+            type_index.setdefault(kind_mask, len(type_index))
+
+    n_subs = len(prefs)
+    loc_bits = np.zeros((n_subs, len(token_index)), dtype=bool)
+    any_location = np.zeros(n_subs, dtype=bool)
+    type_cols = np.full(n_subs, len(type_index), dtype=np.int64)
+    min_pay = np.zeros(n_subs, dtype=np.int64)
+
+    for row, (tokens, any_mode, kind_mask, min_pay_minor) in enumerate(prefs):
+        any_location[row] = bool(any_mode)
+        min_pay[row] = min_pay_minor or 0
+        for tok in tokens:
+            loc_bits[row, token_index[tok]] = True
+        if kind_mask != ANY_KIND:
+            type_cols[row] = type_index[kind_mask]
+
+    return {
+        "tokens": list(token_index),
+        "types": list(type_index),
+        "loc_masks": _pack(loc_bits),
+        "any_location": any_location,
+        "type_cols": type_cols,
+        "min_pay": min_pay,
+    }
+
+
+def encode_jobs(jobs: Sequence[Dict], encoded_subs: Dict):
+    """
+    Encode jobs against the subscription vocabularies.
+
+    Returns (loc_bits, type_bits, pay): packed (jobs x words) location bitsets, a
+    (jobs x types+1) bool matrix whose last column is always True ("any"), and the
+    (jobs,) int64 hourly pay (int64 max when unknown, so every minimum passes).
+    """
+    tokens: List[str] = encoded_subs["tokens"]
+    types: List[int] = encoded_subs["types"]
+
+    loc = np.zeros((len(jobs), len(tokens)), dtype=bool)
+    type_bits = np.ones((len(jobs), len(types) + 1), dtype=bool)
+    pay = np.full(len(jobs), np.iinfo(np.int64).max, dtype=np.int64)
+
+    for row, job in enumerate(jobs):
+        job_location = (job.get("location") or "").lower()
+        job_kind = kind_of_job(job)
+        job_pay = pay_of_job(job)
+        if job_pay is not None:
+            pay[row] = job_pay
+        for col, tok in enumerate(tokens):
+            loc[row, col] = tok in job_location
+        for col, pref_mask in enumerate(types):
+            type_bits[row, col] = bool(job_kind & pref_mask)
+
+    return _pack(loc), type_bits, pay
+
+
+def match_matrix(jobs: Sequence[Dict], prefs: Sequence[SubscriptionPrefs]):
+    """
+    Return a (jobs x subscriptions) bool matrix where [j, s] is True if job j
+    matches subscription s.
+    """
+    if np is None:
+        raise RuntimeError("numpy is required for the bitset matcher")
+
+    n_jobs, n_subs = len(jobs), len(prefs)
+    if not n_jobs or not n_subs:
+        return np.zeros((n_jobs, n_subs), dtype=bool)
+
+    return match_encoded(jobs, encode_subscriptions(prefs))
+
+
+def match_encoded(jobs: Sequence[Dict], subs: Dict):
+    """
+    Like match_matrix, but against subscriptions already encoded with
+    encode_subscriptions (so long-lived callers encode them only once).
+    """
+    n_jobs, n_subs = len(jobs), len(subs["any_location"])
+    if not n_jobs or not n_subs:
+        return np.zeros((n_jobs, n_subs), dtype=bool)
+
+    job_loc, job_types, job_pay = encode_jobs(jobs, subs)
+    sub_loc = subs["loc_masks"]
+
+    result = np.empty((n_jobs, n_subs), dtype=bool)
+    words = sub_loc.shape[1]
+    chunk = max(1, _CHUNK_CELLS // max(1, n_subs * words))
+    for start in range(0, n_jobs, chunk):
+        stop = min(n_jobs, start + chunk)
+        hits = (job_loc[start:stop, None, :] & sub_loc[None, :, :]).any(axis=2)
+        result[start:stop] = hits | subs["any_location"][None, :]
+
+    result &= job_types[:, subs["type_cols"]]
+    result &= job_pay[:, None] >= subs["min_pay"][None, :]
+    return result
+
+
+__all__ = [
+    "SubscriptionPrefs",
+    "available",
+    "encode_subscriptions",
+    "encode_jobs",
+    "match_matrix",
+    "match_encoded",
+]
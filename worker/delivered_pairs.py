@@ -0,0 +1,94 @@
+"""
+In-memory index of (subscription_id, job_id) pairs that already have an alert_deliveries row.
+
+Every cycle re-matches recent jobs (the catch-up pass), so most matched pairs were
+delivered before. Checking them here first means only pairs that may be new reach
+create_alert_deliveries_bulk.
+
+The index is exact rather than a Bloom filter: a false positive would silently drop an
+alert. Pairs are packed into one int each (subscription_id << 32 | job_id) to stay
+compact, and only jobs inside the matcher's candidate window (first seen within
+window_hours) are kept: older jobs are never matched again, so their pairs are evicted
+on refresh and memory follows the window rather than the delivery history.
+
+It is warmed from alert_deliveries at startup, updated after each insert, and refreshed
+incrementally (by delivery id) each cycle to pick up rows written by other processes.
+A pair missing from the index only costs a database round trip, since
+create_alert_deliveries_bulk still resolves conflicts with ON CONFLICT DO NOTHING.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Set, Tuple
+
+from core.db.alerts import get_delivery_pairs_since
+
+Loader = Callable[[int, datetime], Tuple[List[Tuple[int, int, datetime]], int]]
+
+_JOB_MASK = (1 << 32) - 1
+
+
+def _pack(subscription_id: int, job_id: int) -> int:
+    return (int(subscription_id) << 32) | int(job_id)
+
+
+class DeliveredPairs:
+    """Exact set of delivered (subscription_id, job_id) pairs for the jobs in the window."""
+
+    def __init__(self, window_hours: float, load: Loader = get_delivery_pairs_since):
+        self._window = timedelta(hours=window_hours)
+        self._load = load
+        self._pairs: Set[int] = set()
+        self._first_seen: Dict[int, datetime] = {}  # job id -> first_seen_at
+        self._watermark = 0
+
+    def __len__(self) -> int:
+        return len(self._pairs)
+
+    def __contains__(self, pair: Tuple[int, int]) -> bool:
+        return _pack(*pair) in self._pairs
+
+    def refresh(self, now: datetime | None = None) -> int:
+        """
+        Evict jobs that left the window and load delivery rows written since the last
+        refresh. Returns how many pairs were added.
+        """
+        since = (now or datetime.now(timezone.utc)) - self._window
+        self._evict(since)
+        rows, max_id = self._load(self._watermark, since)
+        if max_id < self._watermark:
+            # alert_deliveries was emptied or its ids restarted: rebuild from scratch.
+            self._pairs.clear()
+            self._first_seen.clear()
+            self._watermark = 0
+            rows, max_id = self._load(0, since)
+        before = len(self._pairs)
+        for sub_id, job_id, first_seen_at in rows:
+            self._pairs.add(_pack(sub_id, job_id))
+            self._first_seen[int(job_id)] = first_seen_at
+        self._watermark = max_id
+        return len(self._pairs) - before
+
+    def _evict(self, since: datetime) -> None:
+        expired = {job_id for job_id, seen in self._first_seen.items() if seen is None or seen < since}
+        if not expired:
+            return
+        for job_id in expired:
+            del self._first_seen[job_id]
+        self._pairs = {p for p in self._pairs if (p & _JOB_MASK) not in expired}
+
+    def unknown(self, subscription_id: int, job_ids: Iterable[int]) -> List[int]:
+        """job_ids that have no known delivery for this subscription (order preserved)."""
+        base = int(subscription_id) << 32
+        return [j for j in job_ids if (base | int(j)) not in self._pairs]
+
+    def add(self, subscription_id: int, job_ids: Iterable[int]) -> None:
+        """Record new deliveries; a job not seen before is kept for a full window from now."""
+        base = int(subscription_id) << 32
+        now = datetime.now(timezone.utc)
+        for j in job_ids:
+            self._pairs.add(base | int(j))
+            self._first_seen.setdefault(int(j), now)
+
+
+__all__ = ["DeliveredPairs"]
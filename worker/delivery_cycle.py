@@ -0,0 +1,111 @@
+"""
+Delivery bookkeeping for one worker cycle.
+
+Before, every email with matches cost a user lookup, an insert and a status update,
+each on its own connection. Now the subscriptions carry their account (see
+get_active_subscriptions), and a DeliveryCycle batches the writes:
+
+- queue() inserts a batch's delivery rows and commits straight away. A row must exist
+  before its email goes out, and an uncommitted row would block the app's immediate
+  backfill of the same (subscription, job) pair.
+- sent() / failed() only record outcomes. flush(), called by the pipeline after each
+  delivered batch, writes them in one transaction: one UPDATE for the sent rows, and
+  one per distinct error for the failed ones. A crash therefore leaves at most the
+  current batch 'queued' (never re-sent: the pairs already exist).
+
+The connection is borrowed on the first queue() and handed back by flush(), so no
+connection sits idle in the worker while the scrape runs between batches.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+from core.db.alerts import (
+    create_alert_deliveries_bulk,
+    mark_alert_deliveries_failed_bulk,
+    mark_alert_deliveries_sent_bulk,
+)
+from core.db.base import get_conn
+
+SubJobIds = Dict[int, List[int]]
+
+
+def _merge(into: SubJobIds, sub_to_job_ids: SubJobIds) -> None:
+    for sub_id, job_ids in sub_to_job_ids.items():
+        into.setdefault(int(sub_id), []).extend(job_ids)
+
+
+class DeliveryCycle:
+    """Queues deliveries and writes their outcomes once per batch, at flush()."""
+
+    def __init__(self):
+        self._conn = None
+        self._lock = threading.Lock()
+        self._sent: SubJobIds = {}
+        self._failed: Dict[str, SubJobIds] = {}
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = get_conn()
+        return self._conn
+
+    def _release(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            conn.close()
+
+    def queue(self, rows: Iterable[Tuple[int, int, int]]) -> List[Tuple[int, int]]:
+        """create_alert_deliveries_bulk() on the batch's connection, committed."""
+        with self._lock:
+            conn = self._connection()
+            inserted = create_alert_deliveries_bulk(rows, conn=conn)
+            conn.commit()
+        return inserted
+
+    def sent(self, sub_to_job_ids: SubJobIds) -> None:
+        with self._lock:
+            _merge(self._sent, sub_to_job_ids)
+
+    def failed(self, sub_to_job_ids: SubJobIds, error: str) -> None:
+        with self._lock:
+            _merge(self._failed.setdefault(str(error), {}), sub_to_job_ids)
+
+    def pending(self) -> int:
+        """Outcomes recorded but not flushed yet."""
+        with self._lock:
+            return sum(len(ids) for ids in self._sent.values()) + sum(
+                len(ids) for by_sub in self._failed.values() for ids in by_sub.values()
+            )
+
+    def flush(self) -> None:
+        """Write every recorded outcome in one transaction and hand the connection back."""
+        with self._lock:
+            sent, self._sent = self._sent, {}
+            failed, self._failed = self._failed, {}
+            try:
+                if sent or failed:
+                    conn = self._connection()
+                    try:
+                        if sent:
+                            mark_alert_deliveries_sent_bulk(sent, conn=conn)
+                        for error, sub_to_job_ids in failed.items():
+                            mark_alert_deliveries_failed_bulk(sub_to_job_ids, error, conn=conn)
+                        conn.commit()
+                    except Exception:
+                        conn.rollback()
+                        # Keep them for the next flush.
+                        _merge(self._sent, sent)
+                        for error, sub_to_job_ids in failed.items():
+                            _merge(self._failed.setdefault(error, {}), sub_to_job_ids)
+                        raise
+            finally:
+                self._release()
+
+    def close(self) -> None:
+        """Hand the connection back without writing anything."""
+        with self._lock:
+            self._release()
+
+
+__all__ = ["DeliveryCycle"]
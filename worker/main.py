@@ -2,23 +2,45 @@ import asyncio
 import os
 import smtplib
 import logging
+from datetime import datetime, timedelta, timezone
 from email.mime.text import MIMEText
 from typing import Dict, List
 
 from dotenv import load_dotenv
 
 from app.area_groups import AREA_GROUPS
+from app.email_utils import format_alert_body
+from worker import bitset_matcher
+from worker.delivered_pairs import DeliveredPairs
+from worker.delivery_cycle import DeliveryCycle
+from worker.pipeline import run_pipeline
+from worker.preference_classes import PreferenceClasses
+from worker.sharded_matcher import ShardedMatcher, preference_fields
 from core.database import (
-    create_alert_deliveries,
+    reads_on_primary,
+    close_stale_jobs,
+    create_alert_deliveries_bulk,
     get_all_jobs,
     get_active_subscriptions,
+    REGION_UK,
     get_new_jobs,
-    get_user_by_email,
+    job_content_hash,
+    kind_matches,
+    kind_of_job,
+    kind_of_subscription,
+    match_jobs_to_deliveries,
+    min_pay_floor,
+    pay_matches,
+    pay_of_job,
     init_db,
-    mark_alert_deliveries_failed,
-    mark_alert_deliveries_sent,
+    mark_alert_deliveries_failed_bulk,
+    mark_alert_deliveries_sent_bulk,
+    preference_is_empty,
+    preference_matches_location,
+    radius_tokens,
+    resolve_preference,
 )
-from worker.amazon_engine import fetch_jobs
+from worker.amazon_engine import iter_jobs
 
 # Load `.env` for local/dev runs (override=True so updates take effect after restart).
 load_dotenv(override=True)
@@ -28,6 +50,17 @@ CHECK_INTERVAL = 40  # seconds between checks
 # Default to test mode for UK worker; set TEST_MODE=false in env to scrape real jobs.
 TEST_MODE = os.getenv("TEST_MODE", "true").lower() == "true"
 HEADLESS = os.getenv("PLAYWRIGHT_HEADLESS", "true").lower() == "true"
+# Matching engine: "python" (per-pair loop), "numpy" (vectorized bitset matrix),
+# "process" (subscriptions sharded across a process pool) or "sql" (matched and
+# queued inside Postgres via subscription_tokens).
+MATCH_ENGINE = os.getenv("MATCH_ENGINE", "python").strip().lower()
+MATCH_SHARDS = int(os.getenv("MATCH_SHARDS", str(os.cpu_count() or 1)))
+# Slice of the shared jobs/subscriptions tables this worker scrapes and matches.
+REGION = REGION_UK
+# Jobs no scrape has listed for this long are closed and leave the candidate pool.
+JOB_CLOSE_AFTER_HOURS = float(os.getenv("JOB_CLOSE_AFTER_HOURS", "24"))
+# Catch-up re-matches every job first seen within this window (no row cap).
+CATCH_UP_WINDOW_HOURS = float(os.getenv("CATCH_UP_WINDOW_HOURS", "24"))
 
 EMAIL_USER = os.getenv("EMAIL_USER")
 EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
@@ -108,33 +141,265 @@ def job_matches_subscription(job: Dict, sub: Dict) -> bool:
     Decide if a job should be sent to this subscriber based on
     preferred locations and job type.
     """
-    loc_pref_raw = sub.get("preferred_location") or ""
-    job_type_pref = (sub.get("job_type") or "").strip().lower()
-
-    job_location = (job.get("location") or "").lower()
-    job_type_str = f"{job.get('type') or ''} {job.get('duration') or ''}".lower()
-
-    tokens = expand_preferred_locations(loc_pref_raw)
-    if tokens and not any(tok in job_location for tok in tokens):
+    # Cheapest check first: hourly pay below the subscriber's minimum.
+    if not pay_matches(pay_of_job(job), sub.get("min_pay_minor")):
         return False
 
-    if job_type_pref and job_type_pref != "any":
-        if job_type_pref not in job_type_str:
+    loc_pref = resolve_preference(sub.get("preferred_location") or "", sub.get("radius_miles"))
+
+    # Canonical location / area-group ids (cached); no locations means match all.
+    if not loc_pref["any"] and not preference_is_empty(loc_pref):
+        if not preference_matches_location(loc_pref, job.get("location")):
             return False
 
+    # Job type/duration as bitmask flags: one integer AND.
+    return kind_matches(kind_of_job(job), kind_of_subscription(sub))
+
+
+def _subscription_prefs(sub: Dict) -> tuple[List[str], bool, int, int | None]:
+    """
+    Return (tokens, any_mode, job_kind_mask, min_pay_minor) for the bitset matcher, mirroring
+    job_matches_subscription (no tokens means match every location).
+    """
+    raw_pref = sub.get("preferred_location") or ""
+    tokens = expand_preferred_locations(raw_pref)
+    if tokens:
+        tokens += [t for t in radius_tokens(raw_pref, sub.get("radius_miles")) if t not in tokens]
+    return tokens, not tokens, kind_of_subscription(sub), sub.get("min_pay_minor")
+
+
+def preference_key(sub: Dict) -> tuple:
+    """Hashable compiled preference; subscriptions with equal keys match the same jobs."""
+    tokens, any_mode, kind_mask, min_pay_minor = _subscription_prefs(sub)
+    return tuple(sorted(set(tokens))), bool(any_mode), int(kind_mask), min_pay_minor or 0
+
+
+def iter_matches(candidates: List[Dict], subs: List[Dict], engine: str | None = None):
+    """
+    Yield matching (job, subscription) pairs in job-major order.
+    Each distinct preference is matched once and fanned out to its subscriptions.
+    Uses the NumPy bitset matrix when engine="numpy" and numpy is installed.
+    """
+    engine = engine or MATCH_ENGINE
+    classes = PreferenceClasses(subs, preference_key)
+    reps = classes.representatives
+    if engine == "numpy":
+        if bitset_matcher.available():
+            matrix = bitset_matcher.match_matrix(candidates, [_subscription_prefs(s) for s in reps])
+            yield from classes.fan_out(candidates, zip(*matrix.nonzero()))
+            return
+        log.warning("MATCH_ENGINE=numpy but numpy is not installed; using python matcher.")
+
+    pairs = (
+        (job_idx, cls)
+        for job_idx, job in enumerate(candidates)
+        for cls, rep in enumerate(reps)
+        if job_matches_subscription(job, rep)
+    )
+    yield from classes.fan_out(candidates, pairs)
+
+
+_sharded_matcher: ShardedMatcher | None = None
+
+
+async def match_pairs(candidates: List[Dict], subs: List[Dict]) -> List[tuple[Dict, Dict]]:
+    """
+    Return matching (job, subscription) pairs for this cycle.
+    MATCH_ENGINE=process matches in MATCH_SHARDS worker processes off the event loop.
+    """
+    global _sharded_matcher
+    if MATCH_ENGINE == "process":
+        if _sharded_matcher is None:
+            _sharded_matcher = ShardedMatcher(MATCH_SHARDS, _subscription_prefs)
+        # Grouped on the raw preference fields: compiling them is the matcher's job, cached
+        # per subscription, so nothing here expands locations on the event loop.
+        classes = await asyncio.to_thread(PreferenceClasses, subs, preference_fields)
+        job_index = {id(job): idx for idx, job in enumerate(candidates)}
+        class_index = {id(rep): cls for cls, rep in enumerate(classes.representatives)}
+        pairs = await _sharded_matcher.match(candidates, classes.representatives)
+        return list(
+            classes.fan_out(candidates, ((job_index[id(job)], class_index[id(rep)]) for job, rep in pairs))
+        )
+    return list(iter_matches(candidates, subs))
+
+
+# Bodies shared by recipients with the same job list; cleared every cycle.
+_rendered_bodies: Dict[tuple, str] = {}
+
+
+def _render_alert_body(items: List[tuple[int, Dict]]) -> str:
+    """format_alert_body, rendered once per distinct job list."""
+    key = tuple(job.get("id") or job.get("url") for _sub_id, job in items)
+    body = _rendered_bodies.get(key)
+    if body is None:
+        if len(_rendered_bodies) >= 10_000:
+            _rendered_bodies.clear()
+        body = _rendered_bodies[key] = format_alert_body([job for _sub_id, job in items])
+    return body
+
+
+def _send_alert(email: str, items: List[tuple[int, Dict]], sub_to_job_ids: Dict[int, List[int]]) -> bool:
+    """Email queued items to one address and mark their deliveries sent/failed."""
+    body = _render_alert_body(items)
+    try:
+        send_email(email, body)
+    except Exception as e:
+        log.error("Failed to send email to %s: %s", email, e)
+        if _cycle is not None:
+            _cycle.failed(sub_to_job_ids, str(e))
+        else:
+            mark_alert_deliveries_failed_bulk(sub_to_job_ids, str(e))
+        return False
+    if _cycle is not None:
+        _cycle.sent(sub_to_job_ids)
+    else:
+        mark_alert_deliveries_sent_bulk(sub_to_job_ids)
     return True
 
 
+Group = tuple[str, List[tuple[int, Dict]], Dict[int, List[int]]]
+
+
+# Delivered (subscription, job) pairs, warmed in main(); None disables the local check.
+_delivered_pairs: DeliveredPairs | None = None
+
+# Delivery bookkeeping of the running cycle (see run_once); None writes each call directly.
+_cycle: DeliveryCycle | None = None
+
+
+def _queue_deliveries(pairs: List[tuple[Dict, Dict]]) -> List[Group]:
+    """
+    Group matched (job, subscription) pairs per email, create delivery rows and keep
+    only jobs not delivered before. Returns (email, items, sub_to_job_ids) groups;
+    items keep the matched (job-major) order.
+    """
+    # email -> list of (subscription_id, job)
+    alerts_for_email: Dict[str, List[tuple[int, Dict]]] = {}
+    seen_key_for_email: Dict[str, set[str]] = {}
+
+    for job, sub in pairs:
+        email = (sub.get("email") or "").strip().lower()
+        if not email or "@" not in email:
+            continue
+        sub_id = int(sub.get("id") or 0)
+        if sub_id <= 0:
+            continue
+        job_key = job.get("content_hash") or job_content_hash(job)
+        seen_key_for_email.setdefault(email, set())
+        if job_key in seen_key_for_email[email]:
+            continue
+        seen_key_for_email[email].add(job_key)
+        alerts_for_email.setdefault(email, []).append((sub_id, job))
+
+    # Subscriptions carry their account (get_active_subscriptions joins users), so a
+    # single insert queues every new (subscription, job) pair of the batch.
+    account_for_sub = {
+        int(sub["id"]): int(sub["account_id"])
+        for _job, sub in pairs
+        if sub.get("account_id") and sub.get("account_active", 1)
+    }
+    rows: List[tuple[int, int, int]] = [
+        (account_for_sub[sub_id], sub_id, int(job["id"]))
+        for items in alerts_for_email.values()
+        for sub_id, job in items
+        if sub_id in account_for_sub and job.get("id")
+    ]
+    if _delivered_pairs is not None:
+        rows = [row for row in rows if (row[1], row[2]) not in _delivered_pairs]
+    if not rows:
+        return []
+    inserted = set(_cycle.queue(rows) if _cycle is not None else create_alert_deliveries_bulk(rows))
+    if not inserted:
+        return []
+    if _delivered_pairs is not None:
+        for sub_id, job_id in inserted:
+            _delivered_pairs.add(sub_id, [job_id])
+
+    groups: List[Group] = []
+    for email, items in alerts_for_email.items():
+        filtered_items = [(sub_id, job) for sub_id, job in items if (sub_id, job.get("id")) in inserted]
+        if not filtered_items:
+            continue
+        sub_to_job_ids: Dict[int, List[int]] = {}
+        for sub_id, job in filtered_items:
+            sub_to_job_ids.setdefault(sub_id, []).append(int(job["id"]))
+        groups.append((email, filtered_items, sub_to_job_ids))
+    return groups
+
+
+def _ingest(jobs: List[Dict]) -> List[Dict]:
+    """Store a scraped batch under this worker's region; returns the newly inserted jobs."""
+    return get_new_jobs([{**job, "region": REGION} for job in jobs])
+
+
+def _group_queued_deliveries(rows: List[Dict]) -> List[Group]:
+    """
+    Group deliveries already queued by match_jobs_to_deliveries (MATCH_ENGINE=sql).
+    Rows carry the subscription, email and job fields.
+    """
+    items_for_email: Dict[str, List[tuple[int, Dict]]] = {}
+    for row in rows:
+        items_for_email.setdefault(row["email"], []).append((int(row["subscription_id"]), row))
+
+    groups: List[Group] = []
+    for email, items in items_for_email.items():
+        sub_to_job_ids: Dict[int, List[int]] = {}
+        for sub_id, job in items:
+            sub_to_job_ids.setdefault(sub_id, []).append(int(job["id"]))
+        groups.append((email, items, sub_to_job_ids))
+    return groups
+
+
+async def _match_jobs(jobs: List[Dict], subs: List[Dict]) -> List[Group]:
+    """Match stored jobs and queue their deliveries with the configured engine."""
+    if not jobs:
+        return []
+    if MATCH_ENGINE == "sql":
+        rows = await asyncio.to_thread(
+            match_jobs_to_deliveries,
+            [job["id"] for job in jobs if job.get("id")],
+            region=REGION,
+            empty_pref_matches_all=True,
+        )
+        return _group_queued_deliveries(rows)
+    if not subs:
+        return []
+    return await asyncio.to_thread(_queue_deliveries, await match_pairs(jobs, subs))
+
+
 async def run_once() -> int:
     """
     Do one full check:
-    - fetch jobs
-    - keep only new jobs (when not in TEST_MODE)
-    - match new jobs to subscriptions
-    - send emails
+    - stream scraped jobs through ingest -> match -> deliver (worker.pipeline)
+    - then match recent stored jobs once more for subscriptions added since
     Returns number of emails sent.
     """
+    global _cycle
+    # The cycle reads jobs and deliveries it has just written: no replica reads.
+    with reads_on_primary():
+        _cycle = DeliveryCycle()
+        try:
+            return await _run_cycle()
+        finally:
+            # Outcomes not flushed by the pipeline (TEST_MODE, catch-up, failures).
+            try:
+                await asyncio.to_thread(_cycle.flush)
+            finally:
+                _cycle.close()
+                _cycle = None
+
+
+def _flush_deliveries() -> None:
+    """Write the sent/failed marks recorded since the last flush (one transaction)."""
+    if _cycle is not None:
+        _cycle.flush()
+
+
+async def _run_cycle() -> int:
     log.info("Checking for jobs...")
+    _rendered_bodies.clear()
+    if _delivered_pairs is not None:
+        _delivered_pairs.refresh()
 
     if TEST_MODE:
         jobs = [
@@ -163,139 +428,79 @@ async def run_once() -> int:
                 "url": "https://example.com/job3",
             },
         ]
-        candidates = jobs
         log.info("TEST_MODE: using fake jobs", extra={"count": len(jobs)})
-    else:
-        jobs = await fetch_jobs(headless=HEADLESS)
-        new_jobs = get_new_jobs(jobs)
-        candidates = get_all_jobs(limit=200)
-        log.info(
-            "Fetched jobs: fetched=%d new=%d db_jobs=%d",
-            len(jobs),
-            len(new_jobs),
-            len(candidates),
-        )
-
-    if not candidates:
-        log.info("No jobs available to match this cycle.")
-        return 0
-
-    subs = get_active_subscriptions()
-    if not subs:
-        log.info("No active subscriptions. Nothing to send.")
-        return 0
-
-    # email -> list of (subscription_id, job)
-    alerts_for_email: Dict[str, List[tuple[int, Dict]]] = {}
-    seen_key_for_email: Dict[str, set[str]] = {}
-
-    for job in candidates:
-        for sub in subs:
-            if job_matches_subscription(job, sub):
-                email = (sub.get("email") or "").strip().lower()
-                if not email or "@" not in email:
-                    continue
-                sub_id = int(sub.get("id") or 0)
-                if sub_id <= 0:
-                    continue
-                job_key = f"{job.get('id') or ''}|{job.get('title') or ''}|{job.get('location') or ''}|{job.get('url') or ''}"
-                seen_key_for_email.setdefault(email, set())
-                if job_key in seen_key_for_email[email]:
-                    continue
-                seen_key_for_email[email].add(job_key)
-                alerts_for_email.setdefault(email, []).append((sub_id, job))
-
-    sent_count = 0
-    for email, items in alerts_for_email.items():
-        if not items:
-            continue
-
-        user = get_user_by_email(email)
-        if not user:
-            continue
-        user_id = int(user["id"])
-
-        sub_to_jobs: Dict[int, List[Dict]] = {}
-        for sub_id, job in items:
-            sub_to_jobs.setdefault(sub_id, []).append(job)
-
-        sub_to_job_ids: Dict[int, List[int]] = {}
-        filtered_items: List[tuple[int, Dict]] = []
-        for sub_id, jobs_for_sub in sub_to_jobs.items():
-            job_ids = [int(job.get("id")) for job in jobs_for_sub if job.get("id")]
-            if not job_ids:
-                continue
-            inserted_job_ids = create_alert_deliveries(
-                user_id=user_id, subscription_id=sub_id, job_ids=job_ids
-            )
-            if not inserted_job_ids:
-                continue
-            inserted_set = set(inserted_job_ids)
-            sub_to_job_ids[sub_id] = list(inserted_set)
-            for job in jobs_for_sub:
-                if job.get("id") in inserted_set:
-                    filtered_items.append((sub_id, job))
-
-        if not filtered_items:
-            continue
-
-        lines: List[str] = []
-        lines.append(f"{len(filtered_items)} job(s) found for your preferences.\n")
-
-        for idx, (_sub_id, job) in enumerate(filtered_items, start=1):
-            lines.append(f"Job {idx}")
-            lines.append(f"Title: {job.get('title')}")
-            if job.get("type"):
-                lines.append(f"Type: {job['type']}")
-            if job.get("duration"):
-                lines.append(f"Duration: {job['duration']}")
-            if job.get("pay"):
-                lines.append(f"Pay: {job['pay']}")
-            if job.get("location"):
-                lines.append(f"Location: {job['location']}")
-
-            summary_parts = [
-                job.get("type") or "",
-                job.get("duration") or "",
-                job.get("pay") or "",
-                job.get("location") or "",
-            ]
-            summary = ", ".join(p for p in summary_parts if p)
-            if summary:
-                lines.append(f"Profile: {job.get('title')} - {summary}")
-
-            lines.append(f"URL: {job.get('url')}")
-            lines.append("")
-
-        body = "\n".join(lines)
-        try:
-            send_email(email, body)
-            sent_count += 1
-            for sub_id, job_ids in sub_to_job_ids.items():
-                mark_alert_deliveries_sent(subscription_id=sub_id, job_ids=job_ids)
-        except Exception as e:
-            log.error("Failed to send email to %s: %s", email, e)
-            for sub_id, job_ids in sub_to_job_ids.items():
-                mark_alert_deliveries_failed(subscription_id=sub_id, job_ids=job_ids, error=str(e))
-
+        subs = get_active_subscriptions(region=REGION)
+        if not subs:
+            log.info("No active subscriptions. Nothing to send.")
+            return 0
+        groups = _queue_deliveries(await match_pairs(jobs, subs))
+        sent_count = sum(1 for group in groups if _send_alert(*group))
+        log.info("Cycle complete", extra={"sent_emails": sent_count})
+        return sent_count
+
+    # The sql engine matches inside Postgres; the others match against subscriptions
+    # loaded once per cycle.
+    subs = [] if MATCH_ENGINE == "sql" else get_active_subscriptions(region=REGION)
+    if not subs and MATCH_ENGINE != "sql":
+        log.info("No active subscriptions. Jobs are stored but nothing will be sent.")
+
+    # Stream: each scraped job is inserted, matched and emailed while the scrape continues.
+    stats = await run_pipeline(
+        iter_jobs(headless=HEADLESS),
+        ingest=_ingest,
+        match=lambda new_jobs: _match_jobs(new_jobs, subs),
+        deliver=_send_alert,
+        flush=_flush_deliveries,
+    )
+
+    # Only after a scrape that listed something, so a failed scrape closes nothing.
+    closed = close_stale_jobs(JOB_CLOSE_AFTER_HOURS, region=REGION) if stats["scraped"] else 0
+
+    # Catch-up: recent jobs may match subscriptions created or edited after the jobs
+    # were first seen (the app also backfills those right away, see app.alert_backfill).
+    # Pairs already delivered are skipped by alert_deliveries.
+    since = datetime.now(timezone.utc) - timedelta(hours=CATCH_UP_WINDOW_HOURS)
+    recent = get_all_jobs(min_pay_minor=min_pay_floor(subs), region=REGION, since=since)
+    catch_up_sent = 0
+    for group in await _match_jobs(recent, subs):
+        if await asyncio.to_thread(_send_alert, *group):
+            catch_up_sent += 1
+    await asyncio.to_thread(_flush_deliveries)
+
+    sent_count = stats["sent"] + catch_up_sent
+    log.info(
+        "Fetched jobs: fetched=%d new=%d closed=%d db_jobs=%d",
+        stats["scraped"],
+        stats["new"],
+        closed,
+        len(recent),
+    )
     log.info("Cycle complete", extra={"sent_emails": sent_count})
     return sent_count
 
 
 async def main():
+    global _delivered_pairs
     init_db()
+    _delivered_pairs = DeliveredPairs(CATCH_UP_WINDOW_HOURS)
+    _delivered_pairs.refresh()
+    log.info("Loaded delivered pairs", extra={"count": len(_delivered_pairs)})
+
+    try:
+        while True:
+            try:
+                await run_once()
+            except Exception as e:
+                log.exception("Error during run", extra={"error": str(e)})
+
+            if TEST_MODE:
+                break
 
-    while True:
-        try:
-            await run_once()
-        except Exception as e:
-            log.exception("Error during run", extra={"error": str(e)})
-
-        if TEST_MODE:
-            break
-
-        log.info("Sleeping", extra={"seconds": CHECK_INTERVAL})
-        await asyncio.sleep(CHECK_INTERVAL)
+            log.info("Sleeping", extra={"seconds": CHECK_INTERVAL})
+            await asyncio.sleep(CHECK_INTERVAL)
+    finally:
+        if _sharded_matcher is not None:
+            _sharded_matcher.shutdown()
 
 
 if __name__ == "__main__":
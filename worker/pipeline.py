@@ -0,0 +1,131 @@
+"""
+Streaming scrape -> ingest -> match -> deliver pipeline for one worker cycle.
+
+Each stage is an asyncio task connected to the next by a bounded queue:
+
+  scrape   iterates the engine's async job generator
+  ingest   micro-batches scraped jobs (up to batch_size, without waiting for more)
+           and inserts them; only newly inserted jobs move on
+  match    turns a batch of new jobs into per-email delivery groups
+  deliver  emails each group and records the outcome; flush() (optional) runs whenever
+           the stage has caught up with its queue, i.e. after each delivered batch
+
+A job can therefore be alerted while the scrape is still running, and memory is
+bounded by the queue sizes rather than by the size of a whole scrape. Blocking DB
+and SMTP calls run in threads so they never stall the scraper's event loop.
+
+If any stage fails, the others are cancelled and the error is raised to the caller.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Sequence
+
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "100"))
+PIPELINE_BATCH_SIZE = int(os.getenv("PIPELINE_BATCH_SIZE", "25"))
+
+# A delivery group is whatever the match stage produces and the deliver stage accepts
+# (the workers use (email, items, sub_to_job_ids) tuples).
+Ingest = Callable[[List[Dict]], List[Dict]]
+Match = Callable[[List[Dict]], Awaitable[Sequence[tuple]]]
+Deliver = Callable[..., bool]
+Flush = Callable[[], None]
+
+_DONE = object()
+
+
+async def _drain_batch(queue: asyncio.Queue, batch_size: int) -> tuple[List[Dict], bool]:
+    """Wait for one item, then take whatever else is already queued (up to batch_size)."""
+    batch: List[Dict] = []
+    item = await queue.get()
+    if item is _DONE:
+        return batch, True
+    batch.append(item)
+    while len(batch) < batch_size and not queue.empty():
+        item = queue.get_nowait()
+        if item is _DONE:
+            return batch, True
+        batch.append(item)
+    return batch, False
+
+
+async def run_pipeline(
+    source: AsyncIterator[Dict],
+    *,
+    ingest: Ingest,
+    match: Match,
+    deliver: Deliver,
+    flush: Flush | None = None,
+    queue_size: int = PIPELINE_QUEUE_SIZE,
+    batch_size: int = PIPELINE_BATCH_SIZE,
+) -> Dict[str, int]:
+    """
+    Run one cycle through the pipeline.
+
+    ingest(jobs) -> newly inserted jobs (sync, run in a thread)
+    match(new_jobs) -> delivery groups (async)
+    deliver(*group) -> True if an email was sent (sync, run in a thread)
+    flush() -> None, after each delivered batch and at the end (sync, run in a thread)
+
+    Returns counters: scraped, new, groups, sent.
+    """
+    scraped_q: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+    new_q: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+    deliver_q: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+    stats = {"scraped": 0, "new": 0, "groups": 0, "sent": 0}
+
+    async def scrape_stage() -> None:
+        async for job in source:
+            stats["scraped"] += 1
+            await scraped_q.put(job)
+        await scraped_q.put(_DONE)
+
+    async def ingest_stage() -> None:
+        done = False
+        while not done:
+            batch, done = await _drain_batch(scraped_q, max(1, batch_size))
+            if not batch:
+                continue
+            new_jobs = await asyncio.to_thread(ingest, batch)
+            if new_jobs:
+                stats["new"] += len(new_jobs)
+                await new_q.put(new_jobs)
+        await new_q.put(_DONE)
+
+    async def match_stage() -> None:
+        while (new_jobs := await new_q.get()) is not _DONE:
+            for group in await match(new_jobs):
+                stats["groups"] += 1
+                await deliver_q.put(group)
+        await deliver_q.put(_DONE)
+
+    async def deliver_stage() -> None:
+        while (group := await deliver_q.get()) is not _DONE:
+            if await asyncio.to_thread(deliver, *group):
+                stats["sent"] += 1
+            if flush is not None and deliver_q.empty():
+                await asyncio.to_thread(flush)
+        if flush is not None:
+            await asyncio.to_thread(flush)
+
+    tasks = [
+        asyncio.create_task(scrape_stage()),
+        asyncio.create_task(ingest_stage()),
+        asyncio.create_task(match_stage()),
+        asyncio.create_task(deliver_stage()),
+    ]
+    try:
+        done, _pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            if task.exception() is not None:
+                raise task.exception()
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return stats
+
+
+__all__ = ["PIPELINE_QUEUE_SIZE", "PIPELINE_BATCH_SIZE", "run_pipeline"]
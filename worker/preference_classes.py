@@ -0,0 +1,54 @@
+"""
+Preference equivalence classes.
+
+Many subscriptions share an identical compiled preference (everyone on "Any"/"Any",
+everyone on the same area group, ...). PreferenceClasses groups subscriptions by a
+hashable key, so a matcher only evaluates one representative per distinct key and
+the matches are fanned back out to every member. Matching cost then scales with the
+number of distinct preferences instead of the number of subscribers.
+"""
+from __future__ import annotations
+
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, Sequence, Tuple
+
+
+class PreferenceClasses:
+    """Group subscriptions by key(sub); representatives keep first-seen order."""
+
+    def __init__(self, subs: Sequence[Dict], key: Callable[[Dict], Hashable]):
+        self.subs = subs
+        self.representatives: List[Dict] = []
+        self.members: List[List[int]] = []
+        index: Dict[Hashable, int] = {}
+        for pos, sub in enumerate(subs):
+            k = key(sub)
+            cls = index.get(k)
+            if cls is None:
+                cls = index[k] = len(self.representatives)
+                self.representatives.append(sub)
+                self.members.append([])
+            self.members[cls].append(pos)
+
+    def __len__(self) -> int:
+        return len(self.representatives)
+
+    def fan_out(
+        self, candidates: Sequence[Dict], pairs: Iterable[Tuple[int, int]]
+    ) -> Iterator[Tuple[Dict, Dict]]:
+        """
+        Expand job-major (job_index, class_index) pairs into (job, subscription) pairs,
+        in the same job-major, subscription order a per-subscription matcher yields.
+        """
+        current_job = None
+        positions: List[int] = []
+        for job_idx, cls in pairs:
+            if job_idx != current_job:
+                if positions:
+                    yield from ((candidates[current_job], self.subs[p]) for p in sorted(positions))
+                current_job, positions = job_idx, []
+            positions.extend(self.members[cls])
+        if positions:
+            yield from ((candidates[current_job], self.subs[p]) for p in sorted(positions))
+
+
+__all__ = ["PreferenceClasses"]
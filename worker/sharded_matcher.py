@@ -0,0 +1,206 @@
+"""
+Process-pool sharded matching for large subscriber bases.
+
+Active subscriptions are partitioned by id into N shards. Each shard is owned by a
+single-process executor that keeps that shard's compiled preferences in memory, keyed
+by subscription id; per cycle only the (small) candidate job list is sent to the
+workers. A subscription added, edited or removed since the last cycle is shipped to
+its live executor as a single entry, so the rest of the shard is never re-pickled.
+
+Compiling preferences (location expansion, radius lookups) is cached per subscription
+and its preference fields, and partitioning runs in a thread, so neither touches the
+event loop. Matching uses up to N cores. Results are merged back in the same
+job-major, subscription-order as the in-process matchers.
+"""
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Hashable, List, Sequence, Tuple
+
+from core.db.jobs.job_kinds import kind_matches, kind_of_job
+from core.db.jobs.pay import pay_matches, pay_of_job
+from worker import bitset_matcher
+from worker.bitset_matcher import SubscriptionPrefs
+
+# Subscription fields a compiled preference is derived from.
+PREFERENCE_FIELDS = (
+    "preferred_location", "radius_miles", "job_type", "job_kind_mask", "min_pay_minor", "active",
+)
+
+# Per-process state of a pool worker: sub id -> prefs, plus its lazily built encoding.
+_shard_prefs: Dict[int, SubscriptionPrefs] = {}
+_shard_compiled: Tuple[str, List[int], object] | None = None
+
+
+def _prefs_match(job: Dict, prefs: SubscriptionPrefs) -> bool:
+    tokens, any_mode, kind_mask, min_pay_minor = prefs
+    if not pay_matches(job["pay_minor"], min_pay_minor):
+        return False
+    job_location = (job.get("location") or "").lower()
+    if not any_mode and not any(tok in job_location for tok in tokens):
+        return False
+    return kind_matches(job["kind_mask"], kind_mask)
+
+
+def _load_shard(prefs: Dict[int, SubscriptionPrefs]) -> None:
+    """Pool initializer: this shard's compiled preferences, shipped once per process."""
+    global _shard_prefs, _shard_compiled
+    _shard_prefs = dict(prefs)
+    _shard_compiled = None
+
+
+def _update_shard(upserts: Dict[int, SubscriptionPrefs], removed: List[int]) -> None:
+    """Apply the subscriptions changed since the last cycle."""
+    global _shard_compiled
+    for sub_id in removed:
+        _shard_prefs.pop(sub_id, None)
+    _shard_prefs.update(upserts)
+    _shard_compiled = None
+
+
+def _compiled() -> Tuple[str, List[int], object]:
+    global _shard_compiled
+    if _shard_compiled is None:
+        ids = list(_shard_prefs)
+        prefs = [_shard_prefs[sub_id] for sub_id in ids]
+        if bitset_matcher.available():
+            _shard_compiled = ("numpy", ids, bitset_matcher.encode_subscriptions(prefs))
+        else:
+            _shard_compiled = ("python", ids, prefs)
+    return _shard_compiled
+
+
+def _match_shard(jobs: List[Dict]) -> List[Tuple[int, int]]:
+    """Return (job_index, subscription id) pairs for the loaded shard."""
+    if not _shard_prefs:
+        return []
+    engine, ids, compiled = _compiled()
+    if engine == "numpy":
+        rows, cols = bitset_matcher.match_encoded(jobs, compiled).nonzero()
+        return [(job_idx, ids[sub_idx]) for job_idx, sub_idx in zip(rows.tolist(), cols.tolist())]
+    return [
+        (job_idx, ids[sub_idx])
+        for job_idx, job in enumerate(jobs)
+        for sub_idx, prefs in enumerate(compiled)
+        if _prefs_match(job, prefs)
+    ]
+
+
+def preference_fields(sub: Dict) -> tuple:
+    """The PREFERENCE_FIELDS of sub; equal fields compile to equal preferences."""
+    return tuple(sub.get(field) for field in PREFERENCE_FIELDS)
+
+
+class ShardedMatcher:
+    """
+    Keep one single-process executor per shard, each holding its subscriptions.
+
+    prefs_for(sub) must return the (tokens, any_mode, job_kind_mask, min_pay_minor) tuple used by the
+    worker's own matcher so results are identical. It is called again for a subscription
+    only when key(sub) changes (by default, its PREFERENCE_FIELDS).
+    """
+
+    def __init__(
+        self,
+        shards: int,
+        prefs_for: Callable[[Dict], SubscriptionPrefs],
+        key: Callable[[Dict], Hashable] = preference_fields,
+    ):
+        self.shards = max(1, int(shards))
+        self._prefs_for = prefs_for
+        self._key = key
+        self._compiled: Dict[Tuple[int, Hashable], SubscriptionPrefs] = {}
+        self._executors: List[ProcessPoolExecutor | None] = [None] * self.shards
+        self._loaded: List[Dict[int, SubscriptionPrefs]] = [{} for _ in range(self.shards)]
+        self.reloads = 0  # executors (re)started with a full shard
+        self.shipped = 0  # single subscriptions sent to a live executor
+
+    def _partition(self, subs: Sequence[Dict]):
+        """
+        Split subs into shards; returns (per-shard sub id -> positions in subs,
+        per-shard sub id -> prefs). Runs in a thread.
+        """
+        positions: List[Dict[int, List[int]]] = [{} for _ in range(self.shards)]
+        prefs: List[Dict[int, SubscriptionPrefs]] = [{} for _ in range(self.shards)]
+        compiled: Dict[Tuple[int, Hashable], SubscriptionPrefs] = {}
+        for pos, sub in enumerate(subs):
+            sub_id = int(sub.get("id") or 0)
+            shard = sub_id % self.shards
+            cache_key = (sub_id, self._key(sub))
+            sub_prefs = compiled.get(cache_key) or self._compiled.get(cache_key)
+            if sub_prefs is None:
+                tokens, any_mode, kind_mask, min_pay_minor = self._prefs_for(sub)
+                sub_prefs = (tuple(tokens), bool(any_mode), int(kind_mask), min_pay_minor or None)
+            compiled[cache_key] = sub_prefs
+            positions[shard].setdefault(sub_id, []).append(pos)
+            prefs[shard][sub_id] = sub_prefs
+        self._compiled = compiled  # drops subscriptions that are gone or were edited
+        return positions, prefs
+
+    def _start(self, shard: int, prefs: Dict[int, SubscriptionPrefs]) -> None:
+        if self._executors[shard] is not None:
+            self._executors[shard].shutdown(wait=False, cancel_futures=True)
+        self._executors[shard] = ProcessPoolExecutor(
+            max_workers=1,
+            initializer=_load_shard,
+            initargs=(dict(prefs),),
+        )
+        self._loaded[shard] = dict(prefs)
+        self.reloads += 1
+
+    async def _sync(self, shard_prefs: List[Dict[int, SubscriptionPrefs]]) -> None:
+        """Start missing executors and ship each live one only its changed subscriptions."""
+        loop = asyncio.get_running_loop()
+        for shard, prefs in enumerate(shard_prefs):
+            if self._executors[shard] is None:
+                self._start(shard, prefs)
+                continue
+            loaded = self._loaded[shard]
+            upserts = {sub_id: p for sub_id, p in prefs.items() if loaded.get(sub_id) != p}
+            removed = [sub_id for sub_id in loaded if sub_id not in prefs]
+            if not upserts and not removed:
+                continue
+            try:
+                await loop.run_in_executor(self._executors[shard], _update_shard, upserts, removed)
+            except BrokenProcessPool:
+                self._start(shard, prefs)
+                continue
+            self._loaded[shard] = dict(prefs)
+            self.shipped += len(upserts) + len(removed)
+
+    async def match(self, candidates: List[Dict], subs: List[Dict]) -> List[Tuple[Dict, Dict]]:
+        """Return matching (job, sub) pairs in job-major order, matched across shards."""
+        if not candidates or not subs:
+            return []
+
+        positions, shard_prefs = await asyncio.to_thread(self._partition, subs)
+        await self._sync(shard_prefs)
+
+        payload = [
+            {"location": job.get("location"), "kind_mask": kind_of_job(job), "pay_minor": pay_of_job(job)}
+            for job in candidates
+        ]
+        loop = asyncio.get_running_loop()
+        shard_ids = [s for s in range(self.shards) if positions[s]]
+        results = await asyncio.gather(
+            *(loop.run_in_executor(self._executors[s], _match_shard, payload) for s in shard_ids)
+        )
+
+        merged: List[Tuple[int, int]] = []
+        for shard, pairs in zip(shard_ids, results):
+            members = positions[shard]
+            merged.extend((job_idx, pos) for job_idx, sub_id in pairs for pos in members[sub_id])
+        merged.sort()
+        return [(candidates[job_idx], subs[pos]) for job_idx, pos in merged]
+
+    def shutdown(self) -> None:
+        for shard, executor in enumerate(self._executors):
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+            self._executors[shard] = None
+            self._loaded[shard] = {}
+
+
+__all__ = ["PREFERENCE_FIELDS", "ShardedMatcher", "preference_fields"]